@@ -1,12 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
 import json
 import time
 from simulator_files.problem_manager import ProblemManager, Problem
 from simulator_files.calculator import ScientificCalculator
-from simulator_files.exam_stats import ExamStats
+from simulator_files.exam_stats import create_exam_stats, QuestionAttempt
 from simulator_files.latex_renderer import LaTeXRenderer
+from simulator_files.media_cache import MediaCache
+from simulator_files.question_prefetcher import QuestionPrefetcher
+from simulator_files.answer_choices import AnswerChoices, UNSET
+from simulator_files.debug_logger import setup_debug_logging
+from simulator_files.history_view import VirtualHistoryList
+from simulator_files.document_session import DocumentSession
 import os
 import sys
 import re
@@ -31,26 +36,46 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
-def get_debug_log_path():
+def get_media_dir():
     if getattr(sys, 'frozen', False):
-        # Running as compiled EXE - write to user's home directory
-        home_dir = os.path.expanduser("~")
-        return os.path.join(home_dir, 'fe_simulator_debug.log')
+        # Running as EXE
+        return os.path.join(sys._MEIPASS, "media")
     else:
-        # Running as script - write to simulator_files directory
-        return os.path.join(os.path.dirname(__file__), 'simulator_files', 'debug.log')
+        # Running as script
+        return "media"
 
-# Write to a log file to track execution
-with open(get_debug_log_path(), "w") as f:
-    f.write("Starting program...\n")
+# How many questions ahead the prefetcher prepares media and text for
+QUESTION_LOOKAHEAD = 3
 
-class FEExamSimulator(tk.Tk):
-    def __init__(self, test_type="timed", num_questions=5, selected_categories=None):
-        with open(get_debug_log_path(), "a") as f:
-            f.write("Initializing FEExamSimulator...\n")
-        super().__init__()
-        self.title("FE Exam Practice Software")
-        self.state('zoomed')
+# Log to a rotating file through a background writer; see debug_logger for levels
+logger = setup_debug_logging()
+logger.info("Starting program...")
+
+def configure_styles():
+    """Register the ttk styles used by the dashboard and exam screens"""
+    style = ttk.Style()
+    style.configure('TopBar.TFrame', background='#0269B6')  # Science Blue
+    style.configure('TopBar.TLabel', background='#0269B6', foreground='white', font=('Arial', 9))
+    style.configure('SecondaryBar.TFrame', background='#8AB9EE')  # Jordy Blue
+    style.configure('Tool.TButton', padding=2, font=('Arial', 12))
+    style.configure('Calculator.TButton', padding=2, font=('Arial', 11))
+    style.configure('Flag.TButton', padding=2, font=('Arial', 11))
+    
+    # Add styles for question navigator buttons
+    style.configure('Current.TButton', background='#4CAF50', foreground='black')  # Green for current question with black text
+    style.configure('Flagged.TButton', background='#FFC107', foreground='black')  # Yellow for flagged questions with black text
+    
+    # Configure the large radio button style
+    style.configure('Large.TRadiobutton', font=('Arial', 11))
+    
+    # Configure the large navigation button style
+    style.configure('Large.TButton', font=('Arial', 12))
+
+class FEExamSimulator(tk.Frame):
+    def __init__(self, app, test_type="timed", num_questions=5, selected_categories=None):
+        logger.info("Initializing FEExamSimulator...")
+        super().__init__(app, bg='#f0f0f0')
+        self.app = app
         
         # Store test settings
         self.test_type = test_type
@@ -60,48 +85,32 @@ class FEExamSimulator(tk.Tk):
         self.answered_questions = set()
         self.flagged_questions = set()
         self.user_answers = {}  # Store user's answers
+        self.question_dwell = {}  # Seconds spent on each question, by index
+        self._shown_index = None
+        self._shown_at = None
         
         # Track exam time
         self.start_time = time.time()
+        self.timer_job = None  # Pending timer or grace period callback
         
-        # Set color scheme
-        self.configure(bg='#f0f0f0')
-        style = ttk.Style()
-        style.configure('TopBar.TFrame', background='#0269B6')  # Science Blue
-        style.configure('TopBar.TLabel', background='#0269B6', foreground='white', font=('Arial', 9))
-        style.configure('SecondaryBar.TFrame', background='#8AB9EE')  # Jordy Blue
-        style.configure('Tool.TButton', padding=2, font=('Arial', 12))
-        style.configure('Calculator.TButton', padding=2, font=('Arial', 11))
-        style.configure('Flag.TButton', padding=2, font=('Arial', 11))
-        
-        # Add styles for question navigator buttons
-        style.configure('Current.TButton', background='#4CAF50', foreground='black')  # Green for current question with black text
-        style.configure('Flagged.TButton', background='#FFC107', foreground='black')  # Yellow for flagged questions with black text
-        
-        # Configure the large radio button style
-        style.configure('Large.TRadiobutton', font=('Arial', 11))
-        
-        # Configure the large navigation button style
-        style.configure('Large.TButton', font=('Arial', 12))
-        
-        # Initialize the problem manager
+        # Draw this exam's problems from the bank the application keeps loaded
         try:
-            self.problem_manager = ProblemManager(num_questions=self.num_questions)
+            self.problem_manager = app.get_problem_manager()
+            self.problem_manager.new_exam(self.num_questions, selected_categories or None)
             # Debug logging
-            with open(get_debug_log_path(), "a") as f:
-                f.write(f"Problem manager initialized with {self.problem_manager.total_problems()} problems\n")
+            logger.info("Problem manager initialized with %s problems", self.problem_manager.total_problems())
         except Exception as e:
             # Debug logging
-            with open(get_debug_log_path(), "a") as f:
-                f.write(f"Error initializing problem manager: {str(e)}\n")
+            logger.error("Error initializing problem manager: %s", str(e))
             raise
         
-        # Set selected categories BEFORE loading the first problem
-        if selected_categories:
-            self.problem_manager.set_categories(selected_categories)
-        
-        # Initialize LaTeX renderer
-        self.latex_renderer = LaTeXRenderer()
+        # LaTeX renderer and image cache are shared by every exam
+        self.latex_renderer = app.latex_renderer
+        self.media_cache = app.media_cache
+
+        # Prepares the next questions' media and text while the current one is read
+        self.question_prefetcher = QuestionPrefetcher(self, self.media_cache, self.latex_renderer,
+                                                     lookahead=QUESTION_LOOKAHEAD)
         
         # Configure the main window grid
         self.grid_columnconfigure(0, weight=1)
@@ -138,17 +147,14 @@ class FEExamSimulator(tk.Tk):
         # Flag to track if this is a resumed exam
         self.is_resumed_exam = False
         
-        # Show initial message instead of loading first problem
-        self.show_pdf_requirement_message()
-        
         # Bind keyboard shortcuts
         self.bind_keyboard_shortcuts()
         
-        # Bind window close event to prevent accidental exit
-        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        # Show initial message, or start right away if the handbook is already open
+        self.wait_for_reference_manual()
 
     @classmethod
-    def from_saved_state(cls, exam_state):
+    def from_saved_state(cls, app, exam_state):
         """Create a simulator instance from a saved exam state"""
         # Create instance with saved settings
         instance = cls.__new__(cls)
@@ -160,29 +166,23 @@ class FEExamSimulator(tk.Tk):
         instance.flagged_questions = set(exam_state['flagged_questions'])
         # Ensure user_answers keys are integers
         instance.user_answers = {int(k): v for k, v in exam_state['user_answers'].items()}
+        instance.question_dwell = {int(k): v for k, v in exam_state.get('question_dwell', {}).items()}
+        instance._shown_index = None
+        instance._shown_at = None
         instance.start_time = exam_state['start_time']
+        instance.timer_job = None
+        
+        # Initialize the exam frame
+        super(cls, instance).__init__(app, bg='#f0f0f0')
+        instance.app = app
         
-        # Initialize the main window
-        super(cls, instance).__init__()
-        instance.title("FE Exam Practice Software")
-        instance.state('zoomed')
-        
-        # Set color scheme
-        instance.configure(bg='#f0f0f0')
-        style = ttk.Style()
-        style.configure('TopBar.TFrame', background='#0269B6')  # Science Blue
-        style.configure('TopBar.TLabel', background='#0269B6', foreground='white', font=('Arial', 9))
-        style.configure('SecondaryBar.TFrame', background='#8AB9EE')  # Jordy Blue
-        style.configure('Tool.TButton', padding=2, font=('Arial', 12))
-        style.configure('Calculator.TButton', padding=2, font=('Arial', 11))
-        style.configure('Flag.TButton', padding=2, font=('Arial', 11))
-        style.configure('Current.TButton', background='#4CAF50', foreground='black')
-        style.configure('Flagged.TButton', background='#FFC107', foreground='black')
-        style.configure('Large.TRadiobutton', font=('Arial', 11))
-        style.configure('Large.TButton', font=('Arial', 12))
-        
-        # Initialize LaTeX renderer
-        instance.latex_renderer = LaTeXRenderer()
+        # LaTeX renderer and image cache are shared by every exam
+        instance.latex_renderer = app.latex_renderer
+        instance.media_cache = app.media_cache
+
+        # Prepares the next questions' media and text while the current one is read
+        instance.question_prefetcher = QuestionPrefetcher(instance, instance.media_cache, instance.latex_renderer,
+                                                     lookahead=QUESTION_LOOKAHEAD)
         
         # Configure the main window grid
         instance.grid_columnconfigure(0, weight=1)
@@ -195,12 +195,13 @@ class FEExamSimulator(tk.Tk):
         instance.create_secondary_bar()
         instance.create_main_content()
 
-        # Initialize problem manager with saved problems (after UI is created)
-        instance.problem_manager = ProblemManager(num_questions=instance.num_questions)
+        # Reuse the loaded problem bank with the saved problems (after UI is created)
+        instance.problem_manager = app.get_problem_manager()
+        instance.problem_manager.num_questions = instance.num_questions
         instance.problem_manager.selected_categories = exam_state['selected_categories']
         
         # Reconstruct problems from saved state
-        instance.problem_manager.problems = []
+        problems = []
         for problem_data in exam_state['problems']:
             problem = Problem(
                 number=problem_data[0],
@@ -211,28 +212,18 @@ class FEExamSimulator(tk.Tk):
                 correct_answer=problem_data[5],
                 media_size=problem_data[6]
             )
-            instance.problem_manager.problems.append(problem)
+            problems.append(problem)
+        instance.problem_manager.set_problems(problems)
         
         # Set current index
         instance.problem_manager.current_index = exam_state['current_index']
 
         # For resumed exams, we need to handle PDF loading for both timed and untimed exams
+        instance.exam_started = False
+        instance.pdf_loaded = False
         if instance.test_type == "timed":
-            # Set flags to require PDF loading
-            instance.exam_started = False
-            instance.pdf_loaded = False
             instance.remaining_time = exam_state['remaining_time']
             instance.grace_period = 5  # 5 second grace period for resumed exams
-            
-            # Show PDF requirement message instead of loading problem
-            instance.show_pdf_requirement_message()
-        else:
-            # For untimed exams, also require PDF loading
-            instance.exam_started = False
-            instance.pdf_loaded = False
-            
-            # Show PDF requirement message instead of loading problem
-            instance.show_pdf_requirement_message()
         
         # Flag to prevent timer updates when window is being destroyed
         instance.is_destroying = False
@@ -243,8 +234,8 @@ class FEExamSimulator(tk.Tk):
         # Bind keyboard shortcuts
         instance.bind_keyboard_shortcuts()
         
-        # Bind window close event to prevent accidental exit
-        instance.protocol("WM_DELETE_WINDOW", instance.on_closing)
+        # Show PDF requirement message, or resume right away if the handbook is already open
+        instance.wait_for_reference_manual()
         
         return instance
 
@@ -325,22 +316,20 @@ class FEExamSimulator(tk.Tk):
         handbook_frame.grid_rowconfigure(0, weight=1)
         handbook_frame.grid_columnconfigure(0, weight=1)
         
-        # Initialize PDF viewer without a default PDF
+        # Show the application's PDF viewer, which keeps the handbook open between exams
         try:
-            from simulator_files.custom_pdf_viewer import CustomPDFViewer
-            self.pdf_viewer = CustomPDFViewer(handbook_frame)
-            self.pdf_viewer.grid(row=0, column=0, sticky="nsew")
+            self.pdf_viewer = self.app.get_pdf_viewer()
+            self.pdf_viewer.grid(in_=handbook_frame, row=0, column=0, sticky="nsew")
+            self.pdf_viewer.lift()  # Stack the shared viewer above this frame so it shows
             
             # Set callback for when PDF is loaded
             self.pdf_viewer.set_pdf_loaded_callback(self.on_pdf_loaded)
             
             # Debug logging
-            with open(get_debug_log_path(), "a") as f:
-                f.write("PDF viewer initialized successfully\n")
+            logger.info("PDF viewer initialized successfully")
         except Exception as e:
             # Debug logging
-            with open(get_debug_log_path(), "a") as f:
-                f.write(f"Error initializing PDF viewer: {str(e)}\n")
+            logger.error("Error initializing PDF viewer: %s", str(e))
             
             # Create a simple placeholder if PDF viewer fails
             placeholder = ttk.Label(handbook_frame, text="PDF Viewer failed to load\nPlease restart the application", 
@@ -366,15 +355,10 @@ class FEExamSimulator(tk.Tk):
         problem_scrollbar.grid(row=0, column=1, sticky="ns")
         self.problem_text.configure(yscrollcommand=problem_scrollbar.set)
         
-        # Answer choices
-        self.answers_frame = ttk.Frame(problem_frame)
-        self.answers_frame.grid(row=1, column=0, sticky="ew", padx=15, pady=10)
-        
+        # Answer choices, reconfigured in place for each question
         self.answer_var = tk.StringVar()
-        self.answer_buttons = []
-        
-        # Add trace to track answer selection
-        self._trace_id = self.answer_var.trace_add("write", self.on_answer_selected)
+        self.answers_frame = AnswerChoices(problem_frame, self.answer_var, self.on_answer_selected)
+        self.answers_frame.grid(row=1, column=0, sticky="ew", padx=15, pady=10)
         
         # Create a frame for navigation buttons at the bottom of the window
         nav_frame = ttk.Frame(self)
@@ -402,7 +386,7 @@ class FEExamSimulator(tk.Tk):
         nav_window = tk.Toplevel(self)
         nav_window.title("Question Navigator")
         nav_window.geometry("400x300")
-        nav_window.transient(self)  # Make window stay on top of main window
+        nav_window.transient(self.app)  # Make window stay on top of main window
         nav_window.grab_set()  # Make window modal
         
         # Create a frame for the buttons
@@ -464,18 +448,18 @@ class FEExamSimulator(tk.Tk):
 
     def load_current_problem(self):
         # Debug logging
-        with open(get_debug_log_path(), "a") as f:
-            f.write(f"load_current_problem called - exam_started: {self.exam_started}, pdf_loaded: {self.pdf_loaded}\n")
+        logger.debug("load_current_problem called - exam_started: %s, pdf_loaded: %s", self.exam_started, self.pdf_loaded)
         
         # Check if exam has started (PDF loaded)
         if not self.exam_started and not self.pdf_loaded:
-            with open(get_debug_log_path(), "a") as f:
-                f.write("Showing PDF requirement message\n")
+            logger.debug("Showing PDF requirement message")
             self.show_pdf_requirement_message()
             return
             
-        # Clear the problem text
-        self.problem_text.delete(1.0, tk.END)
+        self.record_dwell_time()
+
+        # Clear the problem text, releasing the previous question's formula images
+        self.latex_renderer.clear_text(self.problem_text)
         
         # Get the current problem
         problem = self.problem_manager.get_current_problem()
@@ -487,9 +471,17 @@ class FEExamSimulator(tk.Tk):
         total = self.problem_manager.total_problems()
         self.question_number.config(text=f"Question {current} of {total}")
 
-        # Display the question with LaTeX rendering
-        question_text = self.latex_renderer.convert_latex_to_unicode(problem.question)
-        self.problem_text.insert(tk.END, f"{question_text}\n")
+        # Use text prerendered into the bank, or prepared by the prefetcher, when available
+        prepared = problem.rendered or self.question_prefetcher.get_text(problem)
+        if prepared is not None:
+            question_segments, choice_texts = prepared
+        else:
+            question_segments = self.latex_renderer.text_segments(problem.question)
+            choice_texts = [self.latex_renderer.convert_latex_to_unicode(choice) for choice in problem.choices]
+
+        # Display the question; inline math goes in with the math font (or as formula
+        # images) together with the surrounding text in one batched insert
+        self.latex_renderer.insert_segments(self.problem_text, [*question_segments, ("\n", (), None)])
         
         # Display media if present
         if problem.media:
@@ -497,90 +489,27 @@ class FEExamSimulator(tk.Tk):
                 # Add a newline before the media
                 self.problem_text.insert(tk.END, "\n\n")
                 
-                # Load and display the media file - Updated for PyInstaller compatibility
-                if getattr(sys, 'frozen', False):
-                    # Running as EXE
-                    media_path = os.path.join(sys._MEIPASS, "media", problem.media)
-                else:
-                    # Running as script
-                    media_path = os.path.join("media", problem.media)
-                
-                # Debug output
-                print(f"Looking for media file: {problem.media}")
-                print(f"Full media path: {media_path}")
-                print(f"File exists: {os.path.exists(media_path)}")
-                
-                # Handle case-insensitive file extension
-                if not os.path.exists(media_path):
-                    base, ext = os.path.splitext(media_path)
-                    # Try different case combinations
-                    for case_ext in [ext.lower(), ext.upper()]:
-                        alt_path = base + case_ext
-                        if os.path.exists(alt_path):
-                            media_path = alt_path
-                            print(f"Found file with different case: {alt_path}")
-                            break
-                
-                # Handle spaces in filename
-                if not os.path.exists(media_path):
-                    alt_path = media_path.replace("_", " ")
-                    if os.path.exists(alt_path):
-                        media_path = alt_path
-                        print(f"Found file with spaces: {alt_path}")
-                
-                if os.path.exists(media_path):
-                    print(f"Successfully loading media from: {media_path}")
-                    img = Image.open(media_path)
-                    # Scale image based on media_size value (default to 100 if not present)
-                    scale_factor = problem.media_size / 100 if hasattr(problem, 'media_size') else 1.0
-                    new_width = int(img.width * scale_factor)
-                    new_height = int(img.height * scale_factor)
-                    img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    # Convert to PhotoImage
-                    photo = ImageTk.PhotoImage(img)
+                # Resized images are cached in memory and on disk, keyed by file, size and mtime
+                photo = self.media_cache.get_photo(problem.media, problem.media_size)
+                if photo is not None:
                     # Insert the image
                     self.problem_text.image_create(tk.END, image=photo)
                     # Keep a reference to prevent garbage collection
                     self.problem_text.media_image = photo
                 else:
-                    print(f"Media file not found: {media_path}")
+                    print(f"Media file not found: {problem.media}")
                     self.problem_text.insert(tk.END, f"\n[Media file not found: {problem.media}]")
             except Exception as e:
                 print(f"Error loading media: {str(e)}")
                 self.problem_text.insert(tk.END, f"\n[Error loading media: {str(e)}]")
 
-        # Temporarily remove the trace to prevent unwanted callbacks
-        self.answer_var.trace_remove("write", self._trace_id)
-        
-        # Reset the answer variable to clear any previous selection
-        self.answer_var.set("_unset_")
-
-        # Clear and update answer choices
-        for widget in self.answers_frame.winfo_children():
-            widget.destroy()
-
-        self.answer_buttons = []
-        for choice in problem.choices:
-            # Convert LaTeX to Unicode for the answer text
-            answer_text = self.latex_renderer.convert_latex_to_unicode(choice)
-            btn = tk.Radiobutton(self.answers_frame,
-                                 text=answer_text,
-                                variable=self.answer_var,
-                                 value=choice,
-                                 anchor='w',
-                                 justify='left',
-                                 font=('Arial', 11),
-                                 wraplength=500)
-            btn.pack(anchor=tk.W, padx=5, pady=2, fill=tk.X)
-            self.answer_buttons.append(btn)
-
-            # If this question was previously answered, restore the selection
-            if self.problem_manager.current_index in self.user_answers:
-                if choice == self.user_answers[self.problem_manager.current_index]:
-                    self.answer_var.set(choice)
-        
-        # Restore the trace after setting up the answer choices
-        self._trace_id = self.answer_var.trace_add("write", self.on_answer_selected)
+        # Update answer choices, restoring the selection if this question was answered before
+        self.answers_frame.show(problem.choices, choice_texts,
+                                selected=self.user_answers.get(self.problem_manager.current_index))
+
+        # Start preparing the questions that follow this one
+        next_index = self.problem_manager.current_index + 1
+        self.question_prefetcher.prefetch(self.problem_manager.problems[next_index:next_index + QUESTION_LOOKAHEAD])
         
         # Update progress
         self.update_progress()
@@ -594,6 +523,14 @@ class FEExamSimulator(tk.Tk):
         else:
             self.flag_btn.configure(text="Flag for Review 🚩")
 
+    def record_dwell_time(self):
+        """Add the time spent on the question being shown to its total and restart the clock"""
+        now = time.monotonic()
+        if self._shown_index is not None:
+            self.question_dwell[self._shown_index] = self.question_dwell.get(self._shown_index, 0.0) + now - self._shown_at
+        self._shown_index = self.problem_manager.current_index
+        self._shown_at = now
+
     def update_progress(self):
         if not hasattr(self, 'problem_manager'):
             return
@@ -635,7 +572,7 @@ class FEExamSimulator(tk.Tk):
             else:
                 self.timer_label.config(text=f"Starting in {self.grace_period} seconds...")
             self.grace_period -= 1
-            self.after(1000, self.update_grace_period)
+            self.timer_job = self.after(1000, self.update_grace_period)
         else:
             # Load the current problem and start the timer
             self.load_current_problem()
@@ -661,17 +598,27 @@ class FEExamSimulator(tk.Tk):
         
         if self.remaining_time > 0:
             self.remaining_time -= 1
-            self.after(1000, self.update_timer)
+            self.timer_job = self.after(1000, self.update_timer)
         else:
             messagebox.showinfo("Time's Up", "Your exam session has ended!")
             # Save exam results before returning to dashboard
             self.submit_exam()
 
+    def destroy(self):
+        self.is_destroying = True
+        if self.timer_job is not None:
+            self.after_cancel(self.timer_job)
+            self.timer_job = None
+        self.question_prefetcher.stop()
+        self.unbind_keyboard_shortcuts()
+        if self.pdf_viewer is not None:
+            # The viewer outlives this frame; stop it calling back into it
+            self.pdf_viewer.set_pdf_loaded_callback(None)
+        super().destroy()
+
     def return_to_dashboard(self):
         self.is_destroying = True
-        self.destroy()
-        dashboard = Dashboard()
-        dashboard.mainloop()
+        self.app.show_dashboard()
 
     def open_reference_manual(self):
         # Create a new window for the PDF viewer
@@ -760,16 +707,27 @@ class FEExamSimulator(tk.Tk):
         message_window.geometry(f'{width}x{height}+{x}+{y}')
         
         # Make window modal
-        message_window.transient(self)
+        message_window.transient(self.app)
         message_window.grab_set()
 
     def submit_exam(self):
-        # Calculate score
+        self.record_dwell_time()
+
+        # Calculate score and record every question's outcome
         correct_answers = 0
-        for index, answer in self.user_answers.items():
-            problem = self.problem_manager.problems[index]
-            if answer == problem.choices[ord(problem.correct_answer) - ord('A')]:
+        attempts = []
+        for index, problem in enumerate(self.problem_manager.problems):
+            answer = self.user_answers.get(index)
+            correct = answer is not None and answer == problem.choices[ord(problem.correct_answer) - ord('A')]
+            if correct:
                 correct_answers += 1
+            attempts.append(QuestionAttempt(
+                problem_number=problem.number,
+                category=problem.category,
+                chosen_answer=chr(ord('A') + problem.choices.index(answer)) if answer in problem.choices else None,
+                correct=correct,
+                dwell_time=round(self.question_dwell.get(index, 0.0), 2)
+            ))
         
         total_questions = self.problem_manager.total_problems()
         percentage = (correct_answers / total_questions) * 100
@@ -778,12 +736,12 @@ class FEExamSimulator(tk.Tk):
         time_taken = time.time() - self.start_time
         
         # Save exam statistics
-        exam_stats = ExamStats()
-        exam_stats.add_result(
+        self.app.exam_stats.add_result(
             num_questions=total_questions,
             score=percentage,
             time_taken=time_taken,
-            test_type=self.test_type
+            test_type=self.test_type,
+            attempts=attempts
         )
         
         # Show results
@@ -808,7 +766,7 @@ class FEExamSimulator(tk.Tk):
         pause_window = tk.Toplevel(self)
         pause_window.title("Pause Exam")
         pause_window.geometry("400x200")
-        pause_window.transient(self)
+        pause_window.transient(self.app)
         pause_window.grab_set()
         
         # Center the window
@@ -844,12 +802,15 @@ class FEExamSimulator(tk.Tk):
         if self.test_type == "timed":
             remaining_time = self.remaining_time
         
+        self.record_dwell_time()
+
         # Save exam state
         exam_state = {
             'test_type': self.test_type,
             'num_questions': self.num_questions,
             'current_index': self.problem_manager.current_index,
             'user_answers': self.user_answers,
+            'question_dwell': self.question_dwell,
             'answered_questions': list(self.answered_questions),
             'flagged_questions': list(self.flagged_questions),
             'remaining_time': remaining_time,
@@ -872,11 +833,10 @@ class FEExamSimulator(tk.Tk):
     def show_pdf_requirement_message(self):
         """Show message requiring PDF to be loaded before exam starts"""
         # Debug logging
-        with open(get_debug_log_path(), "a") as f:
-            f.write("show_pdf_requirement_message called\n")
+        logger.debug("show_pdf_requirement_message called")
         
         # Clear the problem text area
-        self.problem_text.delete(1.0, tk.END)
+        self.latex_renderer.clear_text(self.problem_text)
         
         # Display the requirement message - different for resumed exams
         if hasattr(self, 'remaining_time') and self.remaining_time > 0:
@@ -895,11 +855,18 @@ class FEExamSimulator(tk.Tk):
         self.prev_btn.config(state="disabled")
         
         # Debug logging
-        with open(get_debug_log_path(), "a") as f:
-            f.write(f"PDF requirement message displayed: {message}\n")
+        logger.debug("PDF requirement message displayed: %s", message)
         
+    def wait_for_reference_manual(self):
+        """Start the exam if the viewer already has the handbook open, otherwise ask for it"""
+        self.show_pdf_requirement_message()
+        if self.pdf_viewer is not None and self.pdf_viewer.pdf_document is not None:
+            self.on_pdf_loaded()
+
     def on_pdf_loaded(self):
         """Called when a PDF is loaded in the viewer"""
+        if self.is_destroying:
+            return
         if not self.pdf_loaded:
             self.pdf_loaded = True
             self.start_exam_after_pdf_load()
@@ -925,7 +892,7 @@ class FEExamSimulator(tk.Tk):
         confirm_window.resizable(False, False)
         
         # Make window modal
-        confirm_window.transient(self)
+        confirm_window.transient(self.app)
         confirm_window.grab_set()
         
         # Center the window
@@ -979,64 +946,76 @@ class FEExamSimulator(tk.Tk):
     def on_answer_selected(self, *args):
         current_index = self.problem_manager.current_index
         selected_answer = self.answer_var.get()
-        if selected_answer and selected_answer != "_unset_":
+        if selected_answer and selected_answer != UNSET:
             self.answered_questions.add(current_index)
             self.user_answers[current_index] = selected_answer
         elif current_index in self.user_answers:
             del self.user_answers[current_index]
 
+    def bind_shortcut(self, sequence, callback):
+        """Bind a key on the application window, remembering it so it can be unbound"""
+        self.app.bind(sequence, callback)
+        self.shortcuts.append(sequence)
+
+    def unbind_keyboard_shortcuts(self):
+        for sequence in self.shortcuts:
+            self.app.unbind(sequence)
+        self.shortcuts = []
+
     def bind_keyboard_shortcuts(self):
         """Bind keyboard shortcuts for better user experience"""
+        # Keys go to the application window, which every widget of this frame belongs to
+        self.shortcuts = []
         # Navigation shortcuts
-        self.bind("<Left>", lambda event: self.prev_question())
-        self.bind("<Right>", lambda event: self.next_question())
-        self.bind("<Up>", lambda event: self.prev_question())
-        self.bind("<Down>", lambda event: self.next_question())
+        self.bind_shortcut("<Left>", lambda event: self.prev_question())
+        self.bind_shortcut("<Right>", lambda event: self.next_question())
+        self.bind_shortcut("<Up>", lambda event: self.prev_question())
+        self.bind_shortcut("<Down>", lambda event: self.next_question())
         
         # Answer selection shortcuts (A, B, C, D keys)
-        self.bind("<Key-a>", lambda event: self.select_answer_by_key("A"))
-        self.bind("<Key-b>", lambda event: self.select_answer_by_key("B"))
-        self.bind("<Key-c>", lambda event: self.select_answer_by_key("C"))
-        self.bind("<Key-d>", lambda event: self.select_answer_by_key("D"))
-        self.bind("<Key-A>", lambda event: self.select_answer_by_key("A"))
-        self.bind("<Key-B>", lambda event: self.select_answer_by_key("B"))
-        self.bind("<Key-C>", lambda event: self.select_answer_by_key("C"))
-        self.bind("<Key-D>", lambda event: self.select_answer_by_key("D"))
+        self.bind_shortcut("<Key-a>", lambda event: self.select_answer_by_key("A"))
+        self.bind_shortcut("<Key-b>", lambda event: self.select_answer_by_key("B"))
+        self.bind_shortcut("<Key-c>", lambda event: self.select_answer_by_key("C"))
+        self.bind_shortcut("<Key-d>", lambda event: self.select_answer_by_key("D"))
+        self.bind_shortcut("<Key-A>", lambda event: self.select_answer_by_key("A"))
+        self.bind_shortcut("<Key-B>", lambda event: self.select_answer_by_key("B"))
+        self.bind_shortcut("<Key-C>", lambda event: self.select_answer_by_key("C"))
+        self.bind_shortcut("<Key-D>", lambda event: self.select_answer_by_key("D"))
         
         # Number keys for answer selection (1, 2, 3, 4)
-        self.bind("<Key-1>", lambda event: self.select_answer_by_key("A"))
-        self.bind("<Key-2>", lambda event: self.select_answer_by_key("B"))
-        self.bind("<Key-3>", lambda event: self.select_answer_by_key("C"))
-        self.bind("<Key-4>", lambda event: self.select_answer_by_key("D"))
+        self.bind_shortcut("<Key-1>", lambda event: self.select_answer_by_key("A"))
+        self.bind_shortcut("<Key-2>", lambda event: self.select_answer_by_key("B"))
+        self.bind_shortcut("<Key-3>", lambda event: self.select_answer_by_key("C"))
+        self.bind_shortcut("<Key-4>", lambda event: self.select_answer_by_key("D"))
         
         # Flag question shortcut (F key)
-        self.bind("<Key-f>", lambda event: self.mark_for_review())
-        self.bind("<Key-F>", lambda event: self.mark_for_review())
+        self.bind_shortcut("<Key-f>", lambda event: self.mark_for_review())
+        self.bind_shortcut("<Key-F>", lambda event: self.mark_for_review())
         
         # Calculator shortcut (C key)
-        self.bind("<Control-c>", lambda event: self.open_calculator())
-        self.bind("<Control-C>", lambda event: self.open_calculator())
+        self.bind_shortcut("<Control-c>", lambda event: self.open_calculator())
+        self.bind_shortcut("<Control-C>", lambda event: self.open_calculator())
         
         # Question navigator shortcut (N key)
-        self.bind("<Control-n>", lambda event: self.show_question_navigator())
-        self.bind("<Control-N>", lambda event: self.show_question_navigator())
+        self.bind_shortcut("<Control-n>", lambda event: self.show_question_navigator())
+        self.bind_shortcut("<Control-N>", lambda event: self.show_question_navigator())
         
         # Submit exam shortcut (Ctrl+S)
-        self.bind("<Control-s>", lambda event: self.check_exam_completion())
-        self.bind("<Control-S>", lambda event: self.check_exam_completion())
+        self.bind_shortcut("<Control-s>", lambda event: self.check_exam_completion())
+        self.bind_shortcut("<Control-S>", lambda event: self.check_exam_completion())
         
         # Return to dashboard shortcut (Ctrl+Q)
-        self.bind("<Control-q>", lambda event: self.return_to_dashboard())
-        self.bind("<Control-Q>", lambda event: self.return_to_dashboard())
+        self.bind_shortcut("<Control-q>", lambda event: self.return_to_dashboard())
+        self.bind_shortcut("<Control-Q>", lambda event: self.return_to_dashboard())
         
         # Space bar to toggle flag
-        self.bind("<space>", lambda event: self.mark_for_review())
+        self.bind_shortcut("<space>", lambda event: self.mark_for_review())
         
         # Enter key to go to next question
-        self.bind("<Return>", lambda event: self.next_question())
+        self.bind_shortcut("<Return>", lambda event: self.next_question())
         
         # Backspace to go to previous question
-        self.bind("<BackSpace>", lambda event: self.prev_question())
+        self.bind_shortcut("<BackSpace>", lambda event: self.prev_question())
     
     def select_answer_by_key(self, answer_key):
         """Select an answer using keyboard shortcuts"""
@@ -1044,9 +1023,10 @@ class FEExamSimulator(tk.Tk):
         answer_index = ord(answer_key) - ord('A')
         
         # Check if the answer index is valid
-        if 0 <= answer_index < len(self.answer_buttons):
+        answer_value = self.answers_frame.value_of(answer_index)
+        if answer_value is not None:
             # Set the answer variable
-            self.answer_var.set(self.answer_buttons[answer_index]['text'])
+            self.answer_var.set(answer_value)
             
             # Update the UI to reflect the selection
             self.update_answer_selection()
@@ -1074,16 +1054,14 @@ class FEExamSimulator(tk.Tk):
         # Update progress
         self.update_progress()
 
-class Dashboard(tk.Tk):
-    def __init__(self):
-        with open(get_debug_log_path(), "a") as f:
-            f.write("Initializing Dashboard...\n")
-        super().__init__()
-        self.title("FE Exam Practice Dashboard")
-        self.state('zoomed')
+class Dashboard(tk.Frame):
+    def __init__(self, app):
+        logger.info("Initializing Dashboard...")
+        super().__init__(app)
+        self.app = app
         
-        # Load exam statistics
-        self.exam_stats = ExamStats()
+        # Exam statistics stay loaded in the application
+        self.exam_stats = app.exam_stats
         
         # Configure the main window grid
         self.grid_columnconfigure(0, weight=1)  # Left pane
@@ -1114,6 +1092,7 @@ class Dashboard(tk.Tk):
         import json
         state_file = os.path.join(os.path.dirname(__file__), 'simulator_files', 'paused_exam.json')
         
+        self.paused_frame = None
         if not os.path.exists(state_file):
             return  # No paused exam, don't create the section
         
@@ -1124,7 +1103,7 @@ class Dashboard(tk.Tk):
             return  # Invalid file, don't create the section
         
         # Create the paused test frame
-        paused_frame = ttk.LabelFrame(self, text="Paused Test")
+        paused_frame = self.paused_frame = ttk.LabelFrame(self, text="Paused Test")
         paused_frame.grid(row=1, column=0, columnspan=2, sticky="ew", padx=10, pady=(0, 10))
         
         # Calculate exam progress
@@ -1189,22 +1168,21 @@ class Dashboard(tk.Tk):
             messagebox.showerror("Error", "Could not load paused exam data.")
             return
         
-        # Close dashboard and create simulator with saved state
-        self.destroy()
-        exam = FEExamSimulator.from_saved_state(exam_state)
-        exam.mainloop()
+        # Swap the dashboard for the simulator with saved state
+        self.app.resume_exam(exam_state)
 
     def create_stats_pane(self):
         stats_frame = ttk.LabelFrame(self, text="Your Statistics")
         stats_frame.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
         
-        # Get statistics
-        stats = self.exam_stats.get_statistics()
-        
-        # Statistics labels
-        ttk.Label(stats_frame, text=f"Practice Exams Taken: {stats['exams_taken']}").pack(anchor="w", padx=10, pady=5)
-        ttk.Label(stats_frame, text=f"Average Score: {stats['average_score']:.1f}%").pack(anchor="w", padx=10, pady=5)
-        ttk.Label(stats_frame, text=f"Average Time per Question: {stats['average_time_per_question']/60:.1f} minutes").pack(anchor="w", padx=10, pady=5)
+        # Statistics labels, filled in by update_stats_labels
+        self.exams_taken_label = ttk.Label(stats_frame)
+        self.exams_taken_label.pack(anchor="w", padx=10, pady=5)
+        self.average_score_label = ttk.Label(stats_frame)
+        self.average_score_label.pack(anchor="w", padx=10, pady=5)
+        self.average_time_label = ttk.Label(stats_frame)
+        self.average_time_label.pack(anchor="w", padx=10, pady=5)
+        self.update_stats_labels()
         
         # Add separator
         ttk.Separator(stats_frame, orient='horizontal').pack(fill='x', padx=10, pady=10)
@@ -1213,23 +1191,9 @@ class Dashboard(tk.Tk):
         history_label = ttk.Label(stats_frame, text="Previous Exams:", font=('Arial', 10, 'bold'))
         history_label.pack(anchor="w", padx=10, pady=(10, 5))
         
-        # Create frame for the listbox and scrollbar
-        list_frame = ttk.Frame(stats_frame)
-        list_frame.pack(fill='both', expand=True, padx=10, pady=5)
-        
-        # Create listbox for exam history
-        self.exam_history_listbox = tk.Listbox(
-            list_frame,
-            height=8,
-            font=('Arial', 9),
-            selectmode='none'  # Disable selection
-        )
-        self.exam_history_listbox.pack(side='left', fill='both', expand=True)
-        
-        # Create scrollbar
-        scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.exam_history_listbox.yview)
-        scrollbar.pack(side='right', fill='y')
-        self.exam_history_listbox.configure(yscrollcommand=scrollbar.set)
+        # Exam history list; only the rows in view are formatted
+        self.exam_history = VirtualHistoryList(stats_frame, self.format_exam_result, height=8)
+        self.exam_history.pack(fill='both', expand=True, padx=10, pady=5)
         
         # Populate the exam history
         self.populate_exam_history()
@@ -1250,31 +1214,29 @@ class Dashboard(tk.Tk):
         )
         clear_button.pack(anchor="w", padx=10, pady=10)
 
+    def update_stats_labels(self):
+        """Show the current summary statistics in the existing labels."""
+        stats = self.exam_stats.get_statistics()
+        self.exams_taken_label.configure(text=f"Practice Exams Taken: {stats['exams_taken']}")
+        self.average_score_label.configure(text=f"Average Score: {stats['average_score']:.1f}%")
+        self.average_time_label.configure(text=f"Average Time per Question: {stats['average_time_per_question']/60:.1f} minutes")
+
     def populate_exam_history(self):
-        """Populate the exam history listbox with previous exam results."""
-        # Clear existing items
-        self.exam_history_listbox.delete(0, tk.END)
-        
-        # Get exam results (most recent first)
-        results = self.exam_stats.results[::-1]  # Reverse to show newest first
-        
-        if not results:
-            self.exam_history_listbox.insert(tk.END, "No previous exams found.")
-            return
-        
-        for result in results:
-            # Format the date
-            date_obj = datetime.strptime(result.date, "%Y-%m-%d %H:%M:%S")
-            formatted_date = date_obj.strftime("%m/%d/%Y %I:%M %p")
-            
-            # Format time taken
-            minutes = result.time_taken / 60
-            time_str = f"{minutes:.1f} min"
-            
-            # Create the display string
-            exam_info = f"{formatted_date} | {result.num_questions} Q | {result.score:.1f}% | {time_str} | {result.test_type}"
-            
-            self.exam_history_listbox.insert(tk.END, exam_info)
+        """Show the previous exam results, newest first (only the rows in view are read)."""
+        self.exam_history.set_items(self.exam_stats.result_rows())
+
+    def format_exam_result(self, result):
+        """Format one exam result as a history row."""
+        # Format the date
+        date_obj = datetime.strptime(result.date, "%Y-%m-%d %H:%M:%S")
+        formatted_date = date_obj.strftime("%m/%d/%Y %I:%M %p")
+        
+        # Format time taken
+        minutes = result.time_taken / 60
+        time_str = f"{minutes:.1f} min"
+        
+        # Create the display string
+        return f"{formatted_date} | {result.num_questions} Q | {result.score:.1f}% | {time_str} | {result.test_type}"
 
     def clear_statistics(self):
         """Clear all exam statistics with confirmation."""
@@ -1300,46 +1262,14 @@ class Dashboard(tk.Tk):
 
     def refresh_dashboard(self):
         """Refresh the dashboard to show updated statistics."""
-        # Store current category selections
-        current_categories = {}
-        if hasattr(self, 'category_vars'):
-            current_categories = {category: var.get() for category, var in self.category_vars.items()}
-        
-        # Destroy current widgets and recreate them
-        for widget in self.winfo_children():
-            widget.destroy()
-        
-        # Recreate the dashboard
-        self.grid_columnconfigure(0, weight=1)  # Left pane
-        self.grid_columnconfigure(1, weight=1)  # Right pane
-        self.grid_rowconfigure(0, weight=1)  # Main content
-        self.grid_rowconfigure(1, weight=0)  # Paused test section
-        self.grid_rowconfigure(2, weight=0)  # Review section
-        self.grid_rowconfigure(3, weight=0)  # Button row
-        
-        # Create left pane (Statistics)
-        self.create_stats_pane()
-        
-        # Create right pane (Test Settings)
-        self.create_settings_pane()
+        # Update the statistics in place; category selections and the rest of the window are untouched
+        self.update_stats_labels()
+        self.populate_exam_history()
         
-        # Create paused test section
+        # The paused test section comes and goes with the paused exam file
+        if self.paused_frame is not None:
+            self.paused_frame.destroy()
         self.create_paused_test_section()
-        
-        # Create review section
-        self.create_review_section()
-        
-        # Restore category selections
-        if hasattr(self, 'category_vars') and current_categories:
-            for category, value in current_categories.items():
-                if category in self.category_vars:
-                    self.category_vars[category].set(value)
-        
-        # Create start button
-        self.create_start_button()
-        
-        # Refresh exam history
-        self.populate_exam_history()
 
     def create_settings_pane(self):
         settings_frame = ttk.LabelFrame(self, text="Test Settings")
@@ -1511,17 +1441,108 @@ class Dashboard(tk.Tk):
             messagebox.showerror("Error", "Please select at least one category for the exam.")
             return
         
-        # Create and start the exam with the selected settings
-        self.destroy()
-        exam = FEExamSimulator(test_type=test_type, num_questions=num_questions, selected_categories=selected_categories)
-        exam.mainloop()
+        # Swap the dashboard for an exam with the selected settings
+        self.app.start_exam(test_type=test_type, num_questions=num_questions, selected_categories=selected_categories)
+
+class FEApp(tk.Tk):
+    """The application window. The dashboard and exams are frames swapped inside it.
+
+    The problem bank, exam statistics, LaTeX renderer, media cache and PDF viewer
+    are created once and stay loaded, so going from one exam to the next does not
+    rebuild the window or reload anything. The reference handbook from the last run
+    is reopened in the background at startup.
+    """
+
+    def __init__(self):
+        logger.info("Initializing FEApp...")
+        super().__init__()
+        self.state('zoomed')
+        self.configure(bg='#f0f0f0')
+        configure_styles()
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        # Resources shared by the dashboard and every exam
+        self.exam_stats = create_exam_stats()
+        self.latex_renderer = LaTeXRenderer()
+        self.media_cache = MediaCache(get_media_dir())
+        self.problem_manager = None  # Loaded with the first exam
+        self.pdf_viewer = None  # Created with the first exam
+        self.document_session = DocumentSession()
+        self.document_session.reopen_last(on_open=self.handbook_reopened)
+
+        self.dashboard = None
+        self.exam = None
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.show_dashboard()
+
+    def get_problem_manager(self):
+        if self.problem_manager is None:
+            self.problem_manager = ProblemManager()
+        return self.problem_manager
+
+    def get_pdf_viewer(self):
+        """Return the PDF viewer, creating it on first use; exams grid it into their own frame"""
+        if self.pdf_viewer is None:
+            from simulator_files.custom_pdf_viewer import CustomPDFViewer
+            self.pdf_viewer = CustomPDFViewer(self, session=self.document_session)
+            self.pdf_viewer.show_session_document()
+        return self.pdf_viewer
+
+    def handbook_reopened(self, document, path):
+        """Called from the session's background thread once the last handbook is open again"""
+        try:
+            self.after(0, self.on_handbook_reopened)
+        except (RuntimeError, tk.TclError):
+            pass  # The window was closed in the meantime
+
+    def on_handbook_reopened(self):
+        # Without a viewer yet, the first exam picks the document up when it creates one
+        if self.pdf_viewer is not None:
+            self.pdf_viewer.show_session_document()
+
+    def show_dashboard(self):
+        """Close the current exam, if any, and show the dashboard with fresh statistics"""
+        if self.exam is not None:
+            self.exam.destroy()
+            self.exam = None
+        self.title("FE Exam Practice Dashboard")
+        if self.dashboard is None:
+            self.dashboard = Dashboard(self)
+        else:
+            self.dashboard.refresh_dashboard()
+        self.dashboard.grid(row=0, column=0, sticky="nsew")
+
+    def show_exam(self, exam):
+        self.dashboard.grid_remove()
+        self.title("FE Exam Practice Software")
+        self.exam = exam
+        exam.grid(row=0, column=0, sticky="nsew")
+
+    def start_exam(self, test_type, num_questions, selected_categories):
+        self.show_exam(FEExamSimulator(self, test_type=test_type, num_questions=num_questions,
+                                       selected_categories=selected_categories))
+
+    def resume_exam(self, exam_state):
+        self.show_exam(FEExamSimulator.from_saved_state(self, exam_state))
+
+    def on_closing(self):
+        # An exam asks whether to pause first; the dashboard just closes
+        if self.exam is not None:
+            self.exam.on_closing()
+        else:
+            self.destroy()
+
+    def destroy(self):
+        if self.latex_renderer.stats is not None:
+            logger.info("LaTeX conversion stats: %s", self.latex_renderer.stats.summary())
+        if self.problem_manager is not None:
+            self.problem_manager.close()
+        super().destroy()
 
 if __name__ == "__main__":
-    with open(get_debug_log_path(), "a") as f:
-        f.write("In main block...\n")
-    dashboard = Dashboard()
-    with open(get_debug_log_path(), "a") as f:
-        f.write("Created Dashboard, starting mainloop...\n")
-    dashboard.mainloop()
-    with open(get_debug_log_path(), "a") as f:
-        f.write("Program finished.\n") 
\ No newline at end of file
+    logger.info("In main block...")
+    app = FEApp()
+    logger.info("Created FEApp, starting mainloop...")
+    app.mainloop()
+    logger.info("Program finished.")
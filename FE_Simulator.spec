@@ -15,11 +15,26 @@ a = Analysis(
     ],
     hiddenimports=[
         'simulator_files.problem_manager',
+        'simulator_files.problem_bank',
         'simulator_files.calculator',
         'simulator_files.exam_stats',
         'simulator_files.latex_renderer',
         'simulator_files.custom_pdf_viewer',
         'simulator_files.pdf_viewer',
+        'simulator_files.page_cache',
+        'simulator_files.app_paths',
+        'simulator_files.search_index',
+        'simulator_files.tile_renderer',
+        'simulator_files.render_scheduler',
+        'simulator_files.media_cache',
+        'simulator_files.question_prefetcher',
+        'simulator_files.answer_choices',
+        'simulator_files.debug_logger',
+        'simulator_files.formula_renderer',
+        'simulator_files.exam_stats_sqlite',
+        'simulator_files.history_view',
+        'simulator_files.document_session',
+        'simulator_files.latex_unicode',
         'fitz',  # PyMuPDF
         'fitz.fitz',  # Alternative import path
         'PIL',
@@ -0,0 +1,65 @@
+import tkinter as tk
+from tkinter import ttk
+
+# Value the answer variable holds while no choice is selected
+UNSET = "_unset_"
+
+
+class AnswerChoices(ttk.Frame):
+    """Pool of answer radio buttons that are reconfigured in place between questions.
+
+    Buttons are created once and only grow when a question has more choices
+    than any before it; surplus buttons are unpacked, not destroyed. The answer
+    variable's trace stays installed and is muted while a question is loaded.
+    """
+
+    def __init__(self, parent, variable, on_select, font=('Arial', 11), wraplength=500):
+        super().__init__(parent)
+        self.variable = variable
+        self.on_select = on_select
+        self.font = font
+        self.wraplength = wraplength
+        self._pool = []
+        self._active = 0
+        self._suspended = False
+        self.variable.trace_add("write", self._on_write)
+
+    @property
+    def buttons(self):
+        """The buttons showing the current question's choices"""
+        return self._pool[:self._active]
+
+    def value_of(self, index):
+        """Return the answer value of the index-th visible choice, or None"""
+        if 0 <= index < self._active:
+            return self._pool[index].cget('value')
+        return None
+
+    def show(self, choices, texts, selected=None):
+        """Display a question's choices, selecting `selected` without firing on_select"""
+        self._suspended = True
+        try:
+            self.variable.set(selected if selected is not None else UNSET)
+            for i, (choice, text) in enumerate(zip(choices, texts)):
+                if i == len(self._pool):
+                    self._pool.append(tk.Radiobutton(self,
+                                                     variable=self.variable,
+                                                     anchor='w',
+                                                     justify='left',
+                                                     font=self.font,
+                                                     wraplength=self.wraplength))
+                btn = self._pool[i]
+                btn.configure(text=text, value=choice)
+                if not btn.winfo_manager():
+                    # Unpacked buttons are always at the tail, so packing keeps the order
+                    btn.pack(anchor=tk.W, padx=5, pady=2, fill=tk.X)
+            self._active = min(len(choices), len(texts))
+            for btn in self._pool[self._active:]:
+                if btn.winfo_manager():
+                    btn.pack_forget()
+        finally:
+            self._suspended = False
+
+    def _on_write(self, *args):
+        if not self._suspended:
+            self.on_select(*args)
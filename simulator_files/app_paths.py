@@ -0,0 +1,15 @@
+import os
+import sys
+
+
+def get_cache_dir(*subdirs):
+    """Return (and create) a writable cache directory for derived data"""
+    if getattr(sys, 'frozen', False):
+        # Running as compiled EXE - the bundle is read-only, use the user's home directory
+        base_dir = os.path.join(os.path.expanduser("~"), '.fe_simulator', 'cache')
+    else:
+        # Running as script - keep caches next to the simulator files
+        base_dir = os.path.join(os.path.dirname(__file__), 'cache')
+    cache_dir = os.path.join(base_dir, *subdirs)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
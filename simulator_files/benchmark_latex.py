@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import re
+import time
+
+from simulator_files.latex_unicode import (SUBSCRIPT_MAP, SUPERSCRIPT_MAP, UNICODE_MAP,
+                                           convert_latex_to_unicode, parse_latex)
+
+
+def legacy_convert_latex_to_unicode(latex_code):
+    """The multi-pass conversion as it was before the single-pass translator"""
+    result = latex_code
+    result = result.replace('\\(', '').replace('\\)', '')
+    result = result.replace('\\[', '').replace('\\]', '')
+    result = re.sub(r'\\frac\{([^}]+)\}\{([^}]+)\}', r'\1/\2', result)
+    for frac in ['12', '14', '34']:
+        result = result.replace(f'\\frac{frac}', UNICODE_MAP.get(f'\\frac{frac}', f'1/{frac[1]}'))
+    result = re.sub(r'\\sqrt\{([^}]+)\}', r'√\1', result)
+    result = re.sub(r'\\text\{([^}]+)\}', r'\1', result)
+    result = re.sub(r'\^\{([^}]+)\}', lambda m: m.group(1).translate(SUPERSCRIPT_MAP), result)
+    result = re.sub(r'\^(\w)', lambda m: m.group(1).translate(SUPERSCRIPT_MAP), result)
+    result = re.sub(r'_\{([^}]+)\}', lambda m: m.group(1).translate(SUBSCRIPT_MAP), result)
+    result = re.sub(r'_(\w)', lambda m: m.group(1).translate(SUBSCRIPT_MAP), result)
+    for latex_cmd, unicode_char in UNICODE_MAP.items():
+        result = result.replace(latex_cmd, unicode_char)
+    result = result.replace('{', '').replace('}', '')
+    result = re.sub(r'\\([a-zA-Z]+)', lambda m: m.group(1), result)
+    result = result.replace('\\', '')
+    return result
+
+
+def load_texts():
+    """Every question and answer choice in problems_database.json"""
+    with open(os.path.join(os.path.dirname(__file__), 'problems_database.json'), 'r', encoding='utf-8') as f:
+        problems = json.load(f)['problems']
+    texts = []
+    for problem in problems:
+        texts.append(problem['question'])
+        texts.extend(problem['choices'])
+    return texts
+
+
+def measure(convert, texts, rounds, reset=None):
+    """Return the best time per string over several rounds, in microseconds"""
+    best = None
+    for _ in range(rounds):
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        for text in texts:
+            convert(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare LaTeX-to-Unicode conversion throughput')
+    parser.add_argument('--rounds', type=int, default=50, help='Timing rounds over the whole database (default: 50)')
+    parser.add_argument('--show-differences', action='store_true', help='Print strings whose output changed')
+    args = parser.parse_args()
+
+    texts = load_texts()
+    latex_texts = [text for text in texts if any(c in text for c in '\\^_{}')]
+    print(f"{len(texts)} strings, {len(latex_texts)} containing LaTeX markup")
+
+    print(f"{'implementation':<22}{'all µs/str':>12}{'LaTeX µs/str':>14}")
+    results = {}
+    for name, convert, reset in [('multi-pass (before)', legacy_convert_latex_to_unicode, None),
+                                 ('parser, cold', convert_latex_to_unicode, parse_latex.cache_clear),
+                                 ('parser, AST cached', convert_latex_to_unicode, None)]:
+        results[name] = (measure(convert, texts, args.rounds, reset), measure(convert, latex_texts, args.rounds, reset))
+        print(f"{name:<22}{results[name][0]:>12.2f}{results[name][1]:>14.2f}")
+    before = results['multi-pass (before)']
+    for name in ('parser, cold', 'parser, AST cached'):
+        after = results[name]
+        print(f"speedup ({name}): {before[0] / after[0]:.1f}x overall, {before[1] / after[1]:.1f}x on LaTeX strings")
+
+    differences = [text for text in texts if legacy_convert_latex_to_unicode(text) != convert_latex_to_unicode(text)]
+    print(f"{len(differences)} strings convert differently")
+    if args.show_differences:
+        for text in differences:
+            print(f"  {text!r}\n    before: {legacy_convert_latex_to_unicode(text)!r}\n    after:  {convert_latex_to_unicode(text)!r}")
+
+
+if __name__ == "__main__":
+    main()
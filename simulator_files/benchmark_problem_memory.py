@@ -0,0 +1,80 @@
+import argparse
+import gc
+import json
+import os
+import tracemalloc
+
+from simulator_files.problem_manager import Problem, ProblemColumns
+
+
+class LegacyProblem:
+    """The Problem class as it was before __slots__ (per-instance __dict__, list choices)"""
+    def __init__(self, number, category, question, media, choices, correct_answer, media_size=100):
+        self.number = number
+        self.category = category
+        self.question = question
+        self.media = media
+        self.choices = choices
+        self.correct_answer = correct_answer
+        self.media_size = media_size
+
+
+def load_records(copies):
+    """Parse problems_database.json `copies` times so every record owns fresh strings, as in a real bank"""
+    with open(os.path.join(os.path.dirname(__file__), 'problems_database.json'), 'r', encoding='utf-8') as f:
+        text = f.read()
+    records = []
+    for _ in range(copies):
+        records.extend(json.loads(text)['problems'])
+    return records
+
+
+def build_legacy(records):
+    return [LegacyProblem(r["number"], r["category"], r["question"], r["media"],
+                          r["choices"], r["correct_answer"], r.get("media_size", 100)) for r in records]
+
+
+def build_slotted(records):
+    return [Problem.from_dict(r) for r in records]
+
+
+def build_columnar(records):
+    columns = ProblemColumns()
+    for r in records:
+        columns.append(r)
+    return columns
+
+
+def measure(builder, copies):
+    """Return the bytes still held by the store once the parsed JSON is released"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = load_records(copies)
+    store = builder(records)
+    # Drop the parsed JSON: anything the store still needs is now owned by it
+    del records
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(store), after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure memory per problem for each Problem representation')
+    parser.add_argument('--copies', type=int, default=400, help='How many copies of the 50-problem database to load (default: 400)')
+    args = parser.parse_args()
+
+    print(f"{'representation':<22}{'problems':>10}{'bytes/problem':>16}")
+    baseline = None
+    for name, builder in [('plain class (before)', build_legacy),
+                          ('__slots__ Problem', build_slotted),
+                          ('ProblemColumns', build_columnar)]:
+        count, nbytes = measure(builder, args.copies)
+        per_problem = nbytes / count
+        baseline = baseline or per_problem
+        print(f"{name:<22}{count:>10}{per_problem:>16.0f}   ({per_problem / baseline:.0%} of before)")
+
+
+if __name__ == "__main__":
+    main()
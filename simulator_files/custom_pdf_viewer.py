@@ -17,28 +17,68 @@ import os
 import sys
 import threading
 import traceback
+from simulator_files.document_session import DocumentSession
+from simulator_files.page_cache import PageCache, PagePrefetcher
+from simulator_files.render_scheduler import RenderScheduler
+from simulator_files.search_index import SearchIndex
+from simulator_files.tile_renderer import TileRenderer
+
+# Switch to tiled rendering once the zoomed page is this many times larger than the canvas
+TILED_RENDER_THRESHOLD = 2.0
+
+# Zoom factor of the instant preview shown while the full-resolution render runs
+PREVIEW_ZOOM = 0.5
+
+# Debounce for coalescing page/zoom events, and the longer one used while the window is resized
+RENDER_DEBOUNCE_MS = 30
+RESIZE_DEBOUNCE_MS = 120
 
 class CustomPDFViewer(ttk.Frame):
-    def __init__(self, parent):
+    def __init__(self, parent, render_debounce_ms=RENDER_DEBOUNCE_MS, resize_debounce_ms=RESIZE_DEBOUNCE_MS,
+                 session=None):
         super().__init__(parent)
         self.parent = parent
         self.pdf_document = None
         self.current_page = 0
         self.total_pages = 0
+        self.page_rects = {}  # page number -> page rectangle, filled whenever a page is loaded
         self.zoom_level = 1.0
         self.current_photo = None
         
+        # The open document and its lock live in the session, which may outlive this viewer
+        self.session = session or DocumentSession()
+        self.document_lock = self.session.lock
+        
+        # Rendered page cache and background prefetch of neighbouring pages
+        self.page_cache = PageCache()
+        self.prefetcher = PagePrefetcher(self.page_cache, self.render_page_image, radius=2)
+        
+        # Tiled rendering for high zoom levels (only visible tiles are rasterized)
+        self.tile_renderer = TileRenderer(self.render_clip_image)
+        self.tiled_mode = False
+        self.tile_items = {}  # (col, row) -> (canvas item, PhotoImage)
+        self.tiles_pending = set()  # (col, row) being rendered in the background
+        self.tiled_page_size = (0, 0)
+        self.tiled_page_rect = None
+        
+        # Progressive rendering: show a low-res preview, then swap in the sharp render.
+        # The generation counter lets stale background renders be discarded.
+        self.progressive_rendering = True
+        self.render_generation = 0
+        self.page_item = None
+        
+        # Bursts of zoom/resize/page events are coalesced into a single render
+        self.render_scheduler = RenderScheduler(self, self.display_current_page, render_debounce_ms)
+        self.resize_debounce_ms = resize_debounce_ms
+        
         # Search functionality
         self.search_results = []
         self.current_search_index = -1
         self.search_highlight_rects = []
+        self.search_index = None  # Built in the background after a PDF is loaded
         
         # Panning functionality
         self.is_panning = False
-        self.pan_start_x = 0
-        self.pan_start_y = 0
-        self.pan_start_scroll_x = 0
-        self.pan_start_scroll_y = 0
         
         # Callback for when PDF is loaded
         self.pdf_loaded_callback = None
@@ -62,6 +102,12 @@ class CustomPDFViewer(ttk.Frame):
         # Show initial message
         self.show_load_message()
         
+    def destroy(self):
+        """Stop the prefetch worker and pending renders before the widget goes away"""
+        self.prefetcher.stop()
+        self.render_scheduler.cancel()
+        super().destroy()
+        
     def set_pdf_loaded_callback(self, callback):
         """Set callback function to be called when PDF is loaded"""
         self.pdf_loaded_callback = callback
@@ -128,7 +174,7 @@ class CustomPDFViewer(ttk.Frame):
         self.v_scrollbar = ttk.Scrollbar(
             viewer_frame,
             orient="vertical",
-            command=self.canvas.yview
+            command=self.on_scroll_y
         )
         self.v_scrollbar.grid(row=0, column=1, sticky="ns")
         
@@ -136,7 +182,7 @@ class CustomPDFViewer(ttk.Frame):
         self.h_scrollbar = ttk.Scrollbar(
             viewer_frame,
             orient="horizontal",
-            command=self.canvas.xview
+            command=self.on_scroll_x
         )
         self.h_scrollbar.grid(row=1, column=0, sticky="ew")
         
@@ -192,7 +238,7 @@ class CustomPDFViewer(ttk.Frame):
     def on_canvas_configure(self, event):
         """Handle canvas resize"""
         if self.pdf_document:
-            self.display_current_page()
+            self.render_scheduler.request(self.resize_debounce_ms)
             
     def on_mousewheel(self, event):
         """Handle mouse wheel for page navigation"""
@@ -211,10 +257,7 @@ class CustomPDFViewer(ttk.Frame):
     def start_pan(self, event):
         """Start panning with middle mouse button"""
         self.is_panning = True
-        self.pan_start_x = event.x
-        self.pan_start_y = event.y
-        self.pan_start_scroll_x = self.canvas.canvasx(0)
-        self.pan_start_scroll_y = self.canvas.canvasy(0)
+        self.canvas.scan_mark(event.x, event.y)
         self.canvas.config(cursor="fleur")  # Change cursor to indicate panning
         
     def pan(self, event):
@@ -222,17 +265,21 @@ class CustomPDFViewer(ttk.Frame):
         if not self.is_panning:
             return
             
-        # Calculate the distance moved
-        delta_x = self.pan_start_x - event.x
-        delta_y = self.pan_start_y - event.y
+        # Move the canvas view along with the mouse
+        self.canvas.scan_dragto(event.x, event.y, gain=1)
+        
+        # Fill in any tiles that have scrolled into view
+        self.refresh_visible_tiles()
         
-        # Move the canvas view
-        new_x = self.pan_start_scroll_x + delta_x
-        new_y = self.pan_start_scroll_y + delta_y
+    def on_scroll_x(self, *args):
+        """Scroll horizontally from the scrollbar"""
+        self.canvas.xview(*args)
+        self.refresh_visible_tiles()
         
-        # Apply the pan with smooth movement
-        self.canvas.xview_moveto(new_x / self.canvas.winfo_width())
-        self.canvas.yview_moveto(new_y / self.canvas.winfo_height())
+    def on_scroll_y(self, *args):
+        """Scroll vertically from the scrollbar"""
+        self.canvas.yview(*args)
+        self.refresh_visible_tiles()
         
     def stop_pan(self, event):
         """Stop panning"""
@@ -263,13 +310,11 @@ class CustomPDFViewer(ttk.Frame):
         # Clear previous highlights
         self.clear_search_highlights()
         
-        # Search across all pages
-        all_results = []
-        for page_num in range(self.total_pages):
-            page = self.pdf_document[page_num]
-            page_results = page.search_for(search_text)
-            for rect in page_results:
-                all_results.append((page_num, rect))
+        # Answer from the prebuilt index; only scan the pages while it is still being built
+        if self.search_index is not None:
+            all_results = self.search_index.search(search_text)
+        else:
+            all_results = self.scan_pages_for(search_text)
         
         if all_results:
             self.search_results = all_results
@@ -278,18 +323,45 @@ class CustomPDFViewer(ttk.Frame):
         else:
             messagebox.showinfo("Search", f"No results found for '{search_text}' in the entire document")
             
+    def scan_pages_for(self, search_text):
+        """Search every page for text anywhere in it, including inside words"""
+        all_results = []
+        with self.document_lock:
+            for page_num in range(self.total_pages):
+                page = self.pdf_document[page_num]
+                page_results = page.search_for(search_text)
+                for rect in page_results:
+                    all_results.append((page_num, [rect]))
+        return all_results
+        
+    def build_search_index(self, file_path, document, digest=None):
+        """Load or build the search index for a document in the background"""
+        def index_thread():
+            try:
+                index = SearchIndex.load_or_build(file_path, document, self.document_lock, digest)
+            except Exception as e:
+                print(f"Failed to build search index: {e}")
+                return
+            # Ignore the result if another PDF was opened in the meantime
+            if self.pdf_document is document:
+                self.search_index = index
+                print(f"Search index ready ({len(index.vocabulary)} distinct words)")
+        
+        threading.Thread(target=index_thread, daemon=True).start()
+        
     def jump_to_search_result(self):
         """Jump to the current search result"""
         if not self.search_results or self.current_search_index < 0:
             return
             
         # Get current result
-        page_num, rect = self.search_results[self.current_search_index]
+        page_num, _ = self.search_results[self.current_search_index]
         
         # Navigate to the page if needed
         if page_num != self.current_page:
             self.current_page = page_num
-            self.display_current_page()
+            # The highlight is drawn right after, so render synchronously
+            self.render_scheduler.render_now()
             self.update_toolbar()
         
         # Highlight the result
@@ -303,21 +375,22 @@ class CustomPDFViewer(ttk.Frame):
         # Clear previous highlights
         self.clear_search_highlights()
         
-        # Get current result
-        page_num, rect = self.search_results[self.current_search_index]
-        
-        # Convert PDF coordinates to canvas coordinates
-        canvas_rect = self.pdf_to_canvas_coords(rect)
+        # Get current result (one box per line it covers)
+        page_num, rects = self.search_results[self.current_search_index]
         
-        # Create highlight rectangle
-        highlight = self.canvas.create_rectangle(
-            canvas_rect[0], canvas_rect[1], canvas_rect[2], canvas_rect[3],
-            outline="red", width=2, fill="yellow", stipple="gray50"
-        )
-        self.search_highlight_rects.append(highlight)
+        for rect in rects:
+            # Convert PDF coordinates to canvas coordinates
+            canvas_rect = self.pdf_to_canvas_coords(rect)
+            
+            # Create highlight rectangle
+            highlight = self.canvas.create_rectangle(
+                canvas_rect[0], canvas_rect[1], canvas_rect[2], canvas_rect[3],
+                outline="red", width=2, fill="yellow", stipple="gray50"
+            )
+            self.search_highlight_rects.append(highlight)
         
         # Scroll to highlight
-        self.canvas.see(highlight)
+        self.canvas.see(self.search_highlight_rects[0])
         
         # Update search bar to show current result
         total_results = len(self.search_results)
@@ -378,19 +451,8 @@ class CustomPDFViewer(ttk.Frame):
                         return
                         
                     print(f"Opening PDF document: {file_path}")
-                    self.pdf_document = fitz.open(file_path)
-                    self.total_pages = len(self.pdf_document)
-                    self.current_page = 0
-                    print(f"Successfully loaded PDF with {self.total_pages} pages")
-                    
-                    # Update UI in main thread
-                    self.after(0, self.display_current_page)
-                    self.after(0, self.update_toolbar)
-                    
-                    # Call callback if set
-                    if self.pdf_loaded_callback:
-                        print("Calling PDF loaded callback")
-                        self.after(0, self.pdf_loaded_callback)
+                    document = self.session.open(file_path)
+                    self.show_document(document, file_path)
                     
                 except Exception as e:
                     error_msg = f"Failed to load PDF: {str(e)}"
@@ -406,30 +468,108 @@ class CustomPDFViewer(ttk.Frame):
             print(error_msg)
             messagebox.showerror("Error", error_msg)
             
+    def show_session_document(self):
+        """Show the document the session already has open, if any"""
+        if self.session.document is not None and self.session.document is not self.pdf_document:
+            self.show_document(self.session.document, self.session.file_path)
+            
+    def show_document(self, document, file_path):
+        """Switch the viewer to an open document (safe to call from worker threads)"""
+        self.prefetcher.cancel()
+        with self.document_lock:
+            previous = self.pdf_document
+            self.pdf_document = document
+            self.page_rects = {}
+            self.total_pages = len(document)
+            self.current_page = 0
+            # Nothing renders from the superseded document once the lock is released
+            if previous is not None and previous is not document:
+                previous.close()
+        self.page_cache.clear()
+        self.tile_renderer.clear()
+        self.search_index = None
+        digest = self.session.file_hash if self.session.document is document else None
+        self.build_search_index(file_path, document, digest)
+        print(f"Successfully loaded PDF with {self.total_pages} pages")
+        
+        # Update UI in main thread
+        self.after(0, self.display_current_page)
+        self.after(0, self.update_toolbar)
+        self.after(0, self.notify_pdf_loaded)
+        
+    def notify_pdf_loaded(self):
+        # Call callback if set; looked up now, since an exam may have attached meanwhile
+        if self.pdf_loaded_callback:
+            print("Calling PDF loaded callback")
+            self.pdf_loaded_callback()
+            
+    def render_page_image(self, page_num, zoom):
+        """Render a page to a PIL image (safe to call from worker threads)"""
+        if Image is None:
+            return None
+        with self.document_lock:
+            if not self.pdf_document or page_num >= self.total_pages:
+                return None
+            page = self.pdf_document[page_num]
+            self.page_rects[page_num] = page.rect
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+            
+    def render_clip_image(self, page_num, zoom, clip):
+        """Render a rectangular region of a page to a PIL image"""
+        if Image is None:
+            return None
+        with self.document_lock:
+            if not self.pdf_document or page_num >= self.total_pages:
+                return None
+            page = self.pdf_document[page_num]
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=fitz.Rect(clip))
+            return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+            
+    def page_rect(self, page_num):
+        """Return a page's rectangle, or None while a background render holds the document"""
+        rect = self.page_rects.get(page_num)
+        if rect is None and self.document_lock.acquire(blocking=False):
+            try:
+                rect = self.page_rects[page_num] = self.pdf_document[page_num].rect
+            finally:
+                self.document_lock.release()
+        return rect
+        
+    def get_cache_stats(self):
+        """Return hit/miss counters and memory usage of the rendered page cache"""
+        return self.page_cache.stats()
+        
+    def get_render_stats(self):
+        """Return how many renders were requested, performed and skipped by coalescing"""
+        return self.render_scheduler.stats()
+        
     def display_current_page(self):
         """Display the current page"""
         if not self.pdf_document:
             return
             
-        try:
-            # Get page
-            page = self.pdf_document[self.current_page]
+        # Any background render started before this call is now stale
+        self.render_generation += 1
+        self.page_item = None
             
+        try:
             # Calculate zoom to fit canvas (only on first load)
             canvas_width = self.canvas.winfo_width()
             canvas_height = self.canvas.winfo_height()
             
+            # Never wait on the Tk thread behind a prefetch holding the document
+            page_rect = self.page_rect(self.current_page)
+            if page_rect is None:
+                self.render_scheduler.request()
+                return
+            
             if canvas_width > 1 and canvas_height > 1 and self.zoom_level == 1.0:
                 # Calculate zoom to fit
-                page_rect = page.rect
                 width_zoom = (canvas_width - 20) / page_rect.width
                 height_zoom = (canvas_height - 20) / page_rect.height
                 self.zoom_level = min(width_zoom, height_zoom) * 0.8  # 80% of fit
             
-            # Render page with current zoom level
-            mat = fitz.Matrix(self.zoom_level, self.zoom_level)
-            pix = page.get_pixmap(matrix=mat)
-            
             # Check if PIL modules are available
             if Image is None or ImageTk is None:
                 error_msg = "PIL modules are not available. Please ensure Pillow is properly installed."
@@ -437,25 +577,177 @@ class CustomPDFViewer(ttk.Frame):
                 messagebox.showerror("Error", error_msg)
                 return
                 
-            # Convert to PIL Image
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+            # At high zoom only rasterize the part of the page that is on screen
+            page_width_px = page_rect.width * self.zoom_level
+            page_height_px = page_rect.height * self.zoom_level
+            # An unmapped canvas reports 1x1; wait until its real size is known
+            canvas_area = canvas_width * canvas_height
+            if (canvas_width > 1 and canvas_height > 1
+                    and page_width_px * page_height_px > TILED_RENDER_THRESHOLD * canvas_area):
+                self.display_tiled_page(page_rect, page_width_px, page_height_px)
+                return
+            self.tiled_mode = False
+            self.tile_items = {}
+            self.tiles_pending = set()
             
-            # Convert to PhotoImage
-            photo = ImageTk.PhotoImage(img)
+            # Use the cached render if this page was already rasterized at this zoom
+            key = self.page_cache.make_key(self.current_page, self.zoom_level)
+            cache_generation = self.page_cache.generation
+            img = self.page_cache.get(key)
+            full_size = (round(page_rect.width * self.zoom_level), round(page_rect.height * self.zoom_level))
+            if img is None and self.progressive_rendering:
+                # Show a low-res preview now, but never wait behind a prefetch holding the document
+                if self.document_lock.acquire(blocking=False):
+                    try:
+                        img = self.render_page_image(self.current_page, min(self.zoom_level, PREVIEW_ZOOM))
+                    finally:
+                        self.document_lock.release()
+                if img is not None and self.zoom_level <= PREVIEW_ZOOM:
+                    # The preview is already the page at full resolution
+                    self.page_cache.put(key, img, generation=cache_generation)
+                else:
+                    # Render the sharp page in the background and swap it in
+                    if img is not None and img.size != full_size:
+                        img = img.resize(full_size, Image.Resampling.BILINEAR)
+                    self.render_full_page_async(self.render_generation, cache_generation,
+                                                self.current_page, self.zoom_level)
+            elif img is None:
+                img = self.render_page_image(self.current_page, self.zoom_level)
+                if img is not None:
+                    self.page_cache.put(key, img, generation=cache_generation)
             
-            # Clear canvas and display
+            # Clear canvas and display; without a preview the image item stays empty until the render arrives
             self.canvas.delete("all")
-            self.canvas.create_image(0, 0, anchor="nw", image=photo)
+            if img is not None:
+                # Convert to PhotoImage
+                photo = ImageTk.PhotoImage(img)
+                self.page_item = self.canvas.create_image(0, 0, anchor="nw", image=photo)
+            else:
+                photo = None
+                self.page_item = self.canvas.create_image(0, 0, anchor="nw")
             
             # Keep reference
             self.current_photo = photo
             
             # Update scroll region
-            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+            self.canvas.configure(scrollregion=(0, 0, *full_size))
+            
+            # Pre-render the neighbouring pages so the next page turn is a cache hit
+            self.prefetcher.request(self.current_page, self.zoom_level, self.total_pages)
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to display page: {str(e)}")
             
+    def render_full_page_async(self, generation, cache_generation, page_num, zoom):
+        """Render the full-resolution page in a worker thread and swap it in when done"""
+        def render_thread():
+            # Skip the work entirely if the user has already moved on
+            if generation != self.render_generation:
+                return
+            try:
+                img = self.render_page_image(page_num, zoom)
+            except Exception as e:
+                print(f"Failed to render page {page_num + 1}: {e}")
+                return
+            if img is None:
+                return
+            # Dropped by the cache if another document was loaded meanwhile
+            self.page_cache.put(self.page_cache.make_key(page_num, zoom), img, generation=cache_generation)
+            self.after(0, lambda: self.swap_in_full_render(generation, img))
+        
+        threading.Thread(target=render_thread, daemon=True).start()
+        
+    def swap_in_full_render(self, generation, img):
+        """Replace the preview with the sharp render unless a newer render was requested"""
+        if generation != self.render_generation or self.page_item is None:
+            return
+        photo = ImageTk.PhotoImage(img)
+        # Swap the image in place so search highlights drawn on top are kept
+        self.canvas.itemconfigure(self.page_item, image=photo)
+        self.current_photo = photo
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        
+    def display_tiled_page(self, page_rect, page_width_px, page_height_px):
+        """Set up the canvas for the current page in tiled mode"""
+        self.tiled_mode = True
+        self.tiled_page_rect = (page_rect.x0, page_rect.y0, page_rect.x1, page_rect.y1)
+        self.tiled_page_size = (page_width_px, page_height_px)
+        
+        # Whole-page prefetch would be wasteful at this zoom
+        self.prefetcher.cancel()
+        
+        self.canvas.delete("all")
+        self.tile_items = {}
+        self.tiles_pending = set()
+        self.current_photo = None
+        self.canvas.configure(scrollregion=(0, 0, page_width_px, page_height_px))
+        self.refresh_visible_tiles()
+        
+    def refresh_visible_tiles(self):
+        """Render the tiles that intersect the viewport and drop the ones far outside it"""
+        if not self.tiled_mode or not self.pdf_document:
+            return
+            
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        viewport = (left, top, left + self.canvas.winfo_width(), top + self.canvas.winfo_height())
+        page_width_px, page_height_px = self.tiled_page_size
+        visible = self.tile_renderer.visible_tiles(page_width_px, page_height_px, viewport)
+        
+        # Release tiles that are no longer near the viewport
+        wanted = set(visible)
+        for tile in list(self.tile_items):
+            if tile not in wanted:
+                item, _ = self.tile_items.pop(tile)
+                self.canvas.delete(item)
+        
+        # Place cached tiles now and render the rest in the background
+        missing = []
+        for col, row in visible:
+            if (col, row) in self.tile_items or (col, row) in self.tiles_pending:
+                continue
+            img = self.tile_renderer.cached_tile(self.current_page, self.zoom_level, col, row)
+            if img is None:
+                missing.append((col, row))
+            else:
+                self.place_tile(col, row, img)
+        if missing:
+            self.tiles_pending.update(missing)
+            self.render_tiles_async(self.render_generation, self.tile_renderer.cache.generation,
+                                    self.current_page, self.zoom_level, self.tiled_page_rect, missing)
+        
+    def render_tiles_async(self, generation, cache_generation, page_num, zoom, page_rect, tiles):
+        """Render tiles in a worker thread and place each one as it is done"""
+        def render_thread():
+            for col, row in tiles:
+                # Stop as soon as the user has moved to another page or zoom
+                if generation != self.render_generation:
+                    return
+                try:
+                    img = self.tile_renderer.get_tile(page_num, zoom, page_rect, col, row, cache_generation)
+                except Exception as e:
+                    print(f"Failed to render tile {col},{row} of page {page_num + 1}: {e}")
+                    img = None
+                self.after(0, lambda col=col, row=row, img=img: self.swap_in_tile(generation, col, row, img))
+        
+        threading.Thread(target=render_thread, daemon=True).start()
+        
+    def swap_in_tile(self, generation, col, row, img):
+        """Place a tile rendered in the background unless a newer render was requested"""
+        if generation != self.render_generation:
+            return
+        self.tiles_pending.discard((col, row))
+        if img is not None and (col, row) not in self.tile_items:
+            self.place_tile(col, row, img)
+            
+    def place_tile(self, col, row, img):
+        tile_size = self.tile_renderer.tile_size
+        photo = ImageTk.PhotoImage(img)
+        item = self.canvas.create_image(col * tile_size, row * tile_size, anchor="nw", image=photo, tags="tile")
+        self.tile_items[(col, row)] = (item, photo)
+        # Keep search highlights above the tiles
+        self.canvas.tag_lower("tile")
+        
     def update_toolbar(self):
         """Update toolbar with current page info"""
         if self.pdf_document:
@@ -471,7 +763,7 @@ class CustomPDFViewer(ttk.Frame):
         """Go to next page"""
         if self.pdf_document and self.current_page < self.total_pages - 1:
             self.current_page += 1
-            self.display_current_page()
+            self.render_scheduler.request()
             self.update_toolbar()
             # Clear search highlights when changing pages
             self.clear_search_highlights()
@@ -480,7 +772,7 @@ class CustomPDFViewer(ttk.Frame):
         """Go to previous page"""
         if self.pdf_document and self.current_page > 0:
             self.current_page -= 1
-            self.display_current_page()
+            self.render_scheduler.request()
             self.update_toolbar()
             # Clear search highlights when changing pages
             self.clear_search_highlights()
@@ -491,7 +783,7 @@ class CustomPDFViewer(ttk.Frame):
         old_zoom = self.zoom_level
         self.zoom_level *= 1.2
         if self.pdf_document:
-            self.display_current_page()
+            self.render_scheduler.request()
             print(f"Zoomed in: {old_zoom:.2f} -> {self.zoom_level:.2f}")
         else:
             print("No PDF document loaded")
@@ -502,7 +794,7 @@ class CustomPDFViewer(ttk.Frame):
         old_zoom = self.zoom_level
         self.zoom_level /= 1.2
         if self.pdf_document:
-            self.display_current_page()
+            self.render_scheduler.request()
             print(f"Zoomed out: {old_zoom:.2f} -> {self.zoom_level:.2f}")
         else:
             print("No PDF document loaded") 
\ No newline at end of file
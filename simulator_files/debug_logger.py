@@ -0,0 +1,97 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOGGER_NAME = 'fe_simulator'
+
+# Set to DEBUG, INFO, WARNING, ERROR or OFF to control what reaches the debug log
+LOG_LEVEL_ENV = 'FE_SIMULATOR_LOG_LEVEL'
+DEFAULT_LOG_LEVEL = 'INFO'
+
+# Rotate the debug log once it reaches this size, keeping a few old logs
+MAX_LOG_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+_listener = None
+
+
+def get_debug_log_path():
+    if getattr(sys, 'frozen', False):
+        # Running as compiled EXE - write to user's home directory
+        home_dir = os.path.expanduser("~")
+        return os.path.join(home_dir, 'fe_simulator_debug.log')
+    else:
+        # Running as script - write to simulator_files directory
+        return os.path.join(os.path.dirname(__file__), 'debug.log')
+
+
+def _level_from_env():
+    name = os.environ.get(LOG_LEVEL_ENV, DEFAULT_LOG_LEVEL).strip().upper()
+    if name == 'OFF':
+        return None
+    level = logging.getLevelName(name)
+    if not isinstance(level, int):
+        print(f"Unknown {LOG_LEVEL_ENV} value {name!r}, using {DEFAULT_LOG_LEVEL}")
+        level = logging.getLevelName(DEFAULT_LOG_LEVEL)
+    return level
+
+
+def setup_debug_logging(log_path=None, level=None):
+    """Configure the application logger once and return it.
+
+    Callers only enqueue records; a QueueListener thread owns the single open
+    log file and rotates it by size. Each run starts a fresh log, with the
+    previous runs kept as numbered backups. With the level set to OFF no file
+    is opened and log calls return after a level check.
+    """
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    if _listener is not None or logger.handlers:
+        return logger
+    logger.propagate = False
+
+    if level is None:
+        level = _level_from_env()
+    if level is None:
+        logger.setLevel(logging.CRITICAL + 1)
+        logger.addHandler(logging.NullHandler())
+        return logger
+    logger.setLevel(level)
+
+    log_path = log_path or get_debug_log_path()
+    try:
+        file_handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=MAX_LOG_BYTES,
+                                                            backupCount=LOG_BACKUP_COUNT,
+                                                            encoding='utf-8', delay=True)
+        if os.path.exists(log_path) and os.path.getsize(log_path) > 0:
+            file_handler.doRollover()
+    except OSError as e:
+        print(f"Could not open debug log {log_path}: {e}")
+        logger.addHandler(logging.NullHandler())
+        return logger
+    file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _listener.start()
+    atexit.register(shutdown_debug_logging)
+    return logger
+
+
+def shutdown_debug_logging():
+    """Write out any queued records and close the log file"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+def get_logger():
+    return logging.getLogger(LOGGER_NAME)
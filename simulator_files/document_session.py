@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+
+from simulator_files.app_paths import get_cache_dir
+from simulator_files.search_index import file_hash
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+# Remembers the last reference handbook between runs
+SESSION_FILE = 'document_session.json'
+
+
+class DocumentSession:
+    """The reference handbook that is open in this process, shared by every exam.
+
+    The document is opened once and kept, so its page tree and fonts stay loaded
+    between exams. The path is remembered together with the file's size, mtime and
+    SHA-1, and the next start reopens it only if it is still the same file.
+    """
+
+    def __init__(self, state_path=None):
+        self.state_path = state_path or os.path.join(get_cache_dir(), SESSION_FILE)
+        # PyMuPDF documents are not thread-safe; every access goes through this lock
+        self.lock = threading.RLock()
+        self.document = None
+        self.file_path = None
+        self.file_hash = None
+
+    def open(self, file_path, digest=None):
+        """Open a PDF, make it the session's document and remember it (call from a worker thread)"""
+        if fitz is None:
+            raise RuntimeError("PyMuPDF (fitz) is not available. Please ensure it is properly installed.")
+        return self._open(file_path, digest, replace=True)
+
+    def _open(self, file_path, digest, replace):
+        if not replace and self.document is not None:
+            return None
+        stat = os.stat(file_path)
+        digest = digest or file_hash(file_path)
+        document = fitz.open(file_path)
+        with self.lock:
+            if self.document is not None and not replace:
+                # Another handbook was opened meanwhile
+                document.close()
+                return None
+            # The viewer closes the previous document once it has switched away from it
+            self.document = document
+            self.file_path = file_path
+            self.file_hash = digest
+        self._save(file_path, stat, digest)
+        return document
+
+    def _save(self, file_path, stat, digest):
+        state = {
+            'path': os.path.abspath(file_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha1': digest,
+        }
+        try:
+            tmp_path = self.state_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"Could not remember the reference handbook: {e}")
+
+    def remembered(self):
+        """Return (path, sha1) of the remembered handbook if it is still the same file, else None"""
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+            path = state['path']
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring remembered reference handbook: {e}")
+            return None
+
+        if stat.st_size == state.get('size') and stat.st_mtime_ns == state.get('mtime_ns'):
+            return path, state.get('sha1')
+        # Touched or copied back: still usable if the contents are unchanged
+        digest = file_hash(path) if stat.st_size == state.get('size') else None
+        if digest is not None and digest == state.get('sha1'):
+            self._save(path, stat, digest)
+            return path, digest
+        print(f"Reference handbook {path} has changed since it was last opened; not reopening it")
+        return None
+
+    def reopen_last(self, on_open=None):
+        """Reopen the remembered handbook in a background thread; on_open(document, path) runs in that thread"""
+        if fitz is None or self.document is not None:
+            return
+
+        def reopen_thread():
+            remembered = self.remembered()
+            if remembered is None:
+                return
+            path, digest = remembered
+            try:
+                # Keep a handbook the user opened while this one was loading
+                document = self._open(path, digest, replace=False)
+            except Exception as e:
+                print(f"Could not reopen reference handbook {path}: {e}")
+                return
+            if document is None:
+                return
+            print(f"Reopened reference handbook {path} ({len(document)} pages)")
+            if on_open is not None:
+                on_open(document, path)
+
+        threading.Thread(target=reopen_thread, daemon=True).start()
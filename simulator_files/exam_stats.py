@@ -1,10 +1,37 @@
 import json
 import time
-from typing import Dict, List
-from dataclasses import dataclass, asdict
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, asdict, field
 from datetime import datetime
 import os
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Exam results are appended to a JSON Lines log, one compact object per exam.
+# A small summary sidecar holds the running totals, so the dashboard starts
+# without reading the log at all.
+RESULTS_LOG_FILE = 'exam_results.jsonl'
+SUMMARY_FILE = 'exam_stats_summary.json'
+LEGACY_STATS_FILE = 'exam_stats.json'  # Whole-history JSON used before the log
+REJECTED_SUFFIX = '.rejected'  # Log lines that can't be read as results are moved here, never deleted
+SUMMARY_VERSION = 2
+
+# Rewrite the log after this many appends, dropping a final line torn by a crash
+COMPACT_EVERY = 50
+
+@dataclass
+class QuestionAttempt:
+    problem_number: str
+    category: str
+    chosen_answer: Optional[str]  # Answer letter, None if unanswered
+    correct: bool
+    dwell_time: float  # seconds spent on the question
+
 @dataclass
 class ExamResult:
     date: str
@@ -12,57 +39,430 @@ class ExamResult:
     score: float
     time_taken: float  # in seconds
     test_type: str
+    attempts: List[QuestionAttempt] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ExamResult':
+        attempts = [QuestionAttempt(**attempt) for attempt in data.pop('attempts', [])]
+        return cls(**data, attempts=attempts)
+
+def _add_attempts(aggregates: Dict[str, Dict[str, Any]], key: str, attempt: QuestionAttempt):
+    totals = aggregates.setdefault(key, {'attempts': 0, 'correct': 0, 'dwell_time': 0.0})
+    totals['attempts'] += 1
+    totals['correct'] += int(attempt.correct)
+    totals['dwell_time'] += attempt.dwell_time
+
+def _moving_average(values, window: int) -> List[float]:
+    if len(values) < window:
+        return []
+    if np is not None:
+        cumulative = np.cumsum(np.insert(np.asarray(values, dtype=float), 0, 0.0))
+        return ((cumulative[window:] - cumulative[:-window]) / window).tolist()
+    return [sum(values[i:i + window]) / window for i in range(len(values) - window + 1)]
+
+def _slope(values) -> float:
+    """Least-squares change per exam"""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    if np is not None:
+        return float(np.polyfit(np.arange(n), np.asarray(values, dtype=float), 1)[0])
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    variance = sum((x - mean_x) ** 2 for x in range(n))
+    return covariance / variance
+
+# Set to 'sqlite' to keep statistics in an SQLite database instead of the JSON Lines log
+STATS_BACKEND_ENV = 'FE_SIMULATOR_STATS_BACKEND'
+
+def create_exam_stats(stats_dir: Optional[str] = None, backend: Optional[str] = None) -> 'ExamStatsBase':
+    """Open the exam statistics with the configured storage backend ('jsonl' or 'sqlite')"""
+    backend = backend or os.environ.get(STATS_BACKEND_ENV, 'jsonl')
+    if backend == 'sqlite':
+        from simulator_files.exam_stats_sqlite import SQLiteExamStats
+        return SQLiteExamStats(stats_dir)
+    if backend != 'jsonl':
+        print(f"Unknown statistics backend {backend!r}, using jsonl")
+    return ExamStats(stats_dir)
+
+def _write_atomically(path: str, data: bytes):
+    """Replace a file so that readers see either the old or the new content, never a mix"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _encode_result(result: ExamResult) -> bytes:
+    return json.dumps(asdict(result), separators=(',', ':')).encode('utf-8') + b'\n'
+
+def read_results_log(log_path: str):
+    """Return (results, rejected lines, torn) from a results log, without changing it
+
+    A final line that is not valid JSON and has no newline is torn: an append
+    cut short by a crash. Every other line that can't be read as a result (bad
+    JSON in the middle of the log, or JSON that does not fit the schema, e.g.
+    written by another version) is returned byte-for-byte in rejected lines.
+    """
+    results = []
+    rejected = []
+    torn = False
+    try:
+        with open(log_path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError:  # Includes JSON and UTF-8 decode errors
+                    # Only the last line can lack its newline
+                    if line.endswith(b'\n'):
+                        rejected.append(line)
+                    else:
+                        torn = True
+                    continue
+                try:
+                    results.append(ExamResult.from_dict(data))
+                except (TypeError, KeyError, AttributeError):
+                    rejected.append(line if line.endswith(b'\n') else line + b'\n')
+    except FileNotFoundError:
+        pass
+    return results, rejected, torn
+
+def read_legacy_stats(legacy_path: str) -> List[ExamResult]:
+    """Return the results stored in an exam_stats.json file (raises ValueError, KeyError or TypeError)"""
+    with open(legacy_path, 'r') as f:
+        data = json.load(f)
+    return [ExamResult.from_dict(result) for result in data['results']]
+
+def read_json_history(stats_dir: str) -> List[ExamResult]:
+    """Every result kept by the JSON storage in stats_dir, read without writing anything
+
+    The results log wins over exam_stats.json, which it replaced.
+    """
+    log_path = os.path.join(stats_dir, RESULTS_LOG_FILE)
+    if os.path.exists(log_path):
+        return read_results_log(log_path)[0]
+    legacy_path = os.path.join(stats_dir, LEGACY_STATS_FILE)
+    if not os.path.exists(legacy_path):
+        return []
+    try:
+        return read_legacy_stats(legacy_path)
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Error: could not read {legacy_path}: {e}")
+        return []
+
+class ResultsLogView(Sequence):
+    """Read-only view of a results log that decodes only the lines that are read.
+
+    Creating it scans the log for line offsets without parsing any JSON, so a
+    history list can page through thousands of exams cheaply.
+    """
+
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self._offsets: List[int] = []  # Start of each non-empty line
+        self._decoded: Dict[int, ExamResult] = {}
+        position = 0
+        try:
+            with open(log_path, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        self._offsets.append(position)
+                    position += len(line)
+        except FileNotFoundError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index: int) -> ExamResult:
+        if index < 0:
+            index += len(self._offsets)
+        if not 0 <= index < len(self._offsets):
+            raise IndexError(index)
+        result = self._decoded.get(index)
+        if result is None:
+            with open(self.log_path, 'rb') as f:
+                f.seek(self._offsets[index])
+                result = self._decoded[index] = ExamResult.from_dict(json.loads(f.readline()))
+        return result
+
+class ExamStatsBase(ABC):
+    """Queries shared by the statistics backends; subclasses provide storage and the aggregates"""
+
+    def __init__(self, stats_dir: Optional[str] = None):
+        self.stats_dir = stats_dir or os.path.dirname(__file__)
+        self._results: Optional[List[ExamResult]] = None  # Read from storage on first use
+        self._history: Optional[Dict[str, Any]] = None  # Column view of the results for trend queries
+
+    @property
+    @abstractmethod
+    def results(self) -> List[ExamResult]:
+        """Every exam result, oldest first"""
+
+    @abstractmethod
+    def add_result(self, num_questions: int, score: float, time_taken: float, test_type: str,
+                   attempts: Optional[List[QuestionAttempt]] = None):
+        pass
+
+    @abstractmethod
+    def save_stats(self):
+        pass
+
+    @abstractmethod
+    def compact(self):
+        pass
+
+    @abstractmethod
+    def get_statistics(self) -> Dict:
+        pass
+
+    @abstractmethod
+    def get_category_statistics(self) -> Dict[str, Dict[str, float]]:
+        pass
 
-class ExamStats:
-    def __init__(self):
-        self.results: List[ExamResult] = []
-        self._load_stats()
+    @abstractmethod
+    def get_problem_statistics(self, problem_number: str) -> Optional[Dict[str, float]]:
+        pass
 
-    def _load_stats(self):
+    @abstractmethod
+    def clear_statistics(self):
+        pass
+
+    def result_rows(self) -> Sequence:
+        """The results, oldest first, as a sequence that may read them only when indexed"""
+        return self.results
+
+    @staticmethod
+    def _rates(totals: Dict[str, Any]) -> Dict[str, float]:
+        return {
+            'attempts': totals['attempts'],
+            'correct': totals['correct'],
+            'accuracy': totals['correct'] / totals['attempts'] * 100,
+            'average_dwell_time': totals['dwell_time'] / totals['attempts'],
+        }
+
+    def history(self) -> Dict[str, Any]:
+        """Per-exam columns (score, time per question, date) for trend queries; NumPy arrays when available"""
+        if self._history is None:
+            columns = self._history_columns()
+            if np is not None:
+                columns = {name: np.asarray(values, dtype=float) for name, values in columns.items()}
+            self._history = columns
+        return self._history
+
+    def _history_columns(self) -> Dict[str, List[float]]:
+        results = self.results
+        return {
+            'score': [result.score for result in results],
+            'time_per_question': [result.time_taken / result.num_questions if result.num_questions else 0.0
+                                  for result in results],
+            'timestamp': [datetime.strptime(result.date, "%Y-%m-%d %H:%M:%S").timestamp() for result in results],
+        }
+
+    def score_trend(self, window: int = 5) -> List[float]:
+        """Moving average of the exam scores, oldest first"""
+        return _moving_average(self.history()['score'], window)
+
+    def score_improvement_per_exam(self) -> float:
+        """Least-squares slope of the scores, in percentage points per exam"""
+        return _slope(self.history()['score'])
+
+    def category_accuracy_history(self, category: str) -> List[float]:
+        """Accuracy (%) in a category for each exam that included it, oldest first"""
+        accuracies = []
+        for result in self.results:
+            outcomes = [attempt.correct for attempt in result.attempts if attempt.category == category]
+            if outcomes:
+                accuracies.append(sum(outcomes) / len(outcomes) * 100)
+        return accuracies
+
+    def category_trend(self, category: str, window: int = 5) -> List[float]:
+        """Moving average of a category's accuracy across exams"""
+        return _moving_average(self.category_accuracy_history(category), window)
+
+class ExamStats(ExamStatsBase):
+    """Exam statistics in an append-only JSON Lines log with a summary sidecar"""
+
+    def __init__(self, stats_dir: Optional[str] = None):
+        super().__init__(stats_dir)
+        self.log_path = os.path.join(self.stats_dir, RESULTS_LOG_FILE)
+        self.summary_path = os.path.join(self.stats_dir, SUMMARY_FILE)
+        self._rejected: List[bytes] = []  # Unreadable log lines waiting to be set aside
+        self._migrate_legacy_stats()
+        self._load_summary()
+
+    @property
+    def results(self) -> List[ExamResult]:
+        """Every exam result, oldest first (reads the log on first access)"""
+        if self._results is None:
+            self._results, self._rejected, torn = self._read_log()
+            if torn:
+                print(f"Dropping a line torn by an interrupted write from {self.log_path}")
+            if torn or self._rejected:
+                self.compact()
+        return self._results
+
+    def _read_log(self):
+        """Return (results, rejected lines, torn) from the log"""
+        return read_results_log(self.log_path)
+
+    def _set_aside_rejected(self):
+        """Append the lines that can't be read as results to the .rejected file next to the log"""
+        if not self._rejected:
+            return
+        rejected_path = self.log_path + REJECTED_SUFFIX
+        print(f"Moving {len(self._rejected)} unreadable line(s) from {self.log_path} to {rejected_path}")
+        with open(rejected_path, 'ab') as f:
+            f.write(b''.join(self._rejected))
+            f.flush()
+            os.fsync(f.fileno())
+        self._rejected = []
+
+    def result_rows(self) -> Sequence:
+        """The results, oldest first; unless already loaded, lines are decoded only when indexed"""
+        if self._results is not None:
+            return self._results
+        view = ResultsLogView(self.log_path)
+        if len(view) != self.summary['exams_taken']:
+            # The log has a torn or unreadable line; reading the results sets it aside
+            return self.results
+        return view
+
+    def _log_size(self) -> int:
         try:
-            with open(os.path.join(os.path.dirname(__file__), 'exam_stats.json'), 'r') as f:
-                data = json.load(f)
-                self.results = [ExamResult(**result) for result in data['results']]
+            return os.path.getsize(self.log_path)
         except FileNotFoundError:
-            self.results = []
+            return 0
+
+    def _migrate_legacy_stats(self):
+        """Convert exam_stats.json into the results log the first time it is seen (the JSON is kept)"""
+        legacy_path = os.path.join(self.stats_dir, LEGACY_STATS_FILE)
+        if os.path.exists(self.log_path) or not os.path.exists(legacy_path):
+            return
+        try:
+            self._results = read_legacy_stats(legacy_path)
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Error: could not migrate {legacy_path}: {e}")
+            return
+        self.compact()
+
+    def _load_summary(self):
+        try:
+            with open(self.summary_path, 'r') as f:
+                self.summary = json.load(f)
+            # The summary must describe exactly the log on disk; otherwise rebuild it
+            if self.summary.get('version') == SUMMARY_VERSION and self.summary.get('log_size') == self._log_size():
+                return
+        except (FileNotFoundError, ValueError):
+            pass
+        self._rebuild_summary()
+
+    def _rebuild_summary(self, appends_since_compaction: int = 0):
+        results = self.results
+        self.summary = {
+            'version': SUMMARY_VERSION,
+            'exams_taken': len(results),
+            'total_score': sum(result.score for result in results),
+            'total_time': sum(result.time_taken for result in results),
+            'total_questions': sum(result.num_questions for result in results),
+            'appends_since_compaction': appends_since_compaction,
+            'categories': {},
+            'problems': {},
+        }
+        for result in results:
+            self._add_to_aggregates(result)
+        self._save_summary()
+
+    def _add_to_aggregates(self, result: ExamResult):
+        """Fold one exam's attempts into the running per-category and per-problem totals"""
+        for attempt in result.attempts:
+            _add_attempts(self.summary['categories'], attempt.category, attempt)
+            _add_attempts(self.summary['problems'], str(attempt.problem_number), attempt)
+
+    def _save_summary(self):
+        self.summary['log_size'] = self._log_size()
+        _write_atomically(self.summary_path, json.dumps(self.summary).encode('utf-8'))
 
     def save_stats(self):
-        with open(os.path.join(os.path.dirname(__file__), 'exam_stats.json'), 'w') as f:
-            json.dump({
-                'results': [asdict(result) for result in self.results]
-            }, f, indent=4)
+        """Write the full history and summary to disk (compacts the log)"""
+        self.compact()
+
+    def compact(self):
+        """Rewrite the log from the loaded results and reset the summary"""
+        if self._results is None:
+            self._results, self._rejected, _ = self._read_log()
+        # Save unreadable lines before the rewrite, so a crash can duplicate them but never lose them
+        self._set_aside_rejected()
+        _write_atomically(self.log_path, b''.join(_encode_result(result) for result in self._results))
+        self._rebuild_summary()
 
-    def add_result(self, num_questions: int, score: float, time_taken: float, test_type: str):
+    def add_result(self, num_questions: int, score: float, time_taken: float, test_type: str,
+                   attempts: Optional[List[QuestionAttempt]] = None):
         result = ExamResult(
             date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             num_questions=num_questions,
             score=score,
             time_taken=time_taken,
-            test_type=test_type
+            test_type=test_type,
+            attempts=attempts or []
         )
-        self.results.append(result)
-        self.save_stats()
+        with open(self.log_path, 'a+b') as f:
+            f.seek(0, os.SEEK_END)
+            prefix = b''
+            if f.tell() > 0:
+                # Never glue a record onto a line torn by an earlier crash
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    prefix = b'\n'
+            f.write(prefix + _encode_result(result))
+            f.flush()
+            os.fsync(f.fileno())
+        if self._results is not None:
+            self._results.append(result)
+        self._history = None
+
+        self.summary['exams_taken'] += 1
+        self.summary['total_score'] += score
+        self.summary['total_time'] += time_taken
+        self.summary['total_questions'] += num_questions
+        self.summary['appends_since_compaction'] += 1
+        self._add_to_aggregates(result)
+        if self.summary['appends_since_compaction'] >= COMPACT_EVERY:
+            self.compact()
+        else:
+            self._save_summary()
 
     def get_statistics(self) -> Dict:
-        if not self.results:
+        total_exams = self.summary['exams_taken']
+        if not total_exams:
             return {
                 'exams_taken': 0,
                 'average_score': 0,
                 'average_time_per_question': 0
             }
 
-        total_exams = len(self.results)
-        total_score = sum(result.score for result in self.results)
-        total_time = sum(result.time_taken for result in self.results)
-        total_questions = sum(result.num_questions for result in self.results)
-
+        total_questions = self.summary['total_questions']
         return {
             'exams_taken': total_exams,
-            'average_score': total_score / total_exams,
-            'average_time_per_question': total_time / total_questions if total_questions > 0 else 0
+            'average_score': self.summary['total_score'] / total_exams,
+            'average_time_per_question': self.summary['total_time'] / total_questions if total_questions > 0 else 0
         }
 
+    def get_category_statistics(self) -> Dict[str, Dict[str, float]]:
+        """Accuracy and average dwell time per category, from the running totals"""
+        return {category: self._rates(totals) for category, totals in self.summary['categories'].items()}
+
+    def get_problem_statistics(self, problem_number: str) -> Optional[Dict[str, float]]:
+        """Accuracy and average dwell time of one problem across all exams, or None if never attempted"""
+        totals = self.summary['problems'].get(str(problem_number))
+        return self._rates(totals) if totals is not None else None
+
     def clear_statistics(self):
         """Clear all exam statistics and save to file."""
-        self.results = []
-        self.save_stats() 
\ No newline at end of file
+        self._results = []
+        self._history = None
+        self.save_stats()
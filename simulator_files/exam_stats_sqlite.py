@@ -0,0 +1,241 @@
+"""SQLite storage backend for exam statistics.
+
+Exams and their per-question attempts live in two indexed tables of
+exam_stats.db. The database runs in WAL mode, so a crash mid-write never
+corrupts the history, and every aggregate the dashboard shows is computed
+with SQL instead of by reading the history into Python.
+"""
+import argparse
+import os
+import sqlite3
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from simulator_files.exam_stats import ExamResult, ExamStatsBase, QuestionAttempt, read_json_history
+
+DATABASE_FILE = 'exam_stats.db'
+SCHEMA_VERSION = 1
+
+# Exams fetched per query when paging through the history
+PAGE_ROWS = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exams (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    num_questions INTEGER NOT NULL,
+    score REAL NOT NULL,
+    time_taken REAL NOT NULL,
+    test_type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS exams_date ON exams(date);
+CREATE INDEX IF NOT EXISTS exams_test_type ON exams(test_type);
+
+CREATE TABLE IF NOT EXISTS attempts (
+    exam_id INTEGER NOT NULL REFERENCES exams(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    problem_number TEXT NOT NULL,
+    category TEXT NOT NULL,
+    chosen_answer TEXT,
+    correct INTEGER NOT NULL,
+    dwell_time REAL NOT NULL,
+    PRIMARY KEY (exam_id, position)
+);
+CREATE INDEX IF NOT EXISTS attempts_category ON attempts(category);
+CREATE INDEX IF NOT EXISTS attempts_problem ON attempts(problem_number);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class ExamRowsView(Sequence):
+    """The exams, oldest first, fetched a page at a time (without their attempts)"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self._count = connection.execute("SELECT COUNT(*) FROM exams").fetchone()[0]
+        self._rows: Dict[int, ExamResult] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> ExamResult:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        if index not in self._rows:
+            page_start = index - index % PAGE_ROWS
+            rows = self.connection.execute(
+                "SELECT date, num_questions, score, time_taken, test_type FROM exams ORDER BY date, id "
+                "LIMIT ? OFFSET ?", (PAGE_ROWS, page_start))
+            for offset, row in enumerate(rows):
+                self._rows[page_start + offset] = ExamResult(*row)
+        return self._rows[index]
+
+
+class SQLiteExamStats(ExamStatsBase):
+    """Exam statistics kept in an SQLite database; the public API is the same as the JSON Lines store."""
+
+    def __init__(self, stats_dir: Optional[str] = None):
+        super().__init__(stats_dir)
+        self.db_path = os.path.join(self.stats_dir, DATABASE_FILE)
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        if self._meta('migrated_from_json') is None:
+            migrate_json_to_sqlite(self)
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _insert(self, result: ExamResult):
+        """Insert one exam and its attempts (the caller owns the transaction)"""
+        cursor = self.connection.execute(
+            "INSERT INTO exams (date, num_questions, score, time_taken, test_type) VALUES (?, ?, ?, ?, ?)",
+            (result.date, result.num_questions, result.score, result.time_taken, result.test_type))
+        self.connection.executemany(
+            "INSERT INTO attempts VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(cursor.lastrowid, position, str(attempt.problem_number), attempt.category, attempt.chosen_answer,
+              int(attempt.correct), attempt.dwell_time) for position, attempt in enumerate(result.attempts)])
+
+    @property
+    def results(self) -> List[ExamResult]:
+        """Every exam result, oldest first"""
+        if self._results is None:
+            attempts: Dict[int, List[QuestionAttempt]] = {}
+            for exam_id, problem_number, category, chosen_answer, correct, dwell_time in self.connection.execute(
+                    "SELECT exam_id, problem_number, category, chosen_answer, correct, dwell_time "
+                    "FROM attempts ORDER BY exam_id, position"):
+                attempts.setdefault(exam_id, []).append(
+                    QuestionAttempt(problem_number, category, chosen_answer, bool(correct), dwell_time))
+            self._results = [
+                ExamResult(date, num_questions, score, time_taken, test_type, attempts.get(exam_id, []))
+                for exam_id, date, num_questions, score, time_taken, test_type in self.connection.execute(
+                    "SELECT id, date, num_questions, score, time_taken, test_type FROM exams ORDER BY date, id")
+            ]
+        return self._results
+
+    def result_rows(self) -> Sequence:
+        """The results, oldest first; unless already loaded, exams are queried a page at a time"""
+        if self._results is not None:
+            return self._results
+        return ExamRowsView(self.connection)
+
+    def add_result(self, num_questions: int, score: float, time_taken: float, test_type: str,
+                   attempts: Optional[List[QuestionAttempt]] = None):
+        result = ExamResult(
+            date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            num_questions=num_questions,
+            score=score,
+            time_taken=time_taken,
+            test_type=test_type,
+            attempts=attempts or []
+        )
+        with self.connection:
+            self._insert(result)
+        if self._results is not None:
+            self._results.append(result)
+        self._history = None
+
+    def save_stats(self):
+        """Every change is committed as it is made; checkpoint the WAL into the database file"""
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def compact(self):
+        self.connection.execute("VACUUM")
+
+    def get_statistics(self) -> Dict:
+        total_exams, total_score, total_time, total_questions = self.connection.execute(
+            "SELECT COUNT(*), SUM(score), SUM(time_taken), SUM(num_questions) FROM exams").fetchone()
+        if not total_exams:
+            return {
+                'exams_taken': 0,
+                'average_score': 0,
+                'average_time_per_question': 0
+            }
+
+        return {
+            'exams_taken': total_exams,
+            'average_score': total_score / total_exams,
+            'average_time_per_question': total_time / total_questions if total_questions > 0 else 0
+        }
+
+    def get_category_statistics(self) -> Dict[str, Dict[str, float]]:
+        """Accuracy and average dwell time per category"""
+        rows = self.connection.execute(
+            "SELECT category, COUNT(*), SUM(correct), SUM(dwell_time) FROM attempts GROUP BY category")
+        return {category: self._rates({'attempts': count, 'correct': correct, 'dwell_time': dwell_time})
+                for category, count, correct, dwell_time in rows}
+
+    def get_problem_statistics(self, problem_number: str) -> Optional[Dict[str, float]]:
+        """Accuracy and average dwell time of one problem across all exams, or None if never attempted"""
+        count, correct, dwell_time = self.connection.execute(
+            "SELECT COUNT(*), SUM(correct), SUM(dwell_time) FROM attempts WHERE problem_number = ?",
+            (str(problem_number),)).fetchone()
+        if not count:
+            return None
+        return self._rates({'attempts': count, 'correct': correct, 'dwell_time': dwell_time})
+
+    def _history_columns(self) -> Dict[str, List[float]]:
+        rows = self.connection.execute(
+            "SELECT score, CASE WHEN num_questions > 0 THEN time_taken / num_questions ELSE 0 END, "
+            "CAST(strftime('%s', date, 'utc') AS REAL) FROM exams ORDER BY date, id").fetchall()
+        return {
+            'score': [row[0] for row in rows],
+            'time_per_question': [row[1] for row in rows],
+            'timestamp': [row[2] for row in rows],
+        }
+
+    def category_accuracy_history(self, category: str) -> List[float]:
+        """Accuracy (%) in a category for each exam that included it, oldest first"""
+        rows = self.connection.execute(
+            "SELECT 100.0 * SUM(attempts.correct) / COUNT(*) FROM attempts JOIN exams ON exams.id = attempts.exam_id "
+            "WHERE attempts.category = ? GROUP BY exams.id ORDER BY exams.date, exams.id", (category,))
+        return [row[0] for row in rows]
+
+    def clear_statistics(self):
+        """Clear all exam statistics."""
+        with self.connection:
+            self.connection.execute("DELETE FROM attempts")
+            self.connection.execute("DELETE FROM exams")
+        self._results = []
+        self._history = None
+
+    def close(self):
+        self.connection.close()
+
+
+def migrate_json_to_sqlite(stats: SQLiteExamStats) -> int:
+    """Copy the JSON history (exam_stats.json and the results log) into the database, once.
+
+    Returns the number of exams copied. The JSON files are left untouched.
+    """
+    results = read_json_history(stats.stats_dir)
+    with stats.connection:
+        for result in results:
+            stats._insert(result)
+        stats.connection.execute("INSERT OR REPLACE INTO meta VALUES ('migrated_from_json', ?)",
+                                 (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),))
+    stats._results = None
+    if results:
+        print(f"Migrated {len(results)} exam result(s) into {stats.db_path}")
+    return len(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Create or update the SQLite exam statistics database')
+    parser.add_argument('--stats-dir', help='Directory holding the statistics files (default: simulator_files)')
+    args = parser.parse_args()
+    stats = SQLiteExamStats(args.stats_dir)
+    print(f"{stats.db_path}: {stats.get_statistics()['exams_taken']} exam(s)")
+    stats.close()
@@ -0,0 +1,131 @@
+import hashlib
+import importlib.util
+import io
+import os
+import threading
+import tkinter as tk
+from functools import lru_cache
+
+from simulator_files.app_paths import get_cache_dir
+from simulator_files.page_cache import PageCache
+
+# matplotlib is imported by the first rasterization, not at startup: importing it
+# loads (and on first run builds) its font cache
+_mathtext = None
+
+# Bump when rasterization output changes, so PNGs from older versions are not reused
+RASTER_VERSION = 1
+
+DEFAULT_FORMULA_DPI = 120
+DEFAULT_FORMULA_FONT_SIZE = 12
+
+# In-memory budget for ready-to-display formula images
+DEFAULT_MAX_FORMULA_BYTES = 16 * 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def mathtext_available():
+    """True if matplotlib is installed (checked without importing it)"""
+    return importlib.util.find_spec('matplotlib') is not None
+
+
+def _import_mathtext():
+    """Return (mathtext, FontProperties), importing matplotlib on first use"""
+    global _mathtext
+    if _mathtext is None:
+        from matplotlib import mathtext
+        from matplotlib.font_manager import FontProperties
+        _mathtext = (mathtext, FontProperties)
+    return _mathtext
+
+
+class FormulaRenderer:
+    """Rasterizes formulas with matplotlib mathtext, caching PNGs on disk and PhotoImages in memory.
+
+    PNG files are named by a hash of the formula and rendering settings, so each
+    formula is rendered once and reused by every later exam. Rendering happens on
+    worker threads (render_png); the Tk thread only loads PNGs that already exist
+    (get_photo). Formulas mathtext cannot handle (e.g. matrix environments) return
+    None, and callers fall back to Unicode text.
+    """
+
+    def __init__(self, dpi=DEFAULT_FORMULA_DPI, font_size=DEFAULT_FORMULA_FONT_SIZE,
+                 max_photo_bytes=DEFAULT_MAX_FORMULA_BYTES, disk_cache_dir=None):
+        self.dpi = dpi
+        self.font_size = font_size
+        self._disk_cache_dir = disk_cache_dir
+        self._disk_cache_ready = False
+        self.photos = PageCache(max_photo_bytes)
+        self._failed = set()
+        self._lock = threading.Lock()
+
+    @property
+    def disk_cache_dir(self):
+        """PNG cache directory, created when the first formula is rendered"""
+        if not self._disk_cache_ready:
+            self._disk_cache_dir = self._disk_cache_dir or get_cache_dir('formulas')
+            os.makedirs(self._disk_cache_dir, exist_ok=True)
+            self._disk_cache_ready = True
+        return self._disk_cache_dir
+
+    def png_path(self, latex_code):
+        """Return the content-addressed cache path of a formula's PNG"""
+        key = f"{RASTER_VERSION}|{self.dpi}|{self.font_size}|{latex_code.strip()}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_cache_dir, f"{digest}.png")
+
+    def render_png(self, latex_code):
+        """Return the path of the formula's PNG, rendering it if needed, or None if mathtext can't draw it.
+
+        Safe to call from worker threads.
+        """
+        if not mathtext_available():
+            return None
+        with self._lock:
+            if latex_code in self._failed:
+                return None
+        path = self.png_path(latex_code)
+        if os.path.exists(path):
+            return path
+
+        buffer = io.BytesIO()
+        try:
+            mathtext, FontProperties = _import_mathtext()
+            mathtext.math_to_image(f"${latex_code.strip()}$", buffer,
+                                   prop=FontProperties(size=self.font_size), dpi=self.dpi, format='png')
+        except Exception as e:  # mathtext raises parse, font and I/O errors of many kinds
+            print(f"Can't rasterize formula {latex_code!r}, using text instead: {e}")
+            with self._lock:
+                self._failed.add(latex_code)
+            return None
+        try:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not save formula image {path}: {e}")
+            return None
+        return path
+
+    def get_photo(self, latex_code):
+        """Return a PhotoImage of the formula if its PNG has been rendered, else None (Tk thread only)"""
+        photo = self.photos.get(latex_code)
+        if photo is not None:
+            return photo
+        if latex_code in self._failed:
+            return None
+        path = self.png_path(latex_code)
+        if not os.path.exists(path):
+            return None
+        try:
+            photo = tk.PhotoImage(file=path)
+        except tk.TclError as e:
+            print(f"Could not load formula image {path}: {e}")
+            return None
+        self.photos.put(latex_code, photo, nbytes=photo.width() * photo.height() * 4)
+        return photo
+
+    def clear(self):
+        """Drop the in-memory images (the PNGs on disk are kept)"""
+        self.photos.clear()
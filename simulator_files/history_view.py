@@ -0,0 +1,86 @@
+import tkinter as tk
+from tkinter import font, ttk
+
+
+class VirtualHistoryList(ttk.Frame):
+    """Scrollable list that formats and inserts only the rows currently in view.
+
+    Items are given oldest first and shown newest first, as any sequence with
+    len() and indexing; only the items in view are read, so a lazy sequence is
+    never loaded in full. Formatted rows are cached by their position in the
+    item sequence, which does not change when new items are appended, so each
+    row is formatted once.
+    """
+
+    def __init__(self, parent, format_row, height=8, row_font=('Arial', 9), empty_text="No previous exams found."):
+        super().__init__(parent)
+        self.format_row = format_row
+        self.empty_text = empty_text
+        self._items = []
+        self._first = 0
+        self._formatted = {}
+        self._line_height = font.Font(font=row_font).metrics('linespace')
+
+        self.listbox = tk.Listbox(self, height=height, font=row_font, selectmode='none', activestyle='none')
+        self.listbox.pack(side='left', fill='both', expand=True)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self._on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.listbox.bind('<Configure>', lambda event: self._render())
+        self.listbox.bind('<MouseWheel>', self._on_mousewheel)
+        self.listbox.bind('<Button-4>', lambda event: self.scroll(-3))
+        self.listbox.bind('<Button-5>', lambda event: self.scroll(3))
+
+    def set_items(self, items):
+        """Show a new item sequence (oldest first), keeping cached rows that are still valid"""
+        if len(items) < len(self._items):
+            self._formatted.clear()  # Items were removed, positions no longer line up
+        self._items = items
+        self._render()
+
+    def scroll(self, rows):
+        self._first += rows
+        self._render()
+
+    def visible_rows(self):
+        height = self.listbox.winfo_height()
+        if height <= 1:
+            # Not mapped yet
+            return int(self.listbox.cget('height'))
+        # Tk pads each row by 1 px plus the selection border, and the widget by its border and focus ring
+        inset = 2 * (int(self.listbox.cget('borderwidth')) + int(self.listbox.cget('highlightthickness')))
+        row_height = self._line_height + 1 + 2 * int(self.listbox.cget('selectborderwidth'))
+        return max(1, (height - inset) // row_height)
+
+    def _row_text(self, row):
+        # Row 0 is the newest item
+        position = len(self._items) - 1 - row
+        text = self._formatted.get(position)
+        if text is None:
+            text = self._formatted[position] = self.format_row(self._items[position])
+        return text
+
+    def _render(self):
+        total = len(self._items)
+        rows = self.visible_rows()
+        self._first = max(0, min(self._first, total - rows))
+        last = min(total, self._first + rows)
+        self.listbox.delete(0, tk.END)
+        if total == 0:
+            self.listbox.insert(tk.END, self.empty_text)
+            self.scrollbar.set(0, 1)
+            return
+        self.listbox.insert(tk.END, *(self._row_text(row) for row in range(self._first, last)))
+        self.scrollbar.set(self._first / total, last / total)
+
+    def _on_scrollbar(self, action, *args):
+        if action == 'moveto':
+            self._first = int(float(args[0]) * len(self._items))
+            self._render()
+        elif action == 'scroll':
+            amount = int(args[0])
+            self.scroll(amount * self.visible_rows() if args[1] == 'pages' else amount)
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return 'break'
@@ -1,161 +1,215 @@
-import re
+import os
+import threading
+import time
 import tkinter as tk
+from collections import OrderedDict
 from tkinter import font
 
+from simulator_files.formula_renderer import FormulaRenderer, mathtext_available
+from simulator_files.latex_unicode import (LATEX_CACHE_SIZE, SUBSCRIPT_MAP, SUPERSCRIPT_MAP, UNICODE_MAP,
+                                           _MATH_EXPRESSION, convert_latex_to_unicode, text_segments)
+
+# Set to 1 to collect conversion timing and input-size statistics
+LATEX_STATS_ENV = 'FE_SIMULATOR_LATEX_STATS'
+
+# Set to 1 to show formulas as images rendered by matplotlib (when it is installed)
+RASTER_MATH_ENV = 'FE_SIMULATOR_RASTER_MATH'
+
+# Timing histogram buckets are powers of two in microseconds: <1, <2, <4, ... µs
+TIMING_BUCKETS = 24
+
+
+class ConversionStats:
+    """Per-call timing histogram, input-size stats and cache hit counts for LaTeX conversion."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.total_ns = 0
+            self.max_ns = 0
+            self.timing_histogram = [0] * TIMING_BUCKETS
+            self.total_chars = 0
+            self.min_chars = None
+            self.max_chars = 0
+            self.cache_hits = 0
+            self.cache_misses = 0
+
+    def record(self, elapsed_ns, input_chars):
+        bucket = min((elapsed_ns // 1000).bit_length(), TIMING_BUCKETS - 1)
+        with self._lock:
+            self.calls += 1
+            self.total_ns += elapsed_ns
+            self.max_ns = max(self.max_ns, elapsed_ns)
+            self.timing_histogram[bucket] += 1
+            self.total_chars += input_chars
+            self.min_chars = input_chars if self.min_chars is None else min(self.min_chars, input_chars)
+            self.max_chars = max(self.max_chars, input_chars)
+
+    def record_cache(self, hit):
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def percentile_us(self, fraction):
+        """Upper bound of the histogram bucket holding the given fraction of calls"""
+        with self._lock:
+            target = fraction * self.calls
+            seen = 0
+            for bucket, count in enumerate(self.timing_histogram):
+                seen += count
+                if count and seen >= target:
+                    return 1 << bucket
+        return None
+
+    def summary(self):
+        """Return the collected statistics as a dict"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'calls': self.calls,
+            'mean_us': self.total_ns / self.calls / 1000 if self.calls else None,
+            'p50_us': self.percentile_us(0.5),
+            'p95_us': self.percentile_us(0.95),
+            'max_us': self.max_ns / 1000,
+            'timing_histogram_us': {1 << bucket: count for bucket, count in enumerate(self.timing_histogram) if count},
+            'mean_chars': self.total_chars / self.calls if self.calls else None,
+            'min_chars': self.min_chars,
+            'max_chars': self.max_chars,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_hit_ratio': self.cache_hits / lookups if lookups else None,
+        }
+
+
+class ConversionCache:
+    """Thread-safe bounded LRU of LaTeX source -> converted text."""
+
+    def __init__(self, max_entries=LATEX_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, latex_code):
+        with self._lock:
+            result = self._entries.get(latex_code)
+            if result is not None:
+                self._entries.move_to_end(latex_code)
+            return result
+
+    def put(self, latex_code, result):
+        with self._lock:
+            self._entries[latex_code] = result
+            self._entries.move_to_end(latex_code)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_conversion_cache = ConversionCache()
+
+
 class LaTeXRenderer:
     def __init__(self):
+        # Conversion statistics, None (and free) unless enabled
+        self.stats = ConversionStats() if os.environ.get(LATEX_STATS_ENV) == '1' else None
+        self.cache = _conversion_cache
+        # Formula images through matplotlib mathtext, if enabled and available; created on first use
+        self.raster_math = os.environ.get(RASTER_MATH_ENV) == '1' and mathtext_available()
+        self._formula_renderer = None
+        self._formula_renderer_lock = threading.Lock()  # Created by the prefetcher or the Tk thread
+
         # Configure fonts for better mathematical display
         self.math_font = font.Font(family="Times New Roman", size=12, weight="normal")
         self.text_font = font.Font(family="Arial", size=11, weight="normal")
 
-        # Expanded Unicode mapping for LaTeX commands
-        self.unicode_map = {
-            # Greek letters (regular and variants)
-            **{f'\\{name}': char for name, char in [
-                ('alpha', 'α'), ('beta', 'β'), ('gamma', 'γ'), ('delta', 'δ'),
-                ('epsilon', 'ε'), ('zeta', 'ζ'), ('eta', 'η'), ('theta', 'θ'),
-                ('iota', 'ι'), ('kappa', 'κ'), ('lambda', 'λ'), ('mu', 'μ'),
-                ('nu', 'ν'), ('xi', 'ξ'), ('omicron', 'ο'), ('pi', 'π'),
-                ('rho', 'ρ'), ('sigma', 'σ'), ('tau', 'τ'), ('upsilon', 'υ'),
-                ('phi', 'φ'), ('chi', 'χ'), ('psi', 'ψ'), ('omega', 'ω'),
-                ('varepsilon', 'ϵ'), ('vartheta', 'ϑ'), ('varpi', 'ϖ'),
-                ('varrho', 'ϱ'), ('varsigma', 'ς'), ('varphi', 'ϕ'),
-                ('Gamma', 'Γ'), ('Delta', 'Δ'), ('Theta', 'Θ'), ('Lambda', 'Λ'),
-                ('Xi', 'Ξ'), ('Pi', 'Π'), ('Sigma', 'Σ'), ('Upsilon', 'Υ'),
-                ('Phi', 'Φ'), ('Psi', 'Ψ'), ('Omega', 'Ω'),
-            ]},
-            # Blackboard bold
-            '\\mathbb{R}': 'ℝ', '\\mathbb{Z}': 'ℤ', '\\mathbb{N}': 'ℕ', '\\mathbb{Q}': 'ℚ',
-            '\\mathbb{C}': 'ℂ', '\\mathbb{P}': 'ℙ',
-            # Calligraphic (fallback to regular letters)
-            **{f'\\mathcal{{{c}}}': c for c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'},
-            # Common math operators
-            '\\infty': '∞', '\\partial': '∂', '\\nabla': '∇', '\\forall': '∀',
-            '\\exists': '∃', '\\nexists': '∄', '\\in': '∈', '\\notin': '∉',
-            '\\subset': '⊂', '\\supset': '⊃', '\\subseteq': '⊆', '\\supseteq': '⊇',
-            '\\cup': '∪', '\\cap': '∩', '\\emptyset': '∅', '\\varnothing': '∅',
-            '\\leq': '≤', '\\geq': '≥', '\\neq': '≠', '\\approx': '≈',
-            '\\equiv': '≡', '\\propto': '∝', '\\pm': '±', '\\mp': '∓',
-            '\\times': '×', '\\div': '÷', '\\cdot': '·', '\\circ': '∘',
-            '\\bullet': '•', '\\oplus': '⊕', '\\otimes': '⊗', '\\wedge': '∧',
-            '\\vee': '∨', '\\neg': '¬', '\\implies': '⟹', '\\iff': '⟺',
-            '\\rightarrow': '→', '\\leftarrow': '←', '\\leftrightarrow': '↔',
-            '\\Rightarrow': '⇒', '\\Leftarrow': '⇐', '\\Leftrightarrow': '⇔',
-            '\\mapsto': '↦', '\\to': '→', '\\gets': '←',
-            '\\uparrow': '↑', '\\downarrow': '↓', '\\updownarrow': '↕',
-            '\\Uparrow': '⇑', '\\Downarrow': '⇓', '\\Updownarrow': '⇕',
-            '\\sum': '∑', '\\prod': '∏', '\\int': '∫', '\\iint': '∬', '\\iiint': '∭',
-            '\\oint': '∮', '\\sqrt': '√', '\\angle': '∠', '\\measuredangle': '∡',
-            '\\sphericalangle': '∢', '\\parallel': '∥', '\\perp': '⊥', '\\cong': '≅',
-            '\\sim': '∼', '\\simeq': '≃', '\\asymp': '≍', '\\doteq': '≐',
-            '\\triangleq': '≜', '\\triangle': '△', '\\square': '□', '\\diamond': '◇',
-            '\\star': '★', '\\dagger': '†', '\\ddagger': '‡', '\\S': '§', '\\P': '¶',
-            '\\copyright': '©', '\\registered': '®', '\\trademark': '™',
-            # Logic
-            '\\land': '∧', '\\lor': '∨', '\\top': '⊤', '\\bot': '⊥',
-            '\\models': '⊨', '\\vdash': '⊢', '\\vDash': '⊨', '\\Vdash': '⊩',
-            '\\nvdash': '⊬', '\\nVdash': '⊮',
-            # Set theory
-            '\\setminus': '∖', '\\cup': '∪', '\\cap': '∩', '\\complement': '∁',
-            # Relations
-            '\\le': '≤', '\\ge': '≥', '\\ll': '≪', '\\gg': '≫',
-            '\\subsetneq': '⊊', '\\supsetneq': '⊋',
-            # Accents (approximate)
-            '\\bar': '̄', '\\vec': '⃗', '\\hat': '̂', '\\tilde': '̃',
-            '\\dot': '̇', '\\ddot': '̈', '\\breve': '̆', '\\check': '̌',
-            '\\acute': '́', '\\grave': '̀', '\\underline': '_', '\\overline': '‾',
-            # Common functions
-            '\\sin': 'sin', '\\cos': 'cos', '\\tan': 'tan', '\\cot': 'cot',
-            '\\sec': 'sec', '\\csc': 'csc', '\\arcsin': 'arcsin', '\\arccos': 'arccos',
-            '\\arctan': 'arctan', '\\sinh': 'sinh', '\\cosh': 'cosh', '\\tanh': 'tanh',
-            '\\log': 'log', '\\ln': 'ln', '\\exp': 'exp',
-            # Misc
-            '\\ldots': '…', '\\cdots': '⋯', '\\vdots': '⋮', '\\ddots': '⋱',
-            '\\prime': '′', '\\degree': '°', '\\aleph': 'ℵ',
-            # Fractions (special cases)
-            '\\frac12': '½', '\\frac14': '¼', '\\frac34': '¾',
-        }
+        self.unicode_map = UNICODE_MAP
+        self.superscript_map = SUPERSCRIPT_MAP
+        self.subscript_map = SUBSCRIPT_MAP
+
+    @property
+    def formula_renderer(self):
+        """The formula rasterizer, or None without matplotlib or with raster math turned off"""
+        if self._formula_renderer is None and self.raster_math:
+            with self._formula_renderer_lock:
+                if self._formula_renderer is None:
+                    self._formula_renderer = FormulaRenderer()
+        return self._formula_renderer
+
+    def render_formulas(self, text):
+        """Rasterize the formulas in text into the PNG cache, so they can be shown as images later.
+
+        Runs matplotlib, so call it from a worker thread. Does nothing when raster math is off.
+        """
+        formula_renderer = self.formula_renderer
+        if formula_renderer is None:
+            return
+        for expr in self.find_latex_expressions(text):
+            formula_renderer.render_png(expr['latex'])
 
-        # Superscript and subscript Unicode maps
-        self.superscript_map = str.maketrans('0123456789+-=()nijk', '⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻⁼⁽⁾ⁿⁱʲᵏ')
-        self.subscript_map = str.maketrans('0123456789+-=()aeoxhklmnpst', '₀₁₂₃₄₅₆₇₈₉₊₋₌₍₎ₐₑₒₓₕₖₗₘₙₚₛₜ')
-    
     def find_latex_expressions(self, text):
-        """Find all LaTeX expressions in the text using regex patterns."""
-        # Pattern to match LaTeX expressions: \( ... \) or \[ ... \]
-        patterns = [
-            r'\\\(([^\\]+?)\\\)',  # Inline math \( ... \)
-            r'\\\[([^\\]+?)\\\]',  # Display math \[ ... \]
-        ]
-        
+        """Find all LaTeX expressions in the text, in order of appearance."""
         expressions = []
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.DOTALL)
-            for match in matches:
-                expressions.append({
-                    'start': match.start(),
-                    'end': match.end(),
-                    'latex': match.group(1),
-                    'type': 'inline' if '\\(' in match.group(0) else 'display'
-                })
+        for match in _MATH_EXPRESSION.finditer(text):
+            expressions.append({
+                'start': match.start(),
+                'end': match.end(),
+                'latex': match.group(match.lastgroup),
+                'type': match.lastgroup
+            })
         
         return expressions
     
+    def enable_instrumentation(self):
+        """Start collecting conversion statistics and return the stats object"""
+        if self.stats is None:
+            self.stats = ConversionStats()
+        return self.stats
+
+    def disable_instrumentation(self):
+        self.stats = None
+
     def convert_latex_to_unicode(self, latex_code):
         """Convert LaTeX code to Unicode symbols for display."""
-        result = latex_code
-        
-        # ALWAYS show debug output
-        print(f"DEBUG - Input: {repr(latex_code)}")
-        
-        # TEMPORARY DEBUG - let's see what we're actually getting
-        if '\\(' in result or '\\)' in result:
-            print(f"FOUND LATEX DELIMITERS in: {repr(result)}")
-        
-        # FIXED: strip LaTeX delimiters with single backslashes
-        print(f"BEFORE replacement: {repr(result)}")
-        result = result.replace('\\(', '').replace('\\)', '')
-        result = result.replace('\\[', '').replace('\\]', '')
-        print(f"AFTER replacement: {repr(result)}")
-        
-        # Handle fractions: \frac{a}{b} -> a/b
-        result = re.sub(r'\\frac\{([^}]+)\}\{([^}]+)\}', r'\1/\2', result)
-        
-        # Special case for \frac12, \frac14, \frac34
-        for frac in ['12', '14', '34']:
-            result = result.replace(f'\\frac{frac}', self.unicode_map.get(f'\\frac{frac}', f'1/{frac[1]}'))
-        
-        # Handle square roots: \sqrt{a} -> √a
-        result = re.sub(r'\\sqrt\{([^}]+)\}', r'√\1', result)
-        
-        # Handle text commands: \text{abc} -> abc
-        result = re.sub(r'\\text\{([^}]+)\}', r'\1', result)
-        
-        # Handle superscripts: x^2 -> x²
-        result = re.sub(r'\^\{([^}]+)\}', lambda m: m.group(1).translate(self.superscript_map), result)
-        result = re.sub(r'\^(\w)', lambda m: m.group(1).translate(self.superscript_map), result)
-        
-        # Handle subscripts: x_1 -> x₁
-        result = re.sub(r'_\{([^}]+)\}', lambda m: m.group(1).translate(self.subscript_map), result)
-        result = re.sub(r'_(\w)', lambda m: m.group(1).translate(self.subscript_map), result)
-        
-        # Replace LaTeX commands with Unicode symbols
-        for latex_cmd, unicode_char in self.unicode_map.items():
-            result = result.replace(latex_cmd, unicode_char)
-        
-        # Remove remaining curly braces
-        result = result.replace('{', '').replace('}', '')
-        
-        # Fallback: remove unknown backslash commands
-        result = re.sub(r'\\([a-zA-Z]+)', lambda m: m.group(1), result)
-        
-        # Clean up any remaining backslashes
-        result = result.replace('\\', '')
-        
+        stats = self.stats
+        start = time.perf_counter_ns() if stats is not None else 0
+        result = self.cache.get(latex_code)
+        hit = result is not None
+        if not hit:
+            result = self._convert_latex_to_unicode(latex_code)
+            self.cache.put(latex_code, result)
+        if stats is not None:
+            stats.record(time.perf_counter_ns() - start, len(latex_code))
+            stats.record_cache(hit)
         return result
+
+    def _convert_latex_to_unicode(self, latex_code):
+        return convert_latex_to_unicode(latex_code)
+
+    def text_segments(self, text):
+        """Split text into (display text, tags, formula) runs for insert_segments() (safe on worker threads)"""
+        return text_segments(text, self.convert_latex_to_unicode)
     
     def create_math_label(self, parent, latex_code, is_display=False):
         """Create a Tkinter label with mathematical text."""
+        if self.formula_renderer is not None:
+            photo = self.formula_renderer.get_photo(latex_code)
+            if photo is not None:
+                label = tk.Label(parent, image=photo, bg=parent.cget('bg'), anchor='w')
+                # Keep a reference to prevent garbage collection
+                label.image = photo
+                return label
+
         try:
             # Convert LaTeX to Unicode
             display_text = self.convert_latex_to_unicode(latex_code)
@@ -183,55 +237,68 @@ class LaTeXRenderer:
                            anchor='w')
             return label
     
-    def process_text_with_latex(self, text_widget, text):
-        """Process text and replace LaTeX expressions with formatted labels."""
-        # Find all LaTeX expressions
-        expressions = self.find_latex_expressions(text)
+    def process_text_with_latex(self, text_widget, text, embed_windows=True):
+        """Insert text with its LaTeX expressions rendered, in order and in one pass.
+
+        By default each expression is an embedded math label. With
+        embed_windows=False the text is split by text_segments() and inserted
+        with insert_segments(). Use clear_text() to empty the widget again.
+        """
+        if not embed_windows:
+            self.insert_segments(text_widget, self.text_segments(text))
+            return
         
+        expressions = self.find_latex_expressions(text)
         if not expressions:
             # No LaTeX found, just insert the text normally
             text_widget.insert(tk.END, text)
             return
         
-        # Sort expressions by start position (reverse order to avoid index shifting)
-        expressions.sort(key=lambda x: x['start'], reverse=True)
-        
-        # Start with the original text
-        processed_text = text
-        
-        # Replace each LaTeX expression with a placeholder
-        placeholders = []
+        if not hasattr(text_widget, 'math_labels'):
+            text_widget.math_labels = []
+        position = 0
         for expr in expressions:
-            placeholder = f"__LATEX_{len(placeholders)}__"
-            processed_text = processed_text[:expr['start']] + placeholder + processed_text[expr['end']:]
-            placeholders.append({
-                'placeholder': placeholder,
-                'latex': expr['latex'],
-                'type': expr['type']
-            })
-        
-        # Insert the processed text
-        text_widget.insert(tk.END, processed_text)
-        
-        # Replace placeholders with math labels
-        for i, placeholder_info in enumerate(placeholders):
-            # Find the placeholder in the text widget
-            start_pos = text_widget.search(placeholder_info['placeholder'], "1.0", tk.END)
-            if start_pos:
-                end_pos = f"{start_pos}+{len(placeholder_info['placeholder'])}c"
-                
-                # Create math label
-                math_label = self.create_math_label(
-                    text_widget, 
-                    placeholder_info['latex'],
-                    is_display=(placeholder_info['type'] == 'display')
-                )
-                
-                # Replace placeholder with math label
-                text_widget.delete(start_pos, end_pos)
-                text_widget.window_create(start_pos, window=math_label)
-                
+            if expr['start'] > position:
+                text_widget.insert(tk.END, text[position:expr['start']])
+            math_label = self.create_math_label(text_widget, expr['latex'],
+                                                is_display=(expr['type'] == 'display'))
+            text_widget.window_create(tk.END, window=math_label)
+            # Keep a reference to prevent garbage collection
+            text_widget.math_labels.append(math_label)
+            position = expr['end']
+        if position < len(text):
+            text_widget.insert(tk.END, text[position:])
+
+    def insert_segments(self, text_widget, segments):
+        """Insert (display text, tags, formula) runs from text_segments() at the end of a text widget.
+
+        Formulas whose image has already been rendered are shown as images; all
+        other runs go to Tk together in a single multi-segment insert call.
+        """
+        text_widget.tag_configure('latex_math', font=self.math_font)
+        if not hasattr(text_widget, 'math_images'):
+            text_widget.math_images = []
+        formula_renderer = self.formula_renderer
+        # Alternating chars/tags arguments for one multi-segment insert call
+        pending = []
+        for display_text, tags, latex_code in segments:
+            photo = formula_renderer.get_photo(latex_code) if latex_code and formula_renderer is not None else None
+            if photo is None:
+                pending += [display_text, tuple(tags)]
+            else:
+                if pending:
+                    text_widget.insert(tk.END, *pending)
+                    pending = []
+                text_widget.image_create(tk.END, image=photo)
                 # Keep a reference to prevent garbage collection
-                if not hasattr(text_widget, 'math_labels'):
-                    text_widget.math_labels = []
-                text_widget.math_labels.append(math_label) 
\ No newline at end of file
+                text_widget.math_images.append(photo)
+        if pending:
+            text_widget.insert(tk.END, *pending)
+
+    def clear_text(self, text_widget):
+        """Empty a text widget filled by process_text_with_latex, releasing its math labels and images"""
+        text_widget.delete(1.0, tk.END)
+        for label in getattr(text_widget, 'math_labels', []):
+            label.destroy()
+        text_widget.math_labels = []
+        text_widget.math_images = []
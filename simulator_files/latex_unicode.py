@@ -0,0 +1,359 @@
+"""LaTeX to Unicode translation.
+
+Only the standard library is used, so the problem bank compiler and loader can
+convert text without importing Tk or matplotlib.
+"""
+import re
+from functools import lru_cache
+
+# Converted strings kept in memory, shared by every renderer so later exams reuse them
+LATEX_CACHE_SIZE = 4096
+
+# Bump whenever conversion output changes, so text prerendered into a bank by an
+# older version is ignored rather than shown
+RENDER_VERSION = 4
+
+
+# Expanded Unicode mapping for LaTeX commands
+UNICODE_MAP = {
+    # Greek letters (regular and variants)
+    **{f'\\{name}': char for name, char in [
+        ('alpha', 'α'), ('beta', 'β'), ('gamma', 'γ'), ('delta', 'δ'),
+        ('epsilon', 'ε'), ('zeta', 'ζ'), ('eta', 'η'), ('theta', 'θ'),
+        ('iota', 'ι'), ('kappa', 'κ'), ('lambda', 'λ'), ('mu', 'μ'),
+        ('nu', 'ν'), ('xi', 'ξ'), ('omicron', 'ο'), ('pi', 'π'),
+        ('rho', 'ρ'), ('sigma', 'σ'), ('tau', 'τ'), ('upsilon', 'υ'),
+        ('phi', 'φ'), ('chi', 'χ'), ('psi', 'ψ'), ('omega', 'ω'),
+        ('varepsilon', 'ϵ'), ('vartheta', 'ϑ'), ('varpi', 'ϖ'),
+        ('varrho', 'ϱ'), ('varsigma', 'ς'), ('varphi', 'ϕ'),
+        ('Gamma', 'Γ'), ('Delta', 'Δ'), ('Theta', 'Θ'), ('Lambda', 'Λ'),
+        ('Xi', 'Ξ'), ('Pi', 'Π'), ('Sigma', 'Σ'), ('Upsilon', 'Υ'),
+        ('Phi', 'Φ'), ('Psi', 'Ψ'), ('Omega', 'Ω'),
+    ]},
+    # Blackboard bold
+    '\\mathbb{R}': 'ℝ', '\\mathbb{Z}': 'ℤ', '\\mathbb{N}': 'ℕ', '\\mathbb{Q}': 'ℚ',
+    '\\mathbb{C}': 'ℂ', '\\mathbb{P}': 'ℙ',
+    # Calligraphic (fallback to regular letters)
+    **{f'\\mathcal{{{c}}}': c for c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'},
+    # Common math operators
+    '\\infty': '∞', '\\partial': '∂', '\\nabla': '∇', '\\forall': '∀',
+    '\\exists': '∃', '\\nexists': '∄', '\\in': '∈', '\\notin': '∉',
+    '\\subset': '⊂', '\\supset': '⊃', '\\subseteq': '⊆', '\\supseteq': '⊇',
+    '\\cup': '∪', '\\cap': '∩', '\\emptyset': '∅', '\\varnothing': '∅',
+    '\\leq': '≤', '\\geq': '≥', '\\neq': '≠', '\\approx': '≈',
+    '\\equiv': '≡', '\\propto': '∝', '\\pm': '±', '\\mp': '∓',
+    '\\times': '×', '\\div': '÷', '\\cdot': '·', '\\circ': '∘',
+    '\\bullet': '•', '\\oplus': '⊕', '\\otimes': '⊗', '\\wedge': '∧',
+    '\\vee': '∨', '\\neg': '¬', '\\implies': '⟹', '\\iff': '⟺',
+    '\\rightarrow': '→', '\\leftarrow': '←', '\\leftrightarrow': '↔',
+    '\\Rightarrow': '⇒', '\\Leftarrow': '⇐', '\\Leftrightarrow': '⇔',
+    '\\mapsto': '↦', '\\to': '→', '\\gets': '←',
+    '\\uparrow': '↑', '\\downarrow': '↓', '\\updownarrow': '↕',
+    '\\Uparrow': '⇑', '\\Downarrow': '⇓', '\\Updownarrow': '⇕',
+    '\\sum': '∑', '\\prod': '∏', '\\int': '∫', '\\iint': '∬', '\\iiint': '∭',
+    '\\oint': '∮', '\\sqrt': '√', '\\angle': '∠', '\\measuredangle': '∡',
+    '\\sphericalangle': '∢', '\\parallel': '∥', '\\perp': '⊥', '\\cong': '≅',
+    '\\sim': '∼', '\\simeq': '≃', '\\asymp': '≍', '\\doteq': '≐',
+    '\\triangleq': '≜', '\\triangle': '△', '\\square': '□', '\\diamond': '◇',
+    '\\star': '★', '\\dagger': '†', '\\ddagger': '‡', '\\S': '§', '\\P': '¶',
+    '\\copyright': '©', '\\registered': '®', '\\trademark': '™',
+    # Logic
+    '\\land': '∧', '\\lor': '∨', '\\top': '⊤', '\\bot': '⊥',
+    '\\models': '⊨', '\\vdash': '⊢', '\\vDash': '⊨', '\\Vdash': '⊩',
+    '\\nvdash': '⊬', '\\nVdash': '⊮',
+    # Set theory
+    '\\setminus': '∖', '\\cup': '∪', '\\cap': '∩', '\\complement': '∁',
+    # Relations
+    '\\le': '≤', '\\ge': '≥', '\\ll': '≪', '\\gg': '≫',
+    '\\subsetneq': '⊊', '\\supsetneq': '⊋',
+    # Accents (approximate)
+    '\\bar': '̄', '\\vec': '⃗', '\\hat': '̂', '\\tilde': '̃',
+    '\\dot': '̇', '\\ddot': '̈', '\\breve': '̆', '\\check': '̌',
+    '\\acute': '́', '\\grave': '̀', '\\underline': '_', '\\overline': '‾',
+    # Common functions
+    '\\sin': 'sin', '\\cos': 'cos', '\\tan': 'tan', '\\cot': 'cot',
+    '\\sec': 'sec', '\\csc': 'csc', '\\arcsin': 'arcsin', '\\arccos': 'arccos',
+    '\\arctan': 'arctan', '\\sinh': 'sinh', '\\cosh': 'cosh', '\\tanh': 'tanh',
+    '\\log': 'log', '\\ln': 'ln', '\\exp': 'exp',
+    # Misc
+    '\\ldots': '…', '\\cdots': '⋯', '\\vdots': '⋮', '\\ddots': '⋱',
+    '\\prime': '′', '\\degree': '°', '\\aleph': 'ℵ',
+    # Fractions (special cases)
+    '\\frac12': '½', '\\frac14': '¼', '\\frac34': '¾',
+}
+
+# Superscript and subscript Unicode maps
+SUPERSCRIPT_MAP = str.maketrans('0123456789+-=()nijk', '⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻⁼⁽⁾ⁿⁱʲᵏ')
+SUBSCRIPT_MAP = str.maketrans('0123456789+-=()aeoxhklmnpst', '₀₁₂₃₄₅₆₇₈₉₊₋₌₍₎ₐₑₒₓₕₖₗₘₙₚₛₜ')
+
+# Commands that map straight to a symbol, keyed by name without the backslash
+_SYMBOLS = {key[1:]: value for key, value in UNICODE_MAP.items() if key[1:].isalpha()}
+
+# Commands whose argument is shown as is
+_TRANSPARENT_COMMANDS = {'text', 'mathrm', 'mathbf', 'mathit', 'operatorname', 'textrm', 'textbf'}
+# Commands whose argument is looked up as a letter of another alphabet
+_STYLE_COMMANDS = {'mathbb', 'mathcal'}
+# Accents take an argument and render as a combining mark after it
+_ACCENT_COMMANDS = {'bar', 'vec', 'hat', 'tilde', 'dot', 'ddot', 'breve', 'check', 'acute', 'grave'}
+_MATH_DELIMITERS = {'\\(', '\\)', '\\[', '\\]'}
+# Spacing commands: thin, medium and thick spaces show as a space, the negative space as nothing
+_SPACING_COMMANDS = {',': ' ', ':': ' ', '>': ' ', ';': ' ', '!': ''}
+# Commands that only size the delimiter after them; the delimiter is shown as is
+_DELIMITER_SIZES = {'left', 'right', 'middle', 'big', 'Big', 'bigl', 'bigr', 'Bigl', 'Bigr'}
+
+# Inline \( ... \) or display \[ ... \] math; the body may hold commands and nested braces
+_MATH_EXPRESSION = re.compile(r'\\\((?P<inline>.*?)\\\)|\\\[(?P<display>.*?)\\\]', re.DOTALL)
+
+# Tokens: commands, escaped characters, a lone trailing backslash, structural
+# characters and runs of plain text
+_TOKEN = re.compile(r'\\[a-zA-Z]+|\\.|\\$|[{}^_]|[^\\{}^_]+', re.DOTALL)
+
+# Characters that make a fraction part ambiguous without parentheses
+_FRACTION_OPERATORS = set(' +-−±∓=·×÷/')
+
+
+class Text:
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Group:
+    __slots__ = ('children',)
+
+    def __init__(self, children):
+        self.children = children
+
+
+class Symbol:
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Script:
+    __slots__ = ('marker', 'body')
+
+    def __init__(self, marker, body):
+        self.marker = marker
+        self.body = body
+
+
+class Frac:
+    __slots__ = ('numerator', 'denominator')
+
+    def __init__(self, numerator, denominator):
+        self.numerator = numerator
+        self.denominator = denominator
+
+
+class Sqrt:
+    __slots__ = ('index', 'body')
+
+    def __init__(self, index, body):
+        self.index = index
+        self.body = body
+
+
+class Styled:
+    __slots__ = ('style', 'body')
+
+    def __init__(self, style, body):
+        self.style = style
+        self.body = body
+
+
+class Accent:
+    __slots__ = ('name', 'body')
+
+    def __init__(self, name, body):
+        self.name = name
+        self.body = body
+
+
+class LaTeXParser:
+    """Recursive-descent parser from LaTeX source to a small AST.
+
+    Every token is consumed once, so parsing is linear in the input length,
+    and braces nest to any depth.
+    """
+
+    def __init__(self, latex_code):
+        self.tokens = _TOKEN.findall(latex_code)
+        self.position = 0
+
+    def parse(self):
+        return self._sequence(inside_group=False)
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _next(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _sequence(self, inside_group):
+        children = []
+        while self.position < len(self.tokens):
+            token = self._peek()
+            if token == '}':
+                self.position += 1
+                if inside_group:
+                    return Group(children)
+                continue  # Unmatched closing brace
+            children.append(self._atom())
+        return Group(children)
+
+    def _atom(self):
+        token = self._next()
+        if token == '{':
+            return self._sequence(inside_group=True)
+        if token in ('^', '_'):
+            if not self._starts_argument():
+                return Text(token)
+            return Script(token, self._argument())
+        if token[0] != '\\':
+            return Text(token)
+        if token in _MATH_DELIMITERS or len(token) == 1:
+            return Text('')
+        if not token[1].isalpha():
+            # Spacing command such as '\,' or escaped character such as '\ ' or '\%'
+            return Text(_SPACING_COMMANDS.get(token[1], token[1]))
+        return self._command(token[1:])
+
+    def _command(self, name):
+        if name in _DELIMITER_SIZES:
+            # '\right.' closes with an invisible delimiter
+            token = self._peek()
+            if token is not None and token.startswith('.'):
+                self.tokens[self.position] = token[1:]
+                if not self.tokens[self.position]:
+                    self.position += 1
+            return Text('')
+        if name == 'frac':
+            return Frac(self._argument(), self._argument())
+        if name == 'sqrt':
+            index = None
+            if self._peek() is not None and self._peek().startswith('['):
+                index = self._bracket_option()
+            return Sqrt(index, self._argument())
+        if name in _TRANSPARENT_COMMANDS:
+            return self._argument()
+        if name in _STYLE_COMMANDS:
+            return Styled(name, self._argument())
+        if name in _ACCENT_COMMANDS and self._peek() is not None:
+            return Accent(name, self._argument())
+        return Symbol(name)
+
+    def _starts_argument(self):
+        """True if a ^ or _ is followed by something it can apply to"""
+        token = self._peek()
+        if token is None:
+            return False
+        if token in ('{',) or (token[0] == '\\' and token[1:2].isalpha()):
+            return True
+        return token[0].isalnum() or token[0] == '_'
+
+    def _argument(self):
+        """Parse one macro argument: a braced group, a command or a single character"""
+        token = self._peek()
+        if token is None:
+            return Group([])
+        if token == '{' or token[0] == '\\' or token in ('^', '_', '}'):
+            if token == '}':
+                return Group([])
+            return self._atom()
+        stripped = token.lstrip()
+        if not stripped:
+            self.position += 1
+            return self._argument()
+        # Take a single character and leave the rest of the text for the caller
+        self.tokens[self.position] = stripped[1:]
+        if not self.tokens[self.position]:
+            self.position += 1
+        return Text(stripped[0])
+
+    def _bracket_option(self):
+        """Parse the text of a [..] option at the start of the current text token"""
+        token = self._peek()
+        end = token.find(']')
+        if end < 0:
+            return None
+        option = token[1:end]
+        self.tokens[self.position] = token[end + 1:]
+        if not self.tokens[self.position]:
+            self.position += 1
+        return Text(option)
+
+
+@lru_cache(maxsize=LATEX_CACHE_SIZE)
+def parse_latex(latex_code):
+    """Parse LaTeX source into an AST; results are cached per distinct expression"""
+    return LaTeXParser(latex_code).parse()
+
+
+def _fraction_part(node):
+    text = render_unicode(node)
+    if len(text) > 1 and any(c in _FRACTION_OPERATORS for c in text.strip()):
+        return f"({text.strip()})"
+    return text
+
+
+def render_unicode(node):
+    """Render an AST node to display Unicode"""
+    if isinstance(node, Text):
+        return node.value
+    if isinstance(node, Group):
+        return ''.join(render_unicode(child) for child in node.children)
+    if isinstance(node, Symbol):
+        # Unknown commands fall back to their bare name
+        return _SYMBOLS.get(node.name, node.name)
+    if isinstance(node, Script):
+        return render_unicode(node.body).translate(SUPERSCRIPT_MAP if node.marker == '^' else SUBSCRIPT_MAP)
+    if isinstance(node, Frac):
+        numerator, denominator = render_unicode(node.numerator), render_unicode(node.denominator)
+        vulgar = UNICODE_MAP.get(f'\\frac{numerator}{denominator}')
+        if vulgar is not None:
+            return vulgar
+        return f"{_fraction_part(node.numerator)}/{_fraction_part(node.denominator)}"
+    if isinstance(node, Sqrt):
+        index = render_unicode(node.index).translate(SUPERSCRIPT_MAP) if node.index is not None else ''
+        return index + '√' + _fraction_part(node.body)
+    if isinstance(node, Styled):
+        body = render_unicode(node.body)
+        return UNICODE_MAP.get(f'\\{node.style}{{{body}}}', body)
+    if isinstance(node, Accent):
+        return render_unicode(node.body) + UNICODE_MAP[f'\\{node.name}']
+    raise TypeError(f"Unknown LaTeX node {node!r}")
+
+
+def convert_latex_to_unicode(latex_code):
+    """Translate LaTeX to display Unicode by parsing and rendering it (no Tk needed)."""
+    if '\\' not in latex_code and '^' not in latex_code and '_' not in latex_code \
+            and '{' not in latex_code and '}' not in latex_code:
+        return latex_code
+    return render_unicode(parse_latex(latex_code))
+
+
+def text_segments(text, convert=convert_latex_to_unicode):
+    """Split text into (display text, tags, formula) runs for one batched Tk Text insert.
+
+    Text between math expressions is converted too (for markup such as 10^-3
+    outside the delimiters) and has no tags and formula None. Each expression is
+    converted to Unicode, tagged ('latex_math', 'latex_inline' or 'latex_display')
+    and keeps its LaTeX source, so a rasterized image can be shown instead.
+    """
+    segments = []
+    position = 0
+    for match in _MATH_EXPRESSION.finditer(text):
+        if match.start() > position:
+            segments.append((convert(text[position:match.start()]), (), None))
+        latex_code = match.group(match.lastgroup)
+        segments.append((convert(latex_code), ('latex_math', f"latex_{match.lastgroup}"), latex_code))
+        position = match.end()
+    if position < len(text) or not segments:
+        segments.append((convert(text[position:]), (), None))
+    return segments
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import threading
+
+from PIL import Image, ImageTk
+
+from simulator_files.app_paths import get_cache_dir
+from simulator_files.page_cache import PageCache
+
+# In-memory budget for ready-to-display question images
+DEFAULT_MAX_PHOTO_BYTES = 64 * 1024 * 1024
+
+
+class MediaCache:
+    """Resized question images, cached as PhotoImages in memory and as thumbnails on disk."""
+
+    def __init__(self, media_dir, max_photo_bytes=DEFAULT_MAX_PHOTO_BYTES, disk_cache_dir=None):
+        self.media_dir = media_dir
+        self.disk_cache_dir = disk_cache_dir or get_cache_dir('media')
+        self.photos = PageCache(max_photo_bytes)
+        self._resolved_paths = {}
+        self._lock = threading.Lock()
+
+    def resolve_path(self, media_name):
+        """Find the file for a media name, trying extension case and underscore/space variants once"""
+        with self._lock:
+            if media_name in self._resolved_paths:
+                return self._resolved_paths[media_name]
+
+        media_path = os.path.join(self.media_dir, media_name)
+        candidates = [media_path]
+        # Handle case-insensitive file extension
+        base, ext = os.path.splitext(media_path)
+        candidates += [base + ext.lower(), base + ext.upper()]
+        # Handle spaces in filename
+        candidates.append(media_path.replace("_", " "))
+
+        resolved = next((path for path in candidates if os.path.exists(path)), None)
+        with self._lock:
+            self._resolved_paths[media_name] = resolved
+        return resolved
+
+    def _key(self, media_path, media_size):
+        return (media_path, media_size, os.stat(media_path).st_mtime_ns)
+
+    def _thumbnail_path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_cache_dir, f"{digest}.png")
+
+    def load_image(self, media_name, media_size=100):
+        """Return the resized PIL image for a media file, or None if it does not exist.
+
+        Safe to call from worker threads. Resized images are stored on disk, so
+        later sessions skip the full-size decode and LANCZOS resample.
+        """
+        media_path = self.resolve_path(media_name)
+        if media_path is None:
+            return None
+        thumbnail_path = self._thumbnail_path(self._key(media_path, media_size))
+        if os.path.exists(thumbnail_path):
+            try:
+                img = Image.open(thumbnail_path)
+                img.load()  # Reads the pixels and releases the file
+                return img
+            except OSError as e:
+                print(f"Ignoring unreadable media thumbnail {thumbnail_path}: {e}")
+
+        with Image.open(media_path) as img:
+            # Scale image based on media_size value
+            scale_factor = media_size / 100
+            new_size = (max(1, int(img.width * scale_factor)), max(1, int(img.height * scale_factor)))
+            resized = img.resize(new_size, Image.Resampling.LANCZOS)
+        # The prefetch worker and the Tk thread may both write this thumbnail; give each its own temp file
+        tmp_path = f"{thumbnail_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            resized.save(tmp_path, format='PNG')
+            os.replace(tmp_path, thumbnail_path)
+        except OSError as e:
+            print(f"Could not save media thumbnail {thumbnail_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return resized
+
+    def has_photo(self, media_name, media_size=100):
+        """True if a PhotoImage for this media file is already cached"""
+        media_path = self.resolve_path(media_name)
+        return media_path is not None and self._key(media_path, media_size) in self.photos
+
+    def add_image(self, media_name, media_size, img):
+        """Turn a prepared image into a cached PhotoImage (Tk thread only)"""
+        media_path = self.resolve_path(media_name)
+        photo = ImageTk.PhotoImage(img)
+        self.photos.put(self._key(media_path, media_size), photo, nbytes=img.width * img.height * 4)
+        return photo
+
+    def get_photo(self, media_name, media_size=100):
+        """Return a ready PhotoImage for a media file, or None if it does not exist (Tk thread only)"""
+        media_path = self.resolve_path(media_name)
+        if media_path is None:
+            return None
+        photo = self.photos.get(self._key(media_path, media_size))
+        if photo is not None:
+            return photo
+        img = self.load_image(media_name, media_size)
+        if img is None:
+            return None
+        return self.add_image(media_name, media_size, img)
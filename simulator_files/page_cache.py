@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict
+
+# Default memory budget for rendered pages (RGB bytes)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def image_nbytes(image):
+    """Approximate the memory held by a rendered PIL image"""
+    width, height = image.size
+    return width * height * len(image.getbands())
+
+
+class PageCache:
+    """Thread-safe LRU cache of rendered images, bounded by total bytes."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (image, nbytes)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped by clear(); renders started before it are dropped by put()
+        self.generation = 0
+
+    @staticmethod
+    def make_key(page_num, zoom):
+        """Build a cache key for a page rendered at the given zoom"""
+        # Round the zoom so repeated *1.2 / /1.2 steps land on the same key
+        return (page_num, round(zoom, 4))
+
+    def get(self, key):
+        """Return the cached image for key (or None), updating hit/miss counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, image, nbytes=None, generation=None):
+        """Store an image, evicting least recently used entries to stay in budget
+
+        Pass the generation read before rendering; the image is dropped if the
+        cache was cleared since, as it belongs to the previous document.
+        """
+        if nbytes is None:
+            nbytes = image_nbytes(image)
+        if nbytes > self.max_bytes:
+            return  # Never cache something larger than the whole budget
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (image, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached images (e.g. when a new document is loaded)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.generation += 1
+
+    def stats(self):
+        """Return hit/miss counters and memory usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+class PagePrefetcher:
+    """Worker thread that pre-renders the pages around the current one into a PageCache."""
+
+    def __init__(self, cache, render_page, radius=2):
+        # render_page(page_num, zoom) must be safe to call off the Tk thread
+        self.cache = cache
+        self.render_page = render_page
+        self.radius = radius
+        self._pending = []
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def request(self, page_num, zoom, total_pages):
+        """Queue the neighbours of page_num, replacing any older requests"""
+        pages = []
+        # Alternate forwards/backwards so the most likely next page renders first
+        for distance in range(1, self.radius + 1):
+            for candidate in (page_num + distance, page_num - distance):
+                if 0 <= candidate < total_pages:
+                    pages.append(candidate)
+        with self._condition:
+            self._pending = [(candidate, zoom) for candidate in pages]
+            self._condition.notify()
+
+    def cancel(self):
+        """Forget all queued pages"""
+        with self._condition:
+            self._pending = []
+
+    def stop(self):
+        """Stop the worker thread"""
+        with self._condition:
+            self._stopped = True
+            self._pending = []
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                page_num, zoom = self._pending.pop(0)
+            key = self.cache.make_key(page_num, zoom)
+            generation = self.cache.generation
+            if key in self.cache:
+                continue
+            try:
+                image = self.render_page(page_num, zoom)
+            except Exception as e:
+                print(f"Prefetch of page {page_num + 1} failed: {e}")
+                continue
+            if image is not None:
+                self.cache.put(key, image, generation=generation)
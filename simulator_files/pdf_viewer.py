@@ -18,6 +18,7 @@ except ImportError as e:
     Image = None
     ImageTk = None
 import threading
+from simulator_files.search_index import SearchIndex
 
 class PDFViewer(ttk.Frame):
     def __init__(self, parent, pdf_path=None):
@@ -31,6 +32,8 @@ class PDFViewer(ttk.Frame):
         self.pdf_document = None
         self.search_results = []  # Store search results
         self.current_search_index = -1  # Current position in search results
+        self.search_index = None  # Built in the background after a PDF is loaded
+        self.document_lock = threading.RLock()  # PyMuPDF documents are not thread-safe
         
         # Track dragging state
         self.is_dragging = False
@@ -215,10 +218,16 @@ class PDFViewer(ttk.Frame):
                 return
             
             # Open the PDF document
-            self.pdf_document = fitz.open(self.pdf_path)
-            self.total_pages = len(self.pdf_document)
+            document = fitz.open(self.pdf_path)
+            with self.document_lock:
+                self.pdf_document = document
+                self.total_pages = len(document)
             print(f"Successfully loaded {self.total_pages} pages")
             
+            # Build (or load the cached) search index without blocking the UI
+            self.search_index = None
+            threading.Thread(target=self.build_search_index, args=(self.pdf_path, document), daemon=True).start()
+            
             # Display the first page
             self.after(0, self.display_page)
             
@@ -236,10 +245,11 @@ class PDFViewer(ttk.Frame):
             print(f"Displaying page {self.current_page + 1}/{self.total_pages}")
             
             # Get the page
-            page = self.pdf_document[self.current_page]
-            
-            # Get page dimensions
-            page_rect = page.rect
+            with self.document_lock:
+                page = self.pdf_document[self.current_page]
+                
+                # Get page dimensions
+                page_rect = page.rect
             page_width = page_rect.width
             page_height = page_rect.height
             
@@ -259,7 +269,8 @@ class PDFViewer(ttk.Frame):
             # Render the page to a pixmap
             zoom = 2 * self.zoom_level  # Base zoom is 2 for better quality
             mat = fitz.Matrix(zoom, zoom)
-            pix = page.get_pixmap(matrix=mat)
+            with self.document_lock:
+                pix = page.get_pixmap(matrix=mat)
             
             # Check if PIL modules are available
             if Image is None or ImageTk is None:
@@ -396,13 +407,17 @@ class PDFViewer(ttk.Frame):
         self.search_results = []
         self.current_search_index = -1
         
-        # Search through all pages
-        for page_num in range(self.total_pages):
-            page = self.pdf_document[page_num]
-            text_instances = page.search_for(search_text)
-            
-            for inst in text_instances:
-                self.search_results.append((page_num, inst))
+        # Answer from the prebuilt index; only search the pages while it is still being built
+        if self.search_index is not None:
+            self.search_results = self.search_index.search(search_text)
+        else:
+            with self.document_lock:
+                for page_num in range(self.total_pages):
+                    page = self.pdf_document[page_num]
+                    text_instances = page.search_for(search_text)
+                    
+                    for inst in text_instances:
+                        self.search_results.append((page_num, [inst]))
         
         if self.search_results:
             self.current_search_index = 0
@@ -410,12 +425,23 @@ class PDFViewer(ttk.Frame):
         else:
             messagebox.showinfo("Search", "No matches found.")
             
+    def build_search_index(self, pdf_path, document):
+        """Load or build the search index for a document (runs in a worker thread)"""
+        try:
+            index = SearchIndex.load_or_build(pdf_path, document, self.document_lock)
+        except Exception as e:
+            print(f"Failed to build search index: {e}")
+            return
+        # Ignore the result if another PDF was opened in the meantime
+        if self.pdf_document is document:
+            self.search_index = index
+            
     def jump_to_search_result(self):
         """Jump to the current search result"""
         if not self.search_results or self.current_search_index < 0:
             return
             
-        page_num, rect = self.search_results[self.current_search_index]
+        page_num, rects = self.search_results[self.current_search_index]
         
         # Jump to the page
         if page_num != self.current_page:
@@ -423,22 +449,20 @@ class PDFViewer(ttk.Frame):
             self.display_page()
         
         # Highlight the search result
-        self.highlight_search_result(rect)
+        self.highlight_search_result(rects)
         
-    def highlight_search_result(self, rect):
-        """Highlight the current search result on the page"""
-        # Convert the rectangle coordinates to canvas coordinates
+    def highlight_search_result(self, rects):
+        """Highlight the current search result on the page (one box per line it covers)"""
         zoom = 2 * self.zoom_level
-        x0 = rect.x0 * zoom
-        y0 = rect.y0 * zoom
-        x1 = rect.x1 * zoom
-        y1 = rect.y1 * zoom
-        
-        # Create a yellow highlight rectangle with less transparency
-        self.canvas.create_rectangle(x0, y0, x1, y1, 
-                                   fill='#FFFF00',  # Yellow
-                                   stipple='gray25',  # Less transparent
-                                   tags='search_highlight')
+        for rect in rects:
+            # Convert the rectangle coordinates to canvas coordinates
+            x0, y0, x1, y1 = (coord * zoom for coord in rect)
+            
+            # Create a yellow highlight rectangle with less transparency
+            self.canvas.create_rectangle(x0, y0, x1, y1, 
+                                       fill='#FFFF00',  # Yellow
+                                       stipple='gray25',  # Less transparent
+                                       tags='search_highlight')
         
         # Ensure the highlight is visible
         self.canvas.see('search_highlight')
@@ -0,0 +1,196 @@
+"""Compiled, memory-mapped problem bank.
+
+Layout (little endian):
+    header        magic b'FEPB', u16 version, u16 reserved, u32 record count, u32 string count
+    string table  per string: u16 byte length + UTF-8 bytes (category and difficulty names)
+    offset table  per record: u64 payload offset, u32 payload length, u16 category id,
+                  u16 difficulty id (0xFFFF if none), u16 flags
+    payloads      one compact UTF-8 JSON object per problem (without category and difficulty),
+                  optionally with a "rendered" object holding the prerendered Unicode text
+                  (the question as text_segments() runs, the choices as plain strings)
+
+The offset table carries everything needed to filter problems, so only the
+problems actually picked for an exam are ever decoded.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+
+from simulator_files.latex_unicode import RENDER_VERSION, convert_latex_to_unicode, text_segments
+
+MAGIC = b'FEPB'
+FORMAT_VERSION = 2
+
+HEADER = struct.Struct('<4sHHII')
+STRING_LENGTH = struct.Struct('<H')
+RECORD = struct.Struct('<QIHHH')
+
+FLAG_HAS_MEDIA = 0x1
+NO_STRING = 0xFFFF
+
+DEFAULT_JSON_PATH = os.path.join(os.path.dirname(__file__), 'problems_database.json')
+DEFAULT_BANK_PATH = os.path.join(os.path.dirname(__file__), 'problems_database.bin')
+
+
+class ProblemBankError(Exception):
+    """Raised when a compiled bank is missing, corrupt or of an unknown version."""
+
+
+class ProblemBank:
+    """Read-only view of a compiled problem bank through mmap."""
+
+    def __init__(self, path=DEFAULT_BANK_PATH):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:  # Empty file
+            self._file.close()
+            raise ProblemBankError(f"{path} is empty") from e
+        try:
+            self._read_header()
+        except (struct.error, UnicodeDecodeError) as e:
+            self.close()
+            raise ProblemBankError(f"{path} is truncated or corrupt: {e}") from e
+
+    def _read_header(self):
+        magic, version, _, self.record_count, string_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ProblemBankError(f"{self.path} is not a compiled problem bank")
+        if version != FORMAT_VERSION:
+            raise ProblemBankError(f"{self.path} has format version {version}, expected {FORMAT_VERSION}")
+        position = HEADER.size
+        self.strings = []
+        for _ in range(string_count):
+            (length,) = STRING_LENGTH.unpack_from(self._map, position)
+            position += STRING_LENGTH.size
+            self.strings.append(bytes(self._map[position:position + length]).decode('utf-8'))
+            position += length
+        self._records_offset = position
+        payloads_offset = position + self.record_count * RECORD.size
+        if payloads_offset > len(self._map):
+            raise ProblemBankError(f"{self.path} is truncated")
+        # Check every entry once so a corrupt bank is rejected here, not in the middle of an exam
+        string_count = len(self.strings)
+        records = self._map[position:payloads_offset]
+        for index, (offset, length, category_id, difficulty_id, _) in enumerate(RECORD.iter_unpack(records)):
+            if offset < payloads_offset or offset + length > len(self._map):
+                raise ProblemBankError(f"{self.path}: record {index} lies outside the file")
+            if category_id >= string_count or (difficulty_id != NO_STRING and difficulty_id >= string_count):
+                raise ProblemBankError(f"{self.path}: record {index} refers to an unknown string")
+
+    def __len__(self):
+        return self.record_count
+
+    def _entry(self, index):
+        if not 0 <= index < self.record_count:
+            raise IndexError(index)
+        return RECORD.unpack_from(self._map, self._records_offset + index * RECORD.size)
+
+    def category_of(self, index):
+        """Return a record's category without decoding its payload"""
+        return self.strings[self._entry(index)[2]]
+
+    def attributes_of(self, index):
+        """Return the indexed attributes of a record without decoding its payload"""
+        _, _, _, difficulty_id, flags = self._entry(index)
+        return {
+            'has_media': bool(flags & FLAG_HAS_MEDIA),
+            'difficulty': None if difficulty_id == NO_STRING else self.strings[difficulty_id],
+        }
+
+    def record(self, index):
+        """Decode one record into a dict with the same keys as problems_database.json"""
+        offset, length, category_id, difficulty_id, _ = self._entry(index)
+        try:
+            data = json.loads(self._map[offset:offset + length].decode('utf-8'))
+        except ValueError as e:  # Includes JSON and UTF-8 decode errors
+            raise ProblemBankError(f"{self.path}: record {index} is corrupt: {e}") from e
+        if not isinstance(data, dict):
+            raise ProblemBankError(f"{self.path}: record {index} is not an object")
+        data['category'] = self.strings[category_id]
+        if difficulty_id != NO_STRING:
+            data['difficulty'] = self.strings[difficulty_id]
+        return data
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def bank_is_current(bank_path=DEFAULT_BANK_PATH, json_path=DEFAULT_JSON_PATH):
+    """True if the compiled bank exists and is not older than its JSON source"""
+    if not os.path.exists(bank_path):
+        return False
+    if not os.path.exists(json_path):
+        return True
+    return os.path.getmtime(bank_path) >= os.path.getmtime(json_path)
+
+
+def prerender_problem(problem):
+    """Return the Unicode display text of a problem's question (as tagged segments) and choices"""
+    return {
+        'version': RENDER_VERSION,
+        'question_segments': text_segments(problem['question']),
+        'choices': [convert_latex_to_unicode(choice) for choice in problem['choices']],
+    }
+
+
+def compile_problem_bank(json_path=DEFAULT_JSON_PATH, bank_path=DEFAULT_BANK_PATH, prerender=False):
+    """Convert problems_database.json into the compiled bank format.
+
+    With prerender, each record also carries its converted question and choice
+    text, so the simulator does not need to run the LaTeX renderer for them.
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        problems = json.load(f)['problems']
+
+    strings = []
+    string_ids = {}
+
+    def string_id(value):
+        if value is None:
+            return NO_STRING
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    entries = []
+    payloads = []
+    for problem in problems:
+        payload = {key: value for key, value in problem.items() if key not in ('category', 'difficulty')}
+        if prerender:
+            payload['rendered'] = prerender_problem(problem)
+        payloads.append(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        flags = FLAG_HAS_MEDIA if problem.get('media') else 0
+        entries.append((string_id(problem['category']), string_id(problem.get('difficulty')), flags))
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(problems), len(strings))
+    string_table = b''.join(STRING_LENGTH.pack(len(encoded)) + encoded
+                            for encoded in (s.encode('utf-8') for s in strings))
+    offset = len(header) + len(string_table) + RECORD.size * len(problems)
+    records = []
+    for payload, (category_id, difficulty_id, flags) in zip(payloads, entries):
+        records.append(RECORD.pack(offset, len(payload), category_id, difficulty_id, flags))
+        offset += len(payload)
+
+    # Write to a temporary file first so a crash never leaves a half-written bank
+    tmp_path = bank_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(string_table)
+        f.write(b''.join(records))
+        f.write(b''.join(payloads))
+    os.replace(tmp_path, bank_path)
+    return len(problems)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compile problems_database.json into the memory-mapped problem bank')
+    parser.add_argument('--prerender', action='store_true', help='Store the Unicode rendering of every question and choice')
+    args = parser.parse_args()
+    count = compile_problem_bank(prerender=args.prerender)
+    print(f"Compiled {count} problems into {DEFAULT_BANK_PATH}")
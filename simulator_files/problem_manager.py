@@ -1,9 +1,18 @@
 import json
 import random
 import os
-from typing import Dict, List, Optional
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, List, Optional, Tuple
+from simulator_files.problem_bank import ProblemBank, ProblemBankError, bank_is_current, DEFAULT_BANK_PATH
+from simulator_files.latex_unicode import RENDER_VERSION
 
 class Problem:
+    # No per-instance __dict__: large banks hold tens of thousands of these
+    __slots__ = ('number', 'category', 'question', 'media', 'choices',
+                 'correct_answer', 'media_size', 'difficulty', 'rendered')
+
     def __init__(self, 
                  number: str,
                  category: str,
@@ -11,40 +20,250 @@ class Problem:
                  media: str,
                  choices: List[str],
                  correct_answer: str,
-                 media_size: int = 100):  # Default to 100 if not specified
+                 media_size: int = 100,  # Default to 100 if not specified
+                 difficulty: Optional[str] = None,
+                 rendered: Optional[Tuple[List[Tuple], List[str]]] = None):
         self.number = number
-        self.category = category
+        # Repeated short strings are interned so every problem shares one copy
+        self.category = sys.intern(category)
         self.question = question
         self.media = media
-        self.choices = choices
-        self.correct_answer = correct_answer
+        self.choices: Tuple[str, ...] = tuple(choices)
+        self.correct_answer = sys.intern(correct_answer)
         self.media_size = media_size
+        self.difficulty = sys.intern(difficulty) if difficulty is not None else None
+        # (question segments, choice texts) prerendered by the bank compiler, if any;
+        # the segments are (display text, tags, formula) runs as made by text_segments()
+        self.rendered = rendered
+
+    @property
+    def has_media(self) -> bool:
+        return bool(self.media)
+
+    @staticmethod
+    def prerendered(problem_data: Dict) -> Optional[Tuple[List[Tuple], List[str]]]:
+        """Return the (question segments, choice texts) prerendered into a record, if current"""
+        rendered = problem_data.get("rendered")
+        if rendered is None or rendered.get("version") != RENDER_VERSION:
+            return None  # Not prerendered, or rendered by an older converter
+        segments = [(text, tuple(tags), latex_code) for text, tags, latex_code in rendered["question_segments"]]
+        return segments, rendered["choices"]
+
+    @classmethod
+    def from_dict(cls, problem_data: Dict) -> 'Problem':
+        return cls(
+            number=problem_data["number"],
+            category=problem_data["category"],
+            question=problem_data["question"],
+            media=problem_data["media"],
+            choices=problem_data["choices"],
+            correct_answer=problem_data["correct_answer"],
+            media_size=problem_data.get("media_size", 100),  # Use get() to default to 100 if not present
+            difficulty=problem_data.get("difficulty"),
+            rendered=cls.prerendered(problem_data)
+        )
+
+# Problem attributes that ProblemManager indexes besides the category
+INDEXED_ATTRIBUTES = ('has_media', 'difficulty')
+
+# Relative weight of each category on the NCEES FE Civil exam
+# (midpoint of the number of questions in each knowledge area of the exam specification)
+NCEES_CATEGORY_WEIGHTS = {
+    "Math": 10, "Ethics": 5, "Econ": 6.5, "Statics": 10, "Dynamics": 5,
+    "Strength": 9, "Materials": 6.5, "Fluids": 7.5, "Surveying": 7.5, "Envir": 12.5,
+    "Struc": 12.5, "Geotech": 12.5, "Transp": 11.5, "Constr": 10,
+}
+
+def allocate_quotas(k: int, available: Dict[str, int], weights: Dict[str, float],
+                    rng: random.Random) -> Dict[str, int]:
+    """Split k questions across categories in proportion to their weights.
+
+    Each category gets the integer part of its share; the leftover seats go to
+    categories drawn at random in proportion to their fractional parts, so
+    small exams still follow the weighting on average. No category gets more
+    questions than it has available. Negative weights count as zero, and if
+    every category that still has questions weighs zero they share equally.
+    """
+    quotas = {category: 0 for category in available}
+    open_categories = [c for c in available if available[c] > 0]
+    remaining = min(k, sum(available[c] for c in open_categories))
+    weights = {c: max(weights[c], 0) for c in available}
+    while remaining > 0 and open_categories:
+        total_weight = sum(weights[c] for c in open_categories)
+        if total_weight <= 0:
+            weights = {c: 1.0 for c in available}
+            total_weight = len(open_categories)
+        shares = {c: remaining * weights[c] / total_weight for c in open_categories}
+        granted = 0
+        for c in open_categories:
+            whole = min(int(shares[c]), available[c] - quotas[c])
+            quotas[c] += whole
+            granted += whole
+        leftover = remaining - granted
+        # Weighted sampling without replacement on the fractional parts (Efraimidis-Spirakis keys)
+        fractional = [c for c in open_categories
+                      if shares[c] - int(shares[c]) > 0 and quotas[c] < available[c]]
+        fractional.sort(key=lambda c: rng.random() ** (1 / (shares[c] - int(shares[c]))), reverse=True)
+        for c in fractional[:leftover]:
+            quotas[c] += 1
+            granted += 1
+        remaining -= granted
+        open_categories = [c for c in open_categories if quotas[c] < available[c]]
+        if granted == 0:
+            # Only whole-number shares were left and they are capped; spread one by one
+            for c in open_categories[:remaining]:
+                quotas[c] += 1
+            break
+    return quotas
+
+def sample_without_replacement(population: Sequence, k: int, rng: random.Random) -> List:
+    """Pick k distinct items in O(k) using Floyd's algorithm (the population is never copied)"""
+    n = len(population)
+    k = min(k, n)
+    chosen = set()
+    for j in range(n - k, n):
+        t = rng.randrange(j + 1)
+        chosen.add(j if t in chosen else t)
+    return [population[i] for i in chosen]
+
+class BankProblems(Sequence):
+    """Sequence of Problems backed by a compiled bank; records are decoded on first access"""
+    def __init__(self, bank: ProblemBank):
+        self.bank = bank
+        self._decoded: Dict[int, Problem] = {}
+
+    def __len__(self) -> int:
+        return len(self.bank)
+
+    def __getitem__(self, index: int) -> Problem:
+        if index < 0:
+            index += len(self.bank)
+        problem = self._decoded.get(index)
+        if problem is None:
+            data = self.bank.record(index)
+            try:
+                problem = Problem.from_dict(data)
+            except (KeyError, TypeError, AttributeError) as e:
+                raise ProblemBankError(f"{self.bank.path}: record {index} is missing fields: {e}") from e
+            self._decoded[index] = problem
+        return problem
+
+    def close(self):
+        self.bank.close()
+
+    def category_of(self, index: int) -> str:
+        return self.bank.category_of(index)
+
+    def attributes_of(self, index: int) -> Dict[str, Any]:
+        return self.bank.attributes_of(index)
+
+class ProblemColumns(Sequence):
+    """Struct-of-arrays problem store for very large banks.
+
+    Each field lives in its own list or typed array, and categories,
+    difficulties and answer letters are stored as small integer codes.
+    Problem objects are only created when an item is accessed.
+    """
+    def __init__(self):
+        self.strings: List[str] = []  # Category/difficulty names, indexed by code
+        self._string_codes: Dict[str, int] = {}
+        self.numbers: List[str] = []
+        self.questions: List[str] = []
+        self.media: List[str] = []
+        self.choices: List[Tuple[str, ...]] = []
+        self.category_codes = array('H')
+        self.difficulty_codes = array('H')  # NO_CODE when the problem has no difficulty
+        self.answer_codes = array('B')  # ord() of the answer letter
+        self.media_sizes = array('H')
+        self.rendered: List[Optional[Tuple[List[Tuple], List[str]]]] = []  # Prerendered text, see Problem.rendered
+
+    NO_CODE = 0xFFFF
+
+    def _code(self, value: Optional[str]) -> int:
+        if value is None:
+            return self.NO_CODE
+        code = self._string_codes.get(value)
+        if code is None:
+            code = self._string_codes[value] = len(self.strings)
+            self.strings.append(sys.intern(value))
+        return code
+
+    def append(self, problem_data: Dict):
+        """Add a problem given as a problems_database.json record"""
+        self.numbers.append(problem_data["number"])
+        self.questions.append(problem_data["question"])
+        self.media.append(problem_data["media"])
+        self.choices.append(tuple(problem_data["choices"]))
+        self.category_codes.append(self._code(problem_data["category"]))
+        self.difficulty_codes.append(self._code(problem_data.get("difficulty")))
+        self.answer_codes.append(ord(problem_data["correct_answer"]))
+        self.media_sizes.append(problem_data.get("media_size", 100))
+        self.rendered.append(Problem.prerendered(problem_data))
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def __getitem__(self, index: int) -> Problem:
+        difficulty_code = self.difficulty_codes[index]
+        return Problem(
+            number=self.numbers[index],
+            category=self.strings[self.category_codes[index]],
+            question=self.questions[index],
+            media=self.media[index],
+            choices=self.choices[index],
+            correct_answer=chr(self.answer_codes[index]),
+            media_size=self.media_sizes[index],
+            difficulty=None if difficulty_code == self.NO_CODE else self.strings[difficulty_code],
+            rendered=self.rendered[index]
+        )
+
+    def category_of(self, index: int) -> str:
+        return self.strings[self.category_codes[index]]
+
+    def attributes_of(self, index: int) -> Dict[str, Any]:
+        difficulty_code = self.difficulty_codes[index]
+        return {
+            'has_media': bool(self.media[index]),
+            'difficulty': None if difficulty_code == self.NO_CODE else self.strings[difficulty_code],
+        }
 
 class ProblemManager:
-    def __init__(self, num_questions: int = 50):
+    def __init__(self, num_questions: int = 50, seed: Optional[int] = None,
+                 category_weights: Optional[Dict[str, float]] = None, columnar: bool = False):
         self.problems: List[Problem] = []
+        self._exam_category_index: Dict[str, List[Problem]] = {}
         self.all_problems: List[Problem] = []  # Store all problems
         self.current_index = 0
         self.num_questions = num_questions
         self.selected_categories = None
+        self.category_weights = category_weights or NCEES_CATEGORY_WEIGHTS
+        self.seed = seed
+        self.rng = random.Random(seed)  # Same seed -> same exams
+        self.columnar = columnar  # Keep a JSON bank as ProblemColumns instead of Problem objects
         self._load_problems_from_database()
+        self._build_indexes()
         self._shuffle_problems()
 
-    def _load_problems_from_database(self):
+    def _load_problems_from_database(self, use_bank: bool = True):
+        self.close()
+        # Prefer the compiled bank: opening it only reads the header and offset table
+        if use_bank and bank_is_current():
+            try:
+                self.all_problems = BankProblems(ProblemBank(DEFAULT_BANK_PATH))
+                return
+            except (OSError, ProblemBankError) as e:
+                print(f"Error: could not open {DEFAULT_BANK_PATH} ({e}), falling back to JSON")
+        self.all_problems = []
         try:
             with open(os.path.join(os.path.dirname(__file__), 'problems_database.json'), 'r', encoding='utf-8') as file:
                 data = json.load(file)
+                if self.columnar:
+                    self.all_problems = ProblemColumns()
                 for problem_data in data['problems']:
-                    problem = Problem(
-                        number=problem_data["number"],
-                        category=problem_data["category"],
-                        question=problem_data["question"],
-                        media=problem_data["media"],
-                        choices=problem_data["choices"],
-                        correct_answer=problem_data["correct_answer"],
-                        media_size=problem_data.get("media_size", 100)  # Use get() to default to 100 if not present
-                    )
-                    self.all_problems.append(problem)
+                    if self.columnar:
+                        self.all_problems.append(problem_data)
+                    else:
+                        self.all_problems.append(Problem.from_dict(problem_data))
         except FileNotFoundError:
             print(f"Error: {os.path.join(os.path.dirname(__file__), 'problems_database.json')} not found!")
             self.all_problems = []
@@ -52,29 +271,118 @@ class ProblemManager:
             print(f"Error: Invalid JSON format in {os.path.join(os.path.dirname(__file__), 'problems_database.json')}!")
             self.all_problems = []
 
+    def _build_indexes(self):
+        """Index the bank by category and attributes once, so filtering never rescans it"""
+        self.category_index: Dict[str, List[int]] = {}
+        self.attribute_index: Dict[str, Dict[Any, List[int]]] = {name: {} for name in INDEXED_ATTRIBUTES}
+        # Compiled and columnar stores answer without materializing Problem objects
+        has_columns = isinstance(self.all_problems, (BankProblems, ProblemColumns))
+        for i in range(len(self.all_problems)):
+            if has_columns:
+                category = self.all_problems.category_of(i)
+                attributes = self.all_problems.attributes_of(i)
+            else:
+                problem = self.all_problems[i]
+                category = problem.category
+                attributes = {name: getattr(problem, name) for name in INDEXED_ATTRIBUTES}
+            self.category_index.setdefault(category, []).append(i)
+            for name, value in attributes.items():
+                self.attribute_index[name].setdefault(value, []).append(i)
+
+    def find_problem_indices(self, categories: Optional[List[str]] = None, **attributes) -> List[int]:
+        """Bank indices matching the categories (None = all) and attribute values, e.g. has_media=True"""
+        if categories is None:
+            indices = list(range(len(self.all_problems)))
+        else:
+            indices = [i for category in categories for i in self.category_index.get(category, [])]
+        for name, value in attributes.items():
+            if name not in self.attribute_index:
+                raise ValueError(f"'{name}' is not an indexed attribute")
+            matching = self.attribute_index[name].get(value, [])
+            # Intersect against the smaller side
+            if len(matching) < len(indices):
+                allowed = set(indices)
+                indices = [i for i in matching if i in allowed]
+            else:
+                allowed = set(matching)
+                indices = [i for i in indices if i in allowed]
+        return indices
+
     def set_categories(self, categories: List[str]):
         """Set the selected categories and filter problems accordingly"""
         self.selected_categories = categories
-        self.problems = [p for p in self.all_problems if p.category in categories]
         self._shuffle_problems()
 
+    def new_exam(self, num_questions: int, categories: Optional[List[str]] = None):
+        """Draw the problems of a new exam from the bank that is already loaded"""
+        self.num_questions = num_questions
+        self.selected_categories = categories
+        self._shuffle_problems()
+
+    def set_problems(self, problems: List[Problem]):
+        """Set the problems of the current exam (e.g. when resuming a paused exam)"""
+        self.problems = problems
+        self._exam_category_index: Dict[str, List[Problem]] = {}
+        for problem in problems:
+            self._exam_category_index.setdefault(problem.category, []).append(problem)
+
+    def set_seed(self, seed: Optional[int]):
+        """Reseed the sampler so the following exams can be reproduced"""
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def sample_problem_indices(self, k: int, categories: Optional[List[str]] = None,
+                               weights: Optional[Dict[str, float]] = None,
+                               rng: Optional[random.Random] = None, **attributes) -> List[int]:
+        """Draw k bank indices, stratified by category according to the weights
+
+        Attribute filters (e.g. has_media=False) restrict each category's pool.
+        """
+        rng = rng or self.rng
+        weights = weights or self.category_weights
+        if categories is None:
+            categories = list(self.category_index)
+        pools = {c: self.find_problem_indices([c], **attributes) for c in dict.fromkeys(categories)}
+        available = {c: len(pool) for c, pool in pools.items()}
+        # Categories missing from the weight table count as an average category
+        default_weight = sum(weights.values()) / len(weights) if weights else 1.0
+        category_weights = {c: weights.get(c, default_weight) for c in available}
+        quotas = allocate_quotas(k, available, category_weights, rng)
+
+        indices = []
+        for category, quota in quotas.items():
+            if quota:
+                indices.extend(sample_without_replacement(pools[category], quota, rng))
+        # Mix the categories; only the k sampled problems are shuffled
+        rng.shuffle(indices)
+        return indices
+
+    def sample_problems(self, k: int, categories: Optional[List[str]] = None,
+                        weights: Optional[Dict[str, float]] = None,
+                        seed: Optional[int] = None, **attributes) -> List[Problem]:
+        """Draw k problems with per-category quotas; pass a seed for a reproducible draw"""
+        rng = random.Random(seed) if seed is not None else self.rng
+        return [self.all_problems[i] for i in self.sample_problem_indices(k, categories, weights, rng, **attributes)]
+
     def _shuffle_problems(self):
-        """Shuffle and ensure exactly num_questions problems"""
-        # If no categories are set, use all problems
-        if self.selected_categories is None:
-            self.problems = self.all_problems.copy()
-        
-        # First shuffle the filtered list
-        random.shuffle(self.problems)
-        
-        # If we have fewer problems than requested, use all of them
-        if len(self.problems) <= self.num_questions:
-            return
-            
-        # Take exactly num_questions problems
-        self.problems = self.problems[:self.num_questions]
+        """Draw exactly num_questions problems (or all of them if the selection is smaller)"""
+        # Sample bank indices so only the chosen problems get decoded
+        try:
+            problems = self.sample_problems(self.num_questions, self.selected_categories)
+        except ProblemBankError as e:
+            print(f"Error: {e}, falling back to JSON")
+            self._load_problems_from_database(use_bank=False)
+            self._build_indexes()
+            problems = self.sample_problems(self.num_questions, self.selected_categories)
+        self.set_problems(problems)
         self.current_index = 0
 
+    def close(self):
+        """Release the compiled bank's memory map, if one is open"""
+        if isinstance(self.all_problems, BankProblems):
+            self.all_problems.close()
+        self.all_problems = []
+
     def get_current_problem(self) -> Optional[Problem]:
         if 0 <= self.current_index < len(self.problems):
             return self.problems[self.current_index]
@@ -108,8 +416,12 @@ class ProblemManager:
 
     def get_problems_by_category(self, category: str) -> List[Problem]:
         """Get all problems from a specific category"""
-        return [p for p in self.problems if p.category == category]
+        return list(self._exam_category_index.get(category, []))
 
     def get_categories(self) -> List[str]:
         """Get a list of all unique categories"""
-        return list(set(p.category for p in self.problems)) 
\ No newline at end of file
+        return list(self._exam_category_index)
+
+    def get_bank_categories(self) -> List[str]:
+        """Get every category present in the problem bank"""
+        return list(self.category_index) 
\ No newline at end of file
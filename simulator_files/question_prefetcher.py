@@ -0,0 +1,90 @@
+import threading
+import tkinter as tk
+from collections import OrderedDict
+
+
+class QuestionPrefetcher:
+    """Prepares the next questions' media and converted text on a worker thread.
+
+    The worker decodes and resizes images, splits the question into converted
+    text segments, converts the choices and rasterizes the question's formulas
+    (when raster math is on). Anything that needs Tk (PhotoImage creation) is
+    handed back to the main thread with after().
+    """
+
+    def __init__(self, widget, media_cache, latex_renderer, lookahead=3):
+        self.widget = widget
+        self.media_cache = media_cache
+        self.latex_renderer = latex_renderer
+        self.lookahead = lookahead
+        self._prepared_text = OrderedDict()  # Problem -> (question segments, [choice texts])
+        self._text_lock = threading.Lock()
+        self._pending = []
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def prefetch(self, problems):
+        """Queue the upcoming problems, replacing whatever was still queued"""
+        with self._condition:
+            self._pending = list(problems[:self.lookahead])
+            self._condition.notify()
+
+    def get_text(self, problem):
+        """Return (question segments, choice texts) if already converted, else None"""
+        with self._text_lock:
+            return self._prepared_text.get(problem)
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._pending = []
+            self._condition.notify()
+
+    def _store_text(self, problem, texts):
+        with self._text_lock:
+            self._prepared_text[problem] = texts
+            self._prepared_text.move_to_end(problem)
+            # Only the questions around the current one are worth keeping
+            while len(self._prepared_text) > 2 * self.lookahead + 1:
+                self._prepared_text.popitem(last=False)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                problem = self._pending.pop(0)
+            try:
+                self._prepare(problem)
+            except Exception as e:
+                print(f"Prefetch of question {problem.number} failed: {e}")
+
+    def _prepare(self, problem):
+        if problem.rendered is None and self.get_text(problem) is None:
+            question_segments = self.latex_renderer.text_segments(problem.question)
+            choice_texts = [self.latex_renderer.convert_latex_to_unicode(choice) for choice in problem.choices]
+            self._store_text(problem, (question_segments, choice_texts))
+
+        self.latex_renderer.render_formulas(problem.question)
+
+        if problem.media and not self.media_cache.has_photo(problem.media, problem.media_size):
+            img = self.media_cache.load_image(problem.media, problem.media_size)
+            if img is not None:
+                self._hand_over(lambda: self._add_photo(problem, img))
+
+    def _add_photo(self, problem, img):
+        if not self.media_cache.has_photo(problem.media, problem.media_size):
+            self.media_cache.add_image(problem.media, problem.media_size, img)
+
+    def _hand_over(self, callback):
+        if self._stopped:
+            return
+        try:
+            self.widget.after(0, callback)
+        except (RuntimeError, tk.TclError):
+            # The window was destroyed while we were working
+            self._stopped = True
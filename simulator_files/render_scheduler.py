@@ -0,0 +1,56 @@
+class RenderScheduler:
+    """Coalesces bursts of render requests into one render of the latest state.
+
+    Every request restarts a short debounce timer on the Tk event loop, so a
+    stream of zoom, resize or page events only renders once, after it settles.
+    The render callback reads the viewer state at that point, so it always
+    draws the most recent target.
+    """
+
+    def __init__(self, widget, render, debounce_ms=30):
+        self.widget = widget
+        self.render = render
+        self.debounce_ms = debounce_ms
+        self._pending = None
+        self.requested = 0
+        self.rendered = 0
+        self.skipped = 0
+
+    def request(self, delay_ms=None):
+        """Schedule a render, replacing any render that has not run yet"""
+        self.requested += 1
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self.skipped += 1
+        delay = self.debounce_ms if delay_ms is None else delay_ms
+        self._pending = self.widget.after(delay, self._fire)
+
+    def render_now(self):
+        """Render immediately, absorbing any pending request"""
+        self.requested += 1
+        self.cancel()
+        self._fire()
+
+    def cancel(self):
+        """Drop the pending render, if any"""
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+            self.skipped += 1
+
+    @property
+    def is_pending(self):
+        return self._pending is not None
+
+    def stats(self):
+        """Return how many renders were requested, performed and coalesced away"""
+        return {
+            'requested': self.requested,
+            'rendered': self.rendered,
+            'skipped': self.skipped,
+        }
+
+    def _fire(self):
+        self._pending = None
+        self.rendered += 1
+        self.render()
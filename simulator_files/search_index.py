@@ -0,0 +1,159 @@
+import bisect
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from simulator_files.app_paths import get_cache_dir
+
+# Bump when the on-disk layout changes so stale indexes are rebuilt
+INDEX_VERSION = 1
+
+_EDGE_PUNCTUATION = re.compile(r'^\W+|\W+$')
+
+
+def normalize_word(word):
+    """Lowercase a word and strip punctuation from its ends"""
+    return _EDGE_PUNCTUATION.sub('', word).lower()
+
+
+def file_hash(file_path, chunk_size=1024 * 1024):
+    """Return the SHA-1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def line_boxes(rects):
+    """Merge word boxes in reading order into one box per line"""
+    boxes = []
+    for x0, y0, x1, y1 in rects:
+        if boxes:
+            bx0, by0, bx1, by1 = boxes[-1]
+            # Same line if the word's vertical centre lies within the line so far
+            if by0 <= (y0 + y1) / 2 <= by1 and x0 >= bx0:
+                boxes[-1] = (bx0, min(by0, y0), max(bx1, x1), max(by1, y1))
+                continue
+        boxes.append((x0, y0, x1, y1))
+    return boxes
+
+
+class SearchIndex:
+    """Inverted word index over a PDF (word -> page + word rectangles)."""
+
+    def __init__(self, pages):
+        # pages[page_num] is a list of (normalized_word, (x0, y0, x1, y1)) in reading order
+        self.pages = pages
+        self.postings = {}
+        for page_num, words in enumerate(pages):
+            for position, (word, _) in enumerate(words):
+                self.postings.setdefault(word, []).append((page_num, position))
+        self.vocabulary = sorted(self.postings)
+
+    @classmethod
+    def build(cls, document, lock=None):
+        """Extract the words of every page of an open fitz document"""
+        lock = lock or contextlib.nullcontext()
+        pages = []
+        with lock:
+            total_pages = len(document)
+        for page_num in range(total_pages):
+            # Take the lock per page so the viewer can keep rendering meanwhile
+            with lock:
+                raw_words = document[page_num].get_text("words")
+            words = []
+            for x0, y0, x1, y1, text, *_ in raw_words:
+                word = normalize_word(text)
+                if word:
+                    words.append((word, (x0, y0, x1, y1)))
+            pages.append(words)
+        return cls(pages)
+
+    @classmethod
+    def load_or_build(cls, file_path, document, lock=None, digest=None):
+        """Load the persisted index for file_path, building and saving it if missing (digest: known SHA-1)"""
+        cache_path = os.path.join(get_cache_dir('search_index'), f"{digest or file_hash(file_path)}.json.gz")
+        if os.path.exists(cache_path):
+            try:
+                return cls.load(cache_path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring unreadable search index {cache_path}: {e}")
+        index = cls.build(document, lock)
+        try:
+            index.save(cache_path)
+        except OSError as e:
+            print(f"Could not save search index {cache_path}: {e}")
+        return index
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data['version'] != INDEX_VERSION:
+            raise ValueError(f"unsupported index version {data['version']}")
+        pages = [[(word, tuple(rect)) for word, *rect in words] for words in data['pages']]
+        return cls(pages)
+
+    def save(self, path):
+        data = {
+            'version': INDEX_VERSION,
+            'pages': [[[word, *rect] for word, rect in words] for words in self.pages],
+        }
+        tmp_path = path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def _matching_words(self, term, prefix):
+        if not prefix:
+            return [term] if term in self.postings else []
+        start = bisect.bisect_left(self.vocabulary, term)
+        matches = []
+        for word in self.vocabulary[start:]:
+            if not word.startswith(term):
+                break
+            matches.append(word)
+        return matches
+
+    def search(self, query, prefix=True):
+        """Find a word or phrase; returns a list of (page_num, [(x0, y0, x1, y1), ...]).
+
+        Each hit has one box per line it covers. With prefix=True the last word
+        of the query may be incomplete, so "modul" finds "modulus" and
+        "young's mod" finds "Young's modulus".
+        """
+        terms = [normalize_word(term) for term in query.split()]
+        terms = [term for term in terms if term]
+        if not terms:
+            return []
+
+        # Candidate start positions come from the first word's postings
+        first_words = self._matching_words(terms[0], prefix and len(terms) == 1)
+        starts = sorted(position for word in first_words for position in self.postings[word])
+
+        results = []
+        for page_num, position in starts:
+            words = self.pages[page_num]
+            end = position + len(terms)
+            if end > len(words):
+                continue
+            if not self._phrase_matches(words, position, terms, prefix):
+                continue
+            results.append((page_num, line_boxes([rect for _, rect in words[position:end]])))
+        return results
+
+    @staticmethod
+    def _phrase_matches(words, position, terms, prefix):
+        last = len(terms) - 1
+        for offset, term in enumerate(terms):
+            word = words[position + offset][0]
+            if offset == last and prefix:
+                if not word.startswith(term):
+                    return False
+            elif word != term:
+                return False
+        return True
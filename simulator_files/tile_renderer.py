@@ -0,0 +1,71 @@
+import math
+
+from simulator_files.page_cache import PageCache
+
+# Edge length of a rendered tile in canvas pixels
+TILE_SIZE = 512
+
+# Tiles are cheap to re-render, so they get a smaller budget than whole pages
+DEFAULT_TILE_CACHE_BYTES = 96 * 1024 * 1024
+
+
+class TileRenderer:
+    """Renders a zoomed page as a grid of tiles, only where the viewport needs them."""
+
+    def __init__(self, render_clip, tile_size=TILE_SIZE, margin=None, cache=None):
+        # render_clip(page_num, zoom, clip) returns a PIL image of the page region
+        # clip = (x0, y0, x1, y1) given in PDF page coordinates
+        self.render_clip = render_clip
+        self.tile_size = tile_size
+        self.margin = tile_size // 2 if margin is None else margin
+        self.cache = cache if cache is not None else PageCache(DEFAULT_TILE_CACHE_BYTES)
+
+    def grid_size(self, page_width_px, page_height_px):
+        """Return the number of tile columns and rows covering the page"""
+        return (math.ceil(page_width_px / self.tile_size),
+                math.ceil(page_height_px / self.tile_size))
+
+    def visible_tiles(self, page_width_px, page_height_px, viewport):
+        """Return (col, row) of every tile intersecting the viewport plus the margin.
+
+        viewport is (x0, y0, x1, y1) in canvas pixels.
+        """
+        columns, rows = self.grid_size(page_width_px, page_height_px)
+        x0, y0, x1, y1 = viewport
+        first_col = max(0, int((x0 - self.margin) // self.tile_size))
+        last_col = min(columns - 1, int((x1 + self.margin) // self.tile_size))
+        first_row = max(0, int((y0 - self.margin) // self.tile_size))
+        last_row = min(rows - 1, int((y1 + self.margin) // self.tile_size))
+        return [(col, row)
+                for row in range(first_row, last_row + 1)
+                for col in range(first_col, last_col + 1)]
+
+    def tile_clip(self, page_rect, zoom, col, row):
+        """Return the PDF-space clip rectangle for a tile"""
+        left, top, right, bottom = page_rect
+        x0 = left + col * self.tile_size / zoom
+        y0 = top + row * self.tile_size / zoom
+        x1 = min(right, x0 + self.tile_size / zoom)
+        y1 = min(bottom, y0 + self.tile_size / zoom)
+        return (x0, y0, x1, y1)
+
+    @staticmethod
+    def tile_key(page_num, zoom, col, row):
+        return (page_num, round(zoom, 4), col, row)
+
+    def cached_tile(self, page_num, zoom, col, row):
+        """Return the tile image if it has been rendered, else None"""
+        return self.cache.get(self.tile_key(page_num, zoom, col, row))
+
+    def get_tile(self, page_num, zoom, page_rect, col, row, generation=None):
+        """Return the tile image, rendering and caching it on a miss (generation: see PageCache.put)"""
+        key = self.tile_key(page_num, zoom, col, row)
+        image = self.cache.get(key)
+        if image is None:
+            image = self.render_clip(page_num, zoom, self.tile_clip(page_rect, zoom, col, row))
+            if image is not None:
+                self.cache.put(key, image, generation=generation)
+        return image
+
+    def clear(self):
+        self.cache.clear()
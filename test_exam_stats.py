@@ -0,0 +1,120 @@
+"""
+Tests for the JSON Lines exam results log and its summary sidecar
+"""
+
+import json
+
+from simulator_files import exam_stats
+from simulator_files.exam_stats import (LEGACY_STATS_FILE, REJECTED_SUFFIX, RESULTS_LOG_FILE, SUMMARY_FILE,
+                                        ExamStats, QuestionAttempt)
+
+
+def attempts(*outcomes):
+    return [QuestionAttempt(problem_number=str(i), category='Math', chosen_answer='A', correct=correct,
+                            dwell_time=10.0)
+            for i, correct in enumerate(outcomes)]
+
+
+def log_lines(stats_dir):
+    return (stats_dir / RESULTS_LOG_FILE).read_bytes().splitlines()
+
+
+def test_results_are_appended_one_line_each(tmp_path):
+    stats = ExamStats(str(tmp_path))
+    stats.add_result(2, 50.0, 60.0, 'Practice', attempts(True, False))
+    stats.add_result(2, 100.0, 30.0, 'Practice', attempts(True, True))
+    assert len(log_lines(tmp_path)) == 2
+    assert [result.score for result in ExamStats(str(tmp_path)).results] == [50.0, 100.0]
+
+
+def test_summary_answers_without_reading_the_log(tmp_path):
+    stats = ExamStats(str(tmp_path))
+    stats.add_result(2, 50.0, 60.0, 'Practice', attempts(True, False))
+    stats.add_result(2, 100.0, 30.0, 'Practice', attempts(True, True))
+
+    reopened = ExamStats(str(tmp_path))
+    assert reopened.get_statistics() == {'exams_taken': 2, 'average_score': 75.0, 'average_time_per_question': 22.5}
+    assert reopened.get_category_statistics()['Math']['accuracy'] == 75.0
+    assert reopened._results is None  # Nothing was parsed from the log
+
+
+def test_summary_is_rebuilt_when_the_log_changed(tmp_path):
+    stats = ExamStats(str(tmp_path))
+    stats.add_result(1, 100.0, 10.0, 'Practice')
+    # Another copy of the program appended without updating the summary
+    with open(tmp_path / RESULTS_LOG_FILE, 'ab') as f:
+        f.write(b'{"date":"2024-01-01 00:00:00","num_questions":1,"score":0.0,"time_taken":10.0,'
+                b'"test_type":"Practice","attempts":[]}\n')
+    assert ExamStats(str(tmp_path)).get_statistics()['exams_taken'] == 2
+
+
+def test_log_is_compacted_periodically(tmp_path, monkeypatch):
+    monkeypatch.setattr(exam_stats, 'COMPACT_EVERY', 3)
+    stats = ExamStats(str(tmp_path))
+    for score in (10.0, 20.0, 30.0):
+        stats.add_result(1, score, 10.0, 'Practice')
+    summary = json.loads((tmp_path / SUMMARY_FILE).read_text())
+    assert summary['appends_since_compaction'] == 0
+    assert len(log_lines(tmp_path)) == 3
+
+
+def test_torn_final_line_is_dropped(tmp_path):
+    stats = ExamStats(str(tmp_path))
+    stats.add_result(1, 100.0, 10.0, 'Practice')
+    with open(tmp_path / RESULTS_LOG_FILE, 'ab') as f:
+        f.write(b'{"date":"2024-01-')
+
+    reopened = ExamStats(str(tmp_path))
+    assert [result.score for result in reopened.results] == [100.0]
+    assert len(log_lines(tmp_path)) == 1
+    assert not (tmp_path / (RESULTS_LOG_FILE + REJECTED_SUFFIX)).exists()
+
+
+def test_lines_from_another_schema_are_kept(tmp_path):
+    stats = ExamStats(str(tmp_path))
+    stats.add_result(1, 100.0, 10.0, 'Practice')
+    foreign = b'{"date":"2024-01-01 00:00:00","num_questions":1,"score":0.0,"time_taken":1.0,"mode":"timed"}\n'
+    with open(tmp_path / RESULTS_LOG_FILE, 'ab') as f:
+        f.write(foreign)
+
+    reopened = ExamStats(str(tmp_path))
+    assert len(reopened.results) == 1
+    assert (tmp_path / (RESULTS_LOG_FILE + REJECTED_SUFFIX)).read_bytes() == foreign
+    assert len(log_lines(tmp_path)) == 1
+
+
+def test_append_after_a_torn_line_starts_a_new_line(tmp_path):
+    (tmp_path / RESULTS_LOG_FILE).write_bytes(b'{"date":"2024-01-')
+    stats = ExamStats(str(tmp_path))
+    stats.add_result(1, 100.0, 10.0, 'Practice')
+    assert [result.score for result in ExamStats(str(tmp_path)).results] == [100.0]
+
+
+def test_result_rows_are_read_lazily(tmp_path):
+    stats = ExamStats(str(tmp_path))
+    for score in (10.0, 20.0, 30.0):
+        stats.add_result(1, score, 10.0, 'Practice')
+
+    reopened = ExamStats(str(tmp_path))
+    rows = reopened.result_rows()
+    assert len(rows) == 3
+    assert rows[-1].score == 30.0
+    assert rows[0].score == 10.0
+    assert reopened._results is None
+
+
+def test_legacy_stats_are_migrated_and_kept(tmp_path):
+    legacy = {'results': [{'date': '2023-05-01 10:00:00', 'num_questions': 5, 'score': 80.0,
+                           'time_taken': 300.0, 'test_type': 'Practice'}]}
+    (tmp_path / LEGACY_STATS_FILE).write_text(json.dumps(legacy))
+    stats = ExamStats(str(tmp_path))
+    assert stats.get_statistics()['exams_taken'] == 1
+    assert (tmp_path / LEGACY_STATS_FILE).exists()
+    assert len(log_lines(tmp_path)) == 1
+
+
+def test_clear_statistics(tmp_path):
+    stats = ExamStats(str(tmp_path))
+    stats.add_result(1, 100.0, 10.0, 'Practice')
+    stats.clear_statistics()
+    assert ExamStats(str(tmp_path)).get_statistics()['exams_taken'] == 0
@@ -0,0 +1,99 @@
+"""
+Tests for the SQLite statistics backend and its migration from the JSON files
+"""
+
+import pytest
+
+from simulator_files import exam_stats_sqlite
+from simulator_files.exam_stats import RESULTS_LOG_FILE, SUMMARY_FILE, ExamStats, QuestionAttempt
+from simulator_files.exam_stats_sqlite import SQLiteExamStats
+
+
+def attempts(categories, outcomes):
+    return [QuestionAttempt(problem_number=str(i), category=category, chosen_answer='B' if correct else None,
+                            correct=correct, dwell_time=5.0 + i)
+            for i, (category, correct) in enumerate(zip(categories, outcomes))]
+
+
+@pytest.fixture
+def json_stats(tmp_path):
+    stats = ExamStats(str(tmp_path))
+    stats.add_result(3, 66.7, 90.0, 'Practice', attempts(['Math', 'Math', 'Fluids'], [True, False, True]))
+    stats.add_result(2, 50.0, 40.0, 'Full', attempts(['Fluids', 'Ethics'], [False, True]))
+    stats.add_result(1, 100.0, 12.0, 'Practice', attempts(['Math'], [True]))
+    return stats
+
+
+def test_migration_matches_the_json_statistics(tmp_path, json_stats):
+    database = SQLiteExamStats(str(tmp_path))
+    try:
+        assert database.results == json_stats.results
+        assert database.get_statistics() == pytest.approx(json_stats.get_statistics())
+        json_categories = json_stats.get_category_statistics()
+        sqlite_categories = database.get_category_statistics()
+        assert sqlite_categories.keys() == json_categories.keys()
+        for category, rates in json_categories.items():
+            assert sqlite_categories[category] == pytest.approx(rates)
+            assert database.category_accuracy_history(category) == pytest.approx(
+                json_stats.category_accuracy_history(category))
+        assert database.get_problem_statistics('0') == pytest.approx(json_stats.get_problem_statistics('0'))
+        assert database.get_problem_statistics('missing') is None
+    finally:
+        database.close()
+
+
+def test_migration_leaves_the_json_files_alone(tmp_path, json_stats):
+    log_before = (tmp_path / RESULTS_LOG_FILE).read_bytes()
+    summary_before = (tmp_path / SUMMARY_FILE).read_bytes()
+    SQLiteExamStats(str(tmp_path)).close()
+    assert (tmp_path / RESULTS_LOG_FILE).read_bytes() == log_before
+    assert (tmp_path / SUMMARY_FILE).read_bytes() == summary_before
+
+
+def test_migration_runs_once(tmp_path, json_stats):
+    SQLiteExamStats(str(tmp_path)).close()
+    database = SQLiteExamStats(str(tmp_path))
+    try:
+        assert database.get_statistics()['exams_taken'] == 3
+    finally:
+        database.close()
+
+
+def test_results_survive_reopening(tmp_path):
+    database = SQLiteExamStats(str(tmp_path))
+    database.add_result(2, 50.0, 20.0, 'Practice', attempts(['Math', 'Struc'], [True, False]))
+    database.close()
+    database = SQLiteExamStats(str(tmp_path))
+    try:
+        [result] = database.results
+        assert result.score == 50.0
+        assert [attempt.category for attempt in result.attempts] == ['Math', 'Struc']
+    finally:
+        database.close()
+
+
+def test_result_rows_are_paged(tmp_path, monkeypatch):
+    monkeypatch.setattr(exam_stats_sqlite, 'PAGE_ROWS', 2)
+    database = SQLiteExamStats(str(tmp_path))
+    try:
+        for score in range(5):
+            database.add_result(1, float(score), 10.0, 'Practice')
+        reopened = SQLiteExamStats(str(tmp_path))
+        rows = reopened.result_rows()
+        assert len(rows) == 5
+        assert [rows[i].score for i in range(5)] == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert rows[-1].score == 4.0
+        reopened.close()
+    finally:
+        database.close()
+
+
+def test_clear_statistics(tmp_path):
+    database = SQLiteExamStats(str(tmp_path))
+    try:
+        database.add_result(1, 100.0, 10.0, 'Practice', attempts(['Math'], [True]))
+        database.clear_statistics()
+        assert database.get_statistics()['exams_taken'] == 0
+        assert database.get_category_statistics() == {}
+    finally:
+        database.close()
@@ -0,0 +1,31 @@
+"""
+Tests for the LaTeX to Unicode translation used for questions and answer choices
+"""
+
+from simulator_files.latex_unicode import convert_latex_to_unicode
+
+
+def test_spacing_commands():
+    """Thin, medium and thick spaces become spaces; the negative space disappears"""
+    assert convert_latex_to_unicode(r"\(5\,kN\)") == "5 kN"
+    assert convert_latex_to_unicode(r"\(a\:b\;c\>d\)") == "a b c d"
+    assert convert_latex_to_unicode(r"\(x\!y\)") == "xy"
+    assert convert_latex_to_unicode(r"\(10\ m\)") == "10 m"
+
+
+def test_delimiter_sizing_is_dropped():
+    """\\left and \\right keep their delimiter but are not shown themselves"""
+    assert convert_latex_to_unicode(r"\(\left(x+1\right)\)") == "(x+1)"
+    assert convert_latex_to_unicode(r"\(\left[\frac{a+b}{2}\right]\)") == "[(a+b)/2]"
+    assert convert_latex_to_unicode(r"\(\left\{x\right\}\)") == "{x}"
+
+
+def test_invisible_delimiter():
+    """'\\left.' and '\\right.' stand for no delimiter at all"""
+    assert convert_latex_to_unicode(r"\(\left.x\right|\)") == "x|"
+    assert convert_latex_to_unicode(r"\(\left|x\right.\)") == "|x"
+
+
+def test_escaped_characters_are_kept():
+    assert convert_latex_to_unicode(r"50\%") == "50%"
+    assert convert_latex_to_unicode(r"\$100") == "$100"
@@ -0,0 +1,50 @@
+"""
+Tests for the byte-bounded cache of rendered PDF pages
+"""
+
+from simulator_files.page_cache import PageCache
+
+
+def test_evicts_least_recently_used_to_stay_in_budget():
+    cache = PageCache(max_bytes=100)
+    cache.put('a', 'A', nbytes=40)
+    cache.put('b', 'B', nbytes=40)
+    assert cache.get('a') == 'A'  # 'b' is now the least recently used
+    cache.put('c', 'C', nbytes=40)
+    assert 'b' not in cache
+    assert cache.get('a') == 'A'
+    assert cache.get('c') == 'C'
+    assert cache.current_bytes == 80
+    assert cache.stats()['evictions'] == 1
+
+
+def test_replacing_a_key_updates_the_byte_count():
+    cache = PageCache(max_bytes=100)
+    cache.put('a', 'A', nbytes=40)
+    cache.put('a', 'A2', nbytes=60)
+    assert cache.get('a') == 'A2'
+    assert cache.current_bytes == 60
+
+
+def test_oversized_image_is_not_cached():
+    cache = PageCache(max_bytes=100)
+    cache.put('a', 'A', nbytes=40)
+    cache.put('huge', 'H', nbytes=101)
+    assert 'huge' not in cache
+    assert cache.get('a') == 'A'
+
+
+def test_render_from_before_clear_is_dropped():
+    """A render started for the previous document must not land in the new document's cache"""
+    cache = PageCache(max_bytes=100)
+    generation = cache.generation
+    cache.clear()
+    cache.put('a', 'stale', nbytes=10, generation=generation)
+    assert 'a' not in cache
+    cache.put('a', 'fresh', nbytes=10, generation=cache.generation)
+    assert cache.get('a') == 'fresh'
+
+
+def test_zoom_steps_share_a_key():
+    zoom = 1.0 * 1.2 * 1.2 / 1.2 / 1.2
+    assert PageCache.make_key(3, zoom) == PageCache.make_key(3, 1.0)
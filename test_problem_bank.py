@@ -0,0 +1,86 @@
+"""
+Tests for compiling problems_database.json into the memory-mapped problem bank and reading it back
+"""
+
+import json
+
+import pytest
+
+from simulator_files.problem_bank import ProblemBank, ProblemBankError, compile_problem_bank
+from simulator_files.problem_manager import Problem
+
+PROBLEMS = [
+    {"number": "1", "category": "Math", "question": r"Solve \(x^2 = 4\)", "media": "",
+     "choices": ["A) 2", "B) 4"], "correct_answer": "A", "difficulty": "easy"},
+    {"number": "2", "category": "Statics", "question": "Find the reaction.", "media": "beam.png",
+     "media_size": 80, "choices": ["A) 1 kN", "B) 2 kN"], "correct_answer": "B"},
+    {"number": "3", "category": "Math", "question": "Ünïcode question", "media": "",
+     "choices": ["A) α", "B) β"], "correct_answer": "B", "difficulty": "hard"},
+]
+
+
+@pytest.fixture
+def bank_path(tmp_path):
+    json_path = tmp_path / "problems_database.json"
+    json_path.write_text(json.dumps({"problems": PROBLEMS}), encoding="utf-8")
+    path = tmp_path / "problems_database.bin"
+    compile_problem_bank(str(json_path), str(path), prerender=True)
+    return path
+
+
+def test_records_round_trip(bank_path):
+    bank = ProblemBank(str(bank_path))
+    try:
+        assert len(bank) == len(PROBLEMS)
+        for index, problem in enumerate(PROBLEMS):
+            record = bank.record(index)
+            record.pop("rendered")
+            assert record == problem
+    finally:
+        bank.close()
+
+
+def test_attributes_come_from_the_offset_table(bank_path):
+    bank = ProblemBank(str(bank_path))
+    try:
+        assert [bank.category_of(i) for i in range(len(bank))] == ["Math", "Statics", "Math"]
+        assert bank.attributes_of(0) == {"has_media": False, "difficulty": "easy"}
+        assert bank.attributes_of(1) == {"has_media": True, "difficulty": None}
+    finally:
+        bank.close()
+
+
+def test_prerendered_question_segments(bank_path):
+    bank = ProblemBank(str(bank_path))
+    try:
+        problem = Problem.from_dict(bank.record(0))
+    finally:
+        bank.close()
+    segments, choices = problem.rendered
+    assert segments == [("Solve ", (), None), ("x² = 4", ("latex_math", "latex_inline"), "x^2 = 4")]
+    assert choices == ["A) 2", "B) 4"]
+
+
+def test_truncated_bank_is_rejected_when_opened(bank_path):
+    data = bank_path.read_bytes()
+    bank_path.write_bytes(data[:-10])
+    with pytest.raises(ProblemBankError):
+        ProblemBank(str(bank_path))
+
+
+def test_corrupt_record_raises_bank_error(bank_path):
+    data = bank_path.read_bytes()
+    bank_path.write_bytes(data[:-10] + b"\xff" * 10)
+    bank = ProblemBank(str(bank_path))
+    try:
+        with pytest.raises(ProblemBankError):
+            bank.record(len(PROBLEMS) - 1)
+    finally:
+        bank.close()
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "not_a_bank.bin"
+    path.write_bytes(b"PK\x03\x04" + b"\x00" * 64)
+    with pytest.raises(ProblemBankError):
+        ProblemBank(str(path))
@@ -0,0 +1,77 @@
+"""
+Tests for drawing exam questions with per-category quotas
+"""
+
+import random
+
+import pytest
+
+from simulator_files.problem_manager import ProblemManager, allocate_quotas, sample_without_replacement
+
+
+@pytest.fixture(scope="module")
+def manager():
+    return ProblemManager(num_questions=10, seed=1)
+
+
+def test_quotas_follow_the_weights():
+    quotas = allocate_quotas(30, {'a': 100, 'b': 100, 'c': 100}, {'a': 1, 'b': 2, 'c': 3}, random.Random(0))
+    assert quotas == {'a': 5, 'b': 10, 'c': 15}
+
+
+def test_quotas_never_exceed_what_is_available():
+    available = {'a': 2, 'b': 50, 'c': 0}
+    quotas = allocate_quotas(20, available, {'a': 10, 'b': 1, 'c': 5}, random.Random(0))
+    assert quotas['a'] == 2
+    assert quotas['c'] == 0
+    assert sum(quotas.values()) == 20
+
+
+def test_quotas_are_capped_by_the_whole_pool():
+    quotas = allocate_quotas(100, {'a': 3, 'b': 4}, {'a': 1, 'b': 1}, random.Random(0))
+    assert quotas == {'a': 3, 'b': 4}
+
+
+def test_zero_weights_share_equally():
+    assert allocate_quotas(5, {'a': 5}, {'a': 0}, random.Random(0)) == {'a': 5}
+    quotas = allocate_quotas(4, {'a': 5, 'b': 5}, {'a': 0, 'b': 0}, random.Random(0))
+    assert quotas == {'a': 2, 'b': 2}
+
+
+def test_sample_without_replacement_is_distinct():
+    population = range(1000)
+    sample = sample_without_replacement(population, 50, random.Random(3))
+    assert len(set(sample)) == 50
+    assert sorted(sample_without_replacement(range(5), 10, random.Random(3))) == [0, 1, 2, 3, 4]
+
+
+def test_same_seed_same_exam(manager):
+    first = [problem.number for problem in manager.sample_problems(10, seed=42)]
+    second = [problem.number for problem in manager.sample_problems(10, seed=42)]
+    assert first == second
+    assert len(set(first)) == 10
+
+
+def test_selected_categories_only(manager):
+    problems = manager.sample_problems(6, categories=['Math', 'Statics'], seed=7)
+    assert len(problems) == 6
+    assert {problem.category for problem in problems} <= {'Math', 'Statics'}
+
+
+def test_never_more_than_available(manager):
+    available = len(manager.find_problem_indices(['Math']))
+    problems = manager.sample_problems(available + 10, categories=['Math'], seed=7)
+    assert len(problems) == available
+    assert len({problem.number for problem in problems}) == available
+
+
+def test_attribute_filters_restrict_the_pool(manager):
+    problems = manager.sample_problems(50, seed=7, has_media=True)
+    assert problems
+    assert all(problem.media for problem in problems)
+
+
+def test_new_exam_draws_the_requested_count(manager):
+    manager.new_exam(12, ['Math', 'Ethics', 'Econ', 'Statics'])
+    assert manager.total_problems() == 12
+    assert set(manager.get_categories()) <= {'Math', 'Ethics', 'Econ', 'Statics'}